@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+ClipSense Startup Benchmark
+Measures worker start-up cost and fails when it exceeds its budgets:
+- cold import time of each worker module (a fresh interpreter per module)
+- time from launching the worker to its first /ping answer
+- time from launching the worker to its first finished clip analysis,
+  on a synthetic clip generated with tests/e2e_assets.py
+
+Results are printed as JSON on stdout (progress goes to stderr), so CI
+can keep them and compare runs.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import platform
+import argparse
+import tempfile
+import subprocess
+import contextlib
+import urllib.request
+import urllib.error
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent
+WORKER_DIR = ROOT_DIR / "worker"
+
+# Seconds; override on the command line
+DEFAULT_BUDGETS = {
+    "import": 2.0,           # Any single worker module
+    "main_import": 1.5,      # The API module the app launches
+    "ping": 5.0,             # Launch to first /ping
+    "first_analysis": 60.0,  # Launch to first analyzed clip
+}
+
+# Imported in the child; prints the import time as JSON
+IMPORT_SNIPPET = (
+    "import json, time; t = time.perf_counter(); import {module}; "
+    "print(json.dumps(time.perf_counter() - t))"
+)
+
+def log(message):
+    """Progress output (stderr, so stdout stays machine-readable)"""
+    print(message, file=sys.stderr, flush=True)
+
+def worker_modules():
+    """Every importable module of the worker package"""
+    return sorted(path.stem for path in WORKER_DIR.glob("*.py") if path.stem != "__init__")
+
+def measure_import(module, env, timeout):
+    """Import one module in a fresh interpreter, as the worker does (from the worker directory)"""
+    try:
+        result = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET.format(module=module)],
+            cwd=WORKER_DIR, env=env, capture_output=True, text=True, timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        return None, f"timed out after {timeout}s"
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        return None, lines[-1] if lines else f"exit code {result.returncode}"
+    return json.loads(result.stdout.strip().splitlines()[-1]), None
+
+def find_free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def request_json(url, payload=None, timeout=5.0):
+    """GET (or POST payload) and decode the JSON response"""
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+def generate_media(media_root):
+    """Synthetic clip and music from the E2E asset generator, in a fresh directory"""
+    sys.path.insert(0, str(ROOT_DIR / "tests"))
+    import e2e_assets
+
+    # The generator writes to tests/media relative to the working directory
+    os.makedirs(media_root / "tests" / "media", exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(media_root)
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            e2e_assets.generate_clip2()
+            e2e_assets.generate_music()
+    finally:
+        os.chdir(cwd)
+    media_dir = media_root / "tests" / "media"
+    return str(media_dir / "clip2.mp4"), str(media_dir / "music.wav")
+
+def wait_for_ping(base_url, process, deadline):
+    """Poll /ping until it answers; False if the worker exits or the deadline passes"""
+    while time.time() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            request_json(f"{base_url}/ping", timeout=1.0)
+            return True
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.02)
+    return False
+
+def wait_for_job(base_url, job_id, deadline):
+    """Poll a background job until it finishes; returns its final status"""
+    status = {}
+    while time.time() < deadline:
+        status = request_json(f"{base_url}/background/status/{job_id}")
+        if status.get("status") in ("completed", "failed", "cancelled"):
+            return status
+        time.sleep(0.1)
+    return {**status, "error": "timed out"}
+
+def measure_worker(env, budgets, skip_analysis, log_path):
+    """Launch the worker and time its first /ping and its first clip analysis"""
+    results = {}
+    port = find_free_port()
+    base_url = f"http://127.0.0.1:{port}"
+
+    clip_path = music_path = None
+    if not skip_analysis:
+        log("🎬 Generating synthetic media...")
+        clip_path, music_path = generate_media(Path(env["CLIPSENSE_CACHE_DIR"]).parent / "media")
+
+    log(f"🚀 Launching worker on port {port}...")
+    with open(log_path, "w") as worker_log:
+        start_time = time.time()
+        process = subprocess.Popen(
+            [sys.executable, "main.py", "--port", str(port)],
+            cwd=WORKER_DIR, env=env, stdout=worker_log, stderr=subprocess.STDOUT
+        )
+        try:
+            # Generous deadlines: the budgets decide pass/fail, these only stop a hung worker
+            if wait_for_ping(base_url, process, start_time + max(60.0, budgets["ping"] * 4)):
+                results["ping"] = {"seconds": round(time.time() - start_time, 3)}
+            else:
+                results["ping"] = {"seconds": None, "error": "worker did not answer /ping"}
+                return results
+
+            if not skip_analysis:
+                request_time = time.time()
+                response = request_json(f"{base_url}/background/start",
+                                        {"clips": [clip_path], "music_path": music_path, "target_duration": 10})
+                if not response.get("ok"):
+                    results["first_analysis"] = {"seconds": None, "error": response.get("error")}
+                    return results
+                status = wait_for_job(base_url, response["job_id"], start_time + max(300.0, budgets["first_analysis"] * 4))
+                if status.get("status") == "completed":
+                    results["first_analysis"] = {
+                        "seconds": round(time.time() - start_time, 3),
+                        "request_seconds": round(time.time() - request_time, 3),
+                    }
+                else:
+                    results["first_analysis"] = {"seconds": None, "error": status.get("error") or status.get("status")}
+
+            results["health"] = request_json(f"{base_url}/health").get("subsystems")
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+    return results
+
+def check_budget(name, measurement, budget, failures):
+    """Attach the budget to a measurement and record a failure if it is exceeded"""
+    measurement["budget"] = budget
+    seconds = measurement.get("seconds")
+    measurement["ok"] = seconds is not None and seconds <= budget
+    if not measurement["ok"]:
+        reason = measurement.get("error") or f"{seconds:.2f}s > {budget:.2f}s budget"
+        failures.append(f"{name}: {reason}")
+
+def main():
+    """Main benchmark function"""
+    parser = argparse.ArgumentParser(description="ClipSense startup benchmark")
+    parser.add_argument("--import-budget", type=float, default=DEFAULT_BUDGETS["import"],
+                        help="Max seconds to import any worker module")
+    parser.add_argument("--main-import-budget", type=float, default=DEFAULT_BUDGETS["main_import"],
+                        help="Max seconds to import the API module (main)")
+    parser.add_argument("--ping-budget", type=float, default=DEFAULT_BUDGETS["ping"],
+                        help="Max seconds from launch to the first /ping answer")
+    parser.add_argument("--analysis-budget", type=float, default=DEFAULT_BUDGETS["first_analysis"],
+                        help="Max seconds from launch to the first analyzed clip")
+    parser.add_argument("--modules", nargs="+", help="Only measure these worker modules")
+    parser.add_argument("--skip-imports", action="store_true", help="Skip per-module import timing")
+    parser.add_argument("--skip-analysis", action="store_true", help="Skip time-to-first-analysis")
+    parser.add_argument("--output", "-o", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    budgets = {
+        "import": args.import_budget,
+        "main_import": args.main_import_budget,
+        "ping": args.ping_budget,
+        "first_analysis": args.analysis_budget,
+    }
+
+    log("⏱️  ClipSense Startup Benchmark")
+    log("=" * 50)
+
+    with tempfile.TemporaryDirectory(prefix="clipsense-bench-") as temp_dir:
+        # Empty caches and job store: measure a first launch, not a warmed-up machine
+        env = {
+            **os.environ,
+            "PYTHONUNBUFFERED": "1",
+            "CLIPSENSE_CACHE_DIR": os.path.join(temp_dir, "cache"),
+            "CLIPSENSE_JOB_STORE": os.path.join(temp_dir, "jobs.sqlite"),
+        }
+        failures = []
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "budgets": budgets,
+            "imports": {},
+        }
+
+        if not args.skip_imports:
+            for module in args.modules or worker_modules():
+                seconds, error = measure_import(module, env, timeout=max(60.0, budgets["import"] * 10))
+                measurement = {"seconds": round(seconds, 3) if seconds is not None else None}
+                if error:
+                    measurement["error"] = error
+                check_budget(f"import {module}", measurement,
+                             budgets["main_import"] if module == "main" else budgets["import"], failures)
+                report["imports"][module] = measurement
+                log(f"{'✅' if measurement['ok'] else '❌'} import {module}: "
+                    f"{measurement['seconds'] if seconds is not None else error}")
+
+        worker_log = os.path.join(temp_dir, "worker.log")
+        worker_results = measure_worker(env, budgets, args.skip_analysis, worker_log)
+        for name in ("ping", "first_analysis"):
+            if name in worker_results:
+                check_budget(name, worker_results[name], budgets[name], failures)
+                log(f"{'✅' if worker_results[name]['ok'] else '❌'} {name}: {worker_results[name]['seconds']}")
+            elif name == "ping" or not args.skip_analysis:
+                failures.append(f"{name}: not measured")
+        report.update(worker_results)
+
+        if failures:
+            # Keep the worker's output where it explains the failure
+            with open(worker_log) as f:
+                report["worker_log_tail"] = f.read().splitlines()[-30:]
+
+    report["failures"] = failures
+    report["ok"] = not failures
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+
+    if failures:
+        log(f"❌ {len(failures)} budget(s) exceeded:")
+        for failure in failures:
+            log(f"   {failure}")
+        sys.exit(1)
+    log("🎉 All startup budgets met")
+
+if __name__ == "__main__":
+    main()
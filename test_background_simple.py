@@ -10,10 +10,11 @@ import os
 # Add worker directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'worker'))
 
-from background_processor import background_processor, ProcessingStatus
+from background_processor import get_background_processor, ProcessingStatus
 
 async def test_background_processor():
     """Test the background processor directly"""
+    background_processor = get_background_processor()
     print("🚀 Testing Background Processor Directly")
     print("=" * 50)
     
@@ -0,0 +1,124 @@
+"""
+Persistent analysis cache tests: content-addressed keys, LRU eviction and
+degrading to a miss when the database fails
+"""
+
+import itertools
+import json
+import os
+import shutil
+from types import SimpleNamespace
+
+import pytest
+
+import analysis_cache
+from analysis_cache import AnalysisCache
+
+PARAMS = {"version": 1, "sample_rate": 2.0}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = AnalysisCache(db_path=str(tmp_path / "cache.sqlite"))
+    yield cache
+    cache._conn.close()
+
+
+@pytest.fixture
+def clip(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"frame data" * 100)
+    return str(path)
+
+
+class TestKeys:
+    """Entries follow file content and analysis parameters, not paths"""
+
+    def test_round_trip(self, cache, clip):
+        cache.put("emotion", clip, PARAMS, {"joy": 0.5})
+
+        assert cache.get("emotion", clip, PARAMS) == {"joy": 0.5}
+        assert cache.get("objects", clip, PARAMS) is None
+
+    def test_changed_params_miss(self, cache, clip):
+        cache.put("emotion", clip, PARAMS, {"joy": 0.5})
+
+        assert cache.get("emotion", clip, {**PARAMS, "version": 2}) is None
+        assert cache.get("emotion", clip, {**PARAMS, "sample_rate": 1.0}) is None
+
+    def test_changed_content_misses(self, cache, clip):
+        cache.put("emotion", clip, PARAMS, {"joy": 0.5})
+        with open(clip, "ab") as f:
+            f.write(b"re-exported")
+
+        assert cache.get("emotion", clip, PARAMS) is None
+
+    def test_touched_file_misses(self, cache, clip):
+        cache.put("emotion", clip, PARAMS, {"joy": 0.5})
+        stat = os.stat(clip)
+        os.utime(clip, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        assert cache.get("emotion", clip, PARAMS) is None
+
+    def test_moved_file_hits(self, cache, clip, tmp_path):
+        cache.put("emotion", clip, PARAMS, {"joy": 0.5})
+        moved = tmp_path / "elsewhere" / "clip.mp4"
+        moved.parent.mkdir()
+        shutil.copy2(clip, moved)
+
+        assert cache.get("emotion", str(moved), PARAMS) == {"joy": 0.5}
+
+    def test_missing_file_is_a_miss(self, cache, tmp_path):
+        missing = str(tmp_path / "missing.mp4")
+
+        cache.put("emotion", missing, PARAMS, {"joy": 0.5})
+        assert cache.get("emotion", missing, PARAMS) is None
+
+
+class TestEviction:
+    """Over its size cap the cache drops the least recently used entries"""
+
+    @pytest.fixture(autouse=True)
+    def clock(self, monkeypatch):
+        # Strictly increasing access times, so LRU order does not depend on timer resolution
+        ticks = itertools.count(1)
+        monkeypatch.setattr(analysis_cache, "time", SimpleNamespace(time=lambda: float(next(ticks))))
+
+    def make_clips(self, tmp_path, count):
+        paths = []
+        for i in range(count):
+            path = tmp_path / f"clip{i}.mp4"
+            path.write_bytes(f"clip {i}".encode() * 50)
+            paths.append(str(path))
+        return paths
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        payload = {"data": "x" * 100}
+        entry_size = len(json.dumps(payload))
+        cache = AnalysisCache(db_path=str(tmp_path / "cache.sqlite"), max_bytes=entry_size * 2)
+        a, b, c = self.make_clips(tmp_path, 3)
+
+        cache.put("emotion", a, PARAMS, payload)
+        cache.put("emotion", b, PARAMS, payload)
+        # Reading a makes b the least recently used
+        assert cache.get("emotion", a, PARAMS) == payload
+        cache.put("emotion", c, PARAMS, payload)
+
+        assert cache.get("emotion", b, PARAMS) is None
+        assert cache.get("emotion", a, PARAMS) == payload
+        assert cache.get("emotion", c, PARAMS) == payload
+        assert cache.stats()["entries"] == 2
+        assert cache.stats()["size_bytes"] <= cache.max_bytes
+        cache._conn.close()
+
+
+class TestDatabaseErrors:
+    """A failing database degrades to a miss (get) or a no-op (put)"""
+
+    def test_get_and_put_survive_sqlite_errors(self, tmp_path, clip):
+        cache = AnalysisCache(db_path=str(tmp_path / "cache.sqlite"))
+        cache.put("emotion", clip, PARAMS, {"joy": 0.5})
+        cache._conn.close()
+
+        assert cache.get("emotion", clip, PARAMS) is None
+        cache.put("emotion", clip, PARAMS, {"joy": 0.7})
@@ -0,0 +1,143 @@
+"""
+Music analysis cache tests: one full-track analysis serves every target duration
+"""
+
+import asyncio
+import shutil
+import sqlite3
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+import simple_beat_detector
+from analysis_cache import AnalysisCache
+from config import Config
+from simple_beat_detector import SimpleBeatDetector
+
+SAMPLE_RATE = 22050
+TRACK_SECONDS = 20.0
+
+
+@pytest.fixture
+def track(tmp_path):
+    """A 100 BPM click track"""
+    if shutil.which("ffmpeg") is None:
+        pytest.skip("FFmpeg not available")
+    audio = np.zeros(int(TRACK_SECONDS * SAMPLE_RATE), dtype=np.float32)
+    click = (np.sin(2 * np.pi * 1000 * np.arange(441) / SAMPLE_RATE) * np.hanning(441)).astype(np.float32)
+    for beat in np.arange(0.0, TRACK_SECONDS - 0.1, 0.6):
+        start = int(beat * SAMPLE_RATE)
+        audio[start:start + len(click)] += click
+    path = tmp_path / "music.wav"
+    sf.write(str(path), audio, SAMPLE_RATE)
+    return str(path)
+
+
+def grid_track(music_path, max_duration=None):
+    """A 100 BPM grid over the track, shaped like _analyze_track() output"""
+    duration = TRACK_SECONDS if max_duration is None else min(max_duration, TRACK_SECONDS)
+    beats = np.round(np.arange(0.0, duration, 0.6), 6)
+    return {
+        "tempo": 100.0,
+        "music_start": 0.0,
+        "duration": duration,
+        "complete": max_duration is None or max_duration >= TRACK_SECONDS,
+        "analyzed_duration": max_duration,
+        "beat_times": beats.tolist(),
+        "bar_times": beats[::4].tolist(),
+        "onset_hop_seconds": 512 / SAMPLE_RATE,
+        "onset_envelope": [],
+    }
+
+
+@pytest.fixture
+def detector(monkeypatch):
+    """A detector with a deterministic track analysis that counts calls and fails the test if it falls back"""
+    detector = SimpleBeatDetector()
+    detector.analyses = []
+
+    async def analyze_track(music_path, max_duration=None):
+        detector.analyses.append(max_duration)
+        return grid_track(music_path, max_duration)
+
+    def no_fallback(target_duration=None):
+        pytest.fail("analysis fell back to the default grid")
+
+    monkeypatch.setattr(detector, "_analyze_track", analyze_track)
+    monkeypatch.setattr(detector, "_fallback_analysis", no_fallback)
+    return detector
+
+
+@pytest.fixture
+def beat_tracking(track):
+    """Skip when librosa's beat tracker cannot run against the installed SciPy"""
+    try:
+        asyncio.run(SimpleBeatDetector()._analyze_track(track, max_duration=5))
+    except AttributeError as e:
+        pytest.skip(f"librosa beat tracking unavailable: {e}")
+
+
+@pytest.fixture
+def music_cache(tmp_path, monkeypatch):
+    cache = AnalysisCache(db_path=str(tmp_path / "music_cache.sqlite"))
+    monkeypatch.setattr(Config, "ANALYSIS_CACHE_ENABLED", True)
+    monkeypatch.setattr(simple_beat_detector, "_music_cache", cache)
+    monkeypatch.setattr(simple_beat_detector, "_music_cache_failed", False)
+    return cache
+
+
+class TestMusicCache:
+    """A cached full-track analysis is filtered to each requested duration"""
+
+    def test_one_analysis_serves_every_target_duration(self, detector, music_cache, track):
+        short = asyncio.run(detector.analyze_music(track, target_duration=5))
+        longer = asyncio.run(detector.analyze_music(track, target_duration=15))
+
+        # The first call analyzes the whole track; the longer one reuses it
+        assert detector.analyses == [None]
+        assert not short["cached"] and longer["cached"]
+        assert max(short["beat_times"]) <= 5 and max(longer["beat_times"]) <= 15
+        assert max(longer["beat_times"]) > 10
+        assert longer["beat_times"][:len(short["beat_times"])] == short["beat_times"]
+
+    def test_without_cache_only_the_target_duration_is_analyzed(self, detector, monkeypatch, track):
+        monkeypatch.setattr(Config, "ANALYSIS_CACHE_ENABLED", False)
+
+        result = asyncio.run(detector.analyze_music(track, target_duration=5))
+
+        assert detector.analyses == [5]
+        assert not result["cached"]
+
+    def test_cache_failures_do_not_discard_the_analysis(self, detector, music_cache, monkeypatch, track):
+        def locked(*args):
+            raise sqlite3.OperationalError("database is locked")
+        monkeypatch.setattr(music_cache, "get", locked)
+        monkeypatch.setattr(music_cache, "put", locked)
+
+        result = asyncio.run(detector.analyze_music(track, target_duration=10))
+
+        assert result["tempo"] == 100.0
+        assert not result["cached"]
+
+
+class TestCompleteFlag:
+    """Only analyses that reached the end of the track are cacheable"""
+
+    def test_truncated_decode_is_incomplete(self, beat_tracking, track):
+        truncated = asyncio.run(SimpleBeatDetector()._analyze_track(track, max_duration=5))
+        whole = asyncio.run(SimpleBeatDetector()._analyze_track(track, max_duration=TRACK_SECONDS + 10))
+
+        assert not truncated["complete"]
+        assert whole["complete"]
+
+    def test_incomplete_analysis_is_not_cached(self, music_cache, track):
+        detector = SimpleBeatDetector()
+
+        detector._store_cached_track(track, grid_track(track, max_duration=5))
+
+        assert music_cache.stats()["entries"] == 0
+        assert detector._load_cached_track(track) is None
+
+        detector._store_cached_track(track, grid_track(track))
+        assert detector._load_cached_track(track)["complete"]
@@ -0,0 +1,124 @@
+"""
+Clip pre-screening tests: unusable clips are rejected before full analysis
+"""
+
+import asyncio
+import shutil
+import subprocess
+
+import pytest
+
+import analysis_executor
+from analysis_executor import AnalysisExecutor
+from clip_prescreener import ClipPrescreener
+
+GOOD = {"duration": 10.0, "brightness": 0.5, "contrast": 0.25, "sharpness": 300.0, "motion": 0.05}
+
+
+def metrics(**overrides):
+    return {**GOOD, **overrides}
+
+
+class TestPrescreenRules:
+    """evaluate() applies the configured rejection thresholds"""
+
+    @pytest.mark.parametrize("overrides,reason", [
+        ({"duration": 0.4}, "too short"),
+        ({"brightness": 0.01}, "black"),
+        ({"sharpness": 2.0}, "out of focus"),
+        ({"motion": 0.95}, "too shaky"),
+    ])
+    def test_rejects_unusable_clips(self, overrides, reason):
+        result = ClipPrescreener().evaluate("clip.mp4", metrics(**overrides))
+
+        assert result.rejected
+        assert reason in result.reason
+
+    def test_accepts_usable_clips(self):
+        result = ClipPrescreener().evaluate("clip.mp4", metrics())
+
+        assert not result.rejected
+        assert result.reason is None
+        assert 0.0 < result.score <= 1.0
+
+    def test_sharper_steadier_clips_score_higher(self):
+        prescreener = ClipPrescreener()
+        good = prescreener.evaluate("good.mp4", metrics())
+        soft = prescreener.evaluate("soft.mp4", metrics(sharpness=40.0, motion=0.5))
+
+        assert good.score > soft.score
+
+
+@pytest.fixture
+def clips(tmp_path):
+    """A usable clip, a black clip, a flat (featureless) clip and a sub-second clip"""
+    if shutil.which("ffmpeg") is None:
+        pytest.skip("FFmpeg not available")
+    sources = {
+        "good": "testsrc=size=320x240:rate=25:duration=3",
+        "black": "color=c=black:size=320x240:rate=25:duration=3",
+        "flat": "color=c=gray:size=320x240:rate=25:duration=3",
+        "short": "testsrc=size=320x240:rate=25:duration=0.4",
+    }
+    paths = {}
+    for name, source in sources.items():
+        path = tmp_path / f"{name}.mp4"
+        subprocess.run(
+            ["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", source, "-c:v", "libx264", "-pix_fmt", "yuv420p", str(path)],
+            check=True
+        )
+        paths[name] = str(path)
+    return paths
+
+
+@pytest.fixture(autouse=True)
+def thread_executor(monkeypatch):
+    # Measure in a thread pool: no worker processes to spawn for a few tiny clips
+    executor = AnalysisExecutor(mode="thread", workers=1)
+    monkeypatch.setattr(analysis_executor, "_executor", executor)
+    yield
+    executor.shutdown()
+
+
+class TestScreenClips:
+    """screen_clips() measures real clips and keeps only usable ones"""
+
+    def test_rejects_black_flat_and_short_clips(self, clips):
+        kept, rejected = asyncio.run(ClipPrescreener().screen_clips(list(clips.values())))
+
+        assert kept == [clips["good"]]
+        reasons = {result.clip_path: result.reason for result in rejected}
+        assert "black" in reasons[clips["black"]]
+        assert "out of focus" in reasons[clips["flat"]]
+        assert "too short" in reasons[clips["short"]]
+
+    def test_backfills_best_rejects_to_keep_at_least(self, clips):
+        prescreener = ClipPrescreener()
+        _, all_rejected = asyncio.run(prescreener.screen_clips(list(clips.values())))
+        kept, rejected = asyncio.run(prescreener.screen_clips(list(clips.values()), keep_at_least=2))
+
+        # Rejects come back best first; the best one fills the shortfall
+        assert kept == [clips["good"], all_rejected[0].clip_path]
+        assert [result.clip_path for result in rejected] == [result.clip_path for result in all_rejected[1:]]
+
+    def test_unreadable_clip_is_rejected(self, tmp_path):
+        broken = tmp_path / "broken.mp4"
+        broken.write_bytes(b"not a video")
+
+        kept, rejected = asyncio.run(ClipPrescreener().screen_clips([str(broken)]))
+
+        assert kept == []
+        assert "unreadable" in rejected[0].reason
+
+    def test_cache_write_failure_does_not_reject_the_clip(self, clips):
+        class BrokenCache:
+            def get(self, *args):
+                return None
+
+            def put(self, *args):
+                raise OSError("disk full")
+
+        result = asyncio.run(ClipPrescreener(analysis_cache=BrokenCache()).screen(clips["good"]))
+
+        assert not result.rejected
+        assert result.score > 0
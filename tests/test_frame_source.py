@@ -0,0 +1,141 @@
+"""
+Frame reader tests: every reader and sampling mode must feed consumers the
+same frame timestamps, so analysis results do not depend on the reader
+"""
+
+import asyncio
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from cancellation import OperationCancelled
+from config import Config
+from emotion_analyzer import EmotionAnalyzer
+from frame_source import FrameConsumer, FrameSource, VideoOpenError
+import analysis_executor
+import emotion_analyzer
+import frame_source
+
+CLIP = str(Path(__file__).parent / "media" / "clip1.mp4")
+
+
+class RecordingConsumer(FrameConsumer):
+    """Records the timestamp and scale of every frame it receives"""
+
+    def __init__(self, interval_seconds: float, needs_color: bool = False):
+        self.interval_seconds = interval_seconds
+        self.needs_color = needs_color
+        self.timestamps = []
+        self.scales = []
+
+    def on_frame(self, features, timestamp):
+        self.timestamps.append(round(timestamp, 6))
+        self.scales.append(features.scale)
+
+
+def run_reader(monkeypatch, reader, sampling_mode=None, intervals=(1.0, 1.5)):
+    monkeypatch.setattr(Config, "FRAME_READER", reader)
+    consumers = [RecordingConsumer(interval) for interval in intervals]
+    FrameSource(CLIP, sampling_mode=sampling_mode).run(consumers)
+    return consumers
+
+
+@pytest.fixture(autouse=True)
+def require_clip():
+    if shutil.which("ffmpeg") is None:
+        pytest.skip("FFmpeg not available")
+    if not Path(CLIP).exists():
+        pytest.skip(f"Test clip missing: {CLIP}")
+
+
+class TestFrameReaderParity:
+    """The ffmpeg pipe and the OpenCV sampling modes agree on which frames are analyzed"""
+
+    @pytest.mark.parametrize("sampling_mode", ["decode", "grab", "seek"])
+    def test_ffmpeg_matches_opencv(self, monkeypatch, sampling_mode):
+        opencv = run_reader(monkeypatch, "opencv", sampling_mode)
+        ffmpeg = run_reader(monkeypatch, "ffmpeg")
+
+        for opencv_consumer, ffmpeg_consumer in zip(opencv, ffmpeg):
+            assert opencv_consumer.timestamps
+            assert ffmpeg_consumer.timestamps == opencv_consumer.timestamps
+
+    def test_consumers_sample_at_their_own_interval(self, monkeypatch):
+        fast, slow = run_reader(monkeypatch, "ffmpeg", intervals=(1.0, 2.0))
+
+        assert fast.timestamps[:3] == [0.0, 1.0, 2.0]
+        assert slow.timestamps[:3] == [0.0, 2.0, 4.0]
+
+    def test_downscaled_frames_report_their_scale(self, monkeypatch):
+        monkeypatch.setattr(Config, "ANALYSIS_FRAME_WIDTH", 640)
+        ffmpeg = run_reader(monkeypatch, "ffmpeg")[0]
+        opencv = run_reader(monkeypatch, "opencv", "grab")[0]
+
+        # clip1 is 1280 wide
+        assert set(ffmpeg.scales) == {0.5}
+        assert set(opencv.scales) == {1.0}
+
+    def test_ffmpeg_failure_falls_back_to_opencv(self, monkeypatch):
+        expected = run_reader(monkeypatch, "opencv", "grab")
+
+        real_popen = subprocess.Popen
+
+        def broken_ffmpeg(cmd, *args, **kwargs):
+            # Same command, but ffmpeg cannot open its input
+            cmd = [arg if arg != CLIP else CLIP + ".missing" for arg in cmd]
+            return real_popen(cmd, *args, **kwargs)
+
+        monkeypatch.setattr(frame_source.subprocess, "Popen", broken_ffmpeg)
+        fallback = run_reader(monkeypatch, "ffmpeg")
+
+        for expected_consumer, fallback_consumer in zip(expected, fallback):
+            assert fallback_consumer.timestamps == expected_consumer.timestamps
+            assert set(fallback_consumer.scales) == {1.0}
+
+
+class TestReaderErrors:
+    """An unopenable clip and a reader failing mid-clip are reported differently"""
+
+    def test_unopenable_clip_raises_video_open_error(self, tmp_path):
+        broken = tmp_path / "broken.mp4"
+        broken.write_bytes(b"not a video")
+
+        with pytest.raises(VideoOpenError):
+            FrameSource(str(broken)).run([RecordingConsumer(1.0)])
+
+    @staticmethod
+    def analyze_emotions(monkeypatch, error):
+        analyzer = EmotionAnalyzer()
+        monkeypatch.setattr(analyzer, "_analyze_audio_emotions_sync",
+                            lambda path: {emotion: 0.0 for emotion in analyzer.emotion_categories})
+
+        def failing_run(self, consumers):
+            raise error
+        monkeypatch.setattr(emotion_analyzer.FrameSource, "run", failing_run)
+        return asyncio.run(analyzer.analyze_clip(CLIP))
+
+    def test_emotions_fall_back_to_audio_for_unopenable_clips(self, monkeypatch):
+        result = self.analyze_emotions(monkeypatch, VideoOpenError("Could not open video file"))
+
+        assert result.clip_path == CLIP
+
+    def test_emotions_do_not_hide_a_mid_clip_reader_failure(self, monkeypatch):
+        with pytest.raises(ValueError, match="frame reader failed"):
+            self.analyze_emotions(monkeypatch, ValueError("ffmpeg frame reader failed (exit code 1)"))
+
+    def test_shared_analysis_keeps_the_frame_pass_error(self, monkeypatch):
+        analyzers = analysis_executor._analyzers()
+
+        def failing_audio(path):
+            raise RuntimeError("audio failed too")
+
+        def cancelled_run(self, consumers):
+            raise OperationCancelled("cancelled mid-pass")
+
+        monkeypatch.setattr(analyzers.emotion_analyzer, "_analyze_audio_emotions_sync", failing_audio)
+        monkeypatch.setattr(analysis_executor.FrameSource, "run", cancelled_run)
+
+        with pytest.raises(OperationCancelled):
+            analysis_executor.run_shared_analysis(CLIP)
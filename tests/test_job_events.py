@@ -0,0 +1,114 @@
+"""
+Job event outbox tests: coalescing, overflow and resync markers
+"""
+
+import asyncio
+import json
+
+from job_events import JobEventClient, JobEventHub
+
+
+def make_client(max_pending):
+    sent = []
+
+    async def send(text):
+        sent.append(json.loads(text))
+
+    return JobEventClient(send, max_pending=max_pending), sent
+
+
+def pending(client):
+    return list(client._pending.values())
+
+
+def drain(client, sent):
+    async def run():
+        task = asyncio.create_task(client.run())
+        while client._pending or client._resync_jobs:
+            await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    asyncio.run(run())
+    return sent
+
+
+def progress(job_id, value):
+    return {"type": "job_progress", "job_id": job_id, "progress": value}
+
+
+class TestCoalescing:
+    """Events with a coalesce key keep only the latest pending copy"""
+
+    def test_latest_progress_replaces_pending_progress(self):
+        client, sent = make_client(max_pending=8)
+        for value in (0.1, 0.2, 0.3):
+            client.put(progress("job-1", value), ("job_progress", "job-1"))
+        client.put(progress("job-2", 0.5), ("job_progress", "job-2"))
+
+        assert drain(client, sent) == [progress("job-1", 0.3), progress("job-2", 0.5)]
+        assert client.dropped == 0
+
+    def test_hub_coalesces_per_job_and_type(self):
+        hub = JobEventHub()
+        client, sent = make_client(max_pending=8)
+        hub.subscribe(client, "job-1")
+        hub.publish("job-1", {"type": "job_progress", "progress": 0.1}, coalesce=True)
+        hub.publish("job-1", {"type": "job_results", "results": ["a"]}, coalesce=True)
+        hub.publish("job-1", {"type": "job_progress", "progress": 0.9}, coalesce=True)
+        hub.publish("job-1", {"type": "job_results", "results": ["b"]}, coalesce=True)
+        hub.publish("job-2", {"type": "job_progress", "progress": 0.5}, coalesce=True)
+
+        assert pending(client) == [
+            {"type": "job_progress", "progress": 0.9, "job_id": "job-1"},
+            {"type": "job_results", "results": ["b"], "job_id": "job-1"},
+        ]
+
+
+class TestOverflow:
+    """A full outbox drops the oldest events and resyncs every job that lost one"""
+
+    @staticmethod
+    def resync(job_id):
+        return {"type": "job_resync", "job_id": job_id}
+
+    def test_dropped_clip_results_leave_one_resync_sent_first(self):
+        client, sent = make_client(max_pending=3)
+        for i in range(10):
+            client.put({"type": "clip_result", "job_id": "job-1", "index": i})
+
+        assert client.dropped == 7
+        assert drain(client, sent) == [self.resync("job-1")] + [
+            {"type": "clip_result", "job_id": "job-1", "index": i} for i in (7, 8, 9)
+        ]
+
+    def test_every_dropped_job_event_type_leaves_a_resync(self):
+        client, sent = make_client(max_pending=2)
+        client.put(progress("job-1", 0.1), ("job_progress", "job-1"))
+        client.put({"type": "job_results", "job_id": "job-2", "results": []}, ("job_results", "job-2"))
+        client.put({"type": "clip_result", "job_id": "job-3", "index": 0})
+        client.put({"type": "clip_result", "job_id": "job-3", "index": 1})
+
+        assert drain(client, sent) == [
+            self.resync("job-1"),
+            self.resync("job-2"),
+            {"type": "clip_result", "job_id": "job-3", "index": 0},
+            {"type": "clip_result", "job_id": "job-3", "index": 1},
+        ]
+
+    def test_resyncs_survive_any_number_of_jobs(self):
+        # Markers do not count against the outbox, so a small outbox cannot evict them
+        client, sent = make_client(max_pending=2)
+        for job in range(6):
+            client.put({"type": "clip_result", "job_id": f"job-{job}"})
+
+        events = drain(client, sent)
+        assert events[:4] == [self.resync(f"job-{job}") for job in range(4)]
+        assert len(events) == 6
+
+    def test_events_without_a_job_are_dropped_without_resync(self):
+        client, sent = make_client(max_pending=2)
+        for i in range(3):
+            client.put(json.dumps({"type": "log", "index": i}))
+
+        assert client.dropped == 1
+        assert drain(client, sent) == [{"type": "log", "index": 1}, {"type": "log", "index": 2}]
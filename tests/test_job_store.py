@@ -0,0 +1,190 @@
+"""
+Persistent job tests: store round-trip, resume after a restart and expiry
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from ai_content_selector import AIContentSelectionResult
+from background_processor import BackgroundProcessor, ProcessingStatus
+from config import Config
+from job_store import JobStore
+
+
+def make_job(job_id="job-1", **overrides):
+    return {
+        "job_id": job_id,
+        "clips": ["a.mp4", "b.mp4"],
+        "music_path": "music.wav",
+        "target_duration": 30,
+        "story_style": "traditional",
+        "style_preset": "romantic",
+        "status": "running",
+        "progress": 0.5,
+        "current_step": "Analyzed 1/2 clips...",
+        "error": None,
+        "selected": None,
+        "created_at": time.time(),
+        "started_at": time.time(),
+        "completed_at": None,
+        **overrides,
+    }
+
+
+def make_result(clip_path, score):
+    """A minimal but complete analysis result"""
+    return AIContentSelectionResult.model_validate({
+        "clip_path": clip_path,
+        "object_analysis": {
+            "clip_path": clip_path, "duration": 5.0, "objects_detected": {}, "confidence_scores": {},
+            "key_moments": [], "analysis_duration": 0.1, "scene_classification": "ceremony",
+        },
+        "emotion_analysis": {
+            "clip_path": clip_path, "duration": 5.0, "emotions": {"joy": 0.5}, "emotional_moments": [],
+            "overall_sentiment": "positive", "excitement_level": 0.5, "analysis_duration": 0.1,
+        },
+        "story_arc": {
+            "clip_path": clip_path, "scene_classification": "ceremony", "story_importance": 0.5,
+            "narrative_position": "opening", "emotional_tone": "romantic", "recommended_duration": 4.0,
+            "story_notes": "",
+        },
+        "style_preset": {
+            "clip_path": clip_path, "applied_style": "romantic", "color_grade_applied": "warm",
+            "transition_style_applied": "fade", "recommended_duration": 4.0, "style_notes": "",
+        },
+        "final_score": score,
+        "selection_reason": "test",
+        "description": "A test clip.",
+    })
+
+
+class FakeSelector:
+    """Returns canned results and records which clips were analyzed"""
+
+    def __init__(self, scores):
+        self.scores = scores
+        self.analyzed = []
+
+    async def analyze_clip_fast(self, clip_path, story_style, style_preset):
+        self.analyzed.append(clip_path)
+        return make_result(clip_path, self.scores[clip_path])
+
+
+@pytest.fixture
+def store_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "jobs.sqlite")
+    monkeypatch.setattr(Config, "JOB_STORE_PATH", path)
+    monkeypatch.setattr(Config, "PRESCREEN_ENABLED", False)
+    return path
+
+
+class TestJobStore:
+    """SQLite round-trip of jobs and per-clip results"""
+
+    def test_job_round_trip(self, tmp_path):
+        store = JobStore(str(tmp_path / "jobs.sqlite"))
+        job = make_job(selected=["b.mp4"])
+        store.save_job(job)
+        store.close()
+
+        reopened = JobStore(str(tmp_path / "jobs.sqlite"))
+        assert reopened.load_jobs() == [job]
+        reopened.close()
+
+    def test_updating_a_job_keeps_its_clip_results(self, tmp_path):
+        store = JobStore(str(tmp_path / "jobs.sqlite"))
+        store.save_job(make_job())
+        store.save_clip_result("job-1", "a.mp4", '{"score": 1}')
+
+        store.save_job(make_job(status="completed", progress=1.0))
+
+        assert store.load_jobs()[0]["status"] == "completed"
+        assert store.load_clip_results("job-1") == {"a.mp4": '{"score": 1}'}
+        store.close()
+
+    def test_deleting_a_job_deletes_its_clip_results(self, tmp_path):
+        store = JobStore(str(tmp_path / "jobs.sqlite"))
+        store.save_job(make_job("job-1"))
+        store.save_job(make_job("job-2"))
+        store.save_clip_result("job-1", "a.mp4", "{}")
+        store.save_clip_result("job-2", "a.mp4", "{}")
+
+        store.delete_jobs(["job-1"])
+
+        assert [job["job_id"] for job in store.load_jobs()] == ["job-2"]
+        assert store.load_clip_results("job-1") == {}
+        assert store.load_clip_results("job-2") == {"a.mp4": "{}"}
+        store.close()
+
+
+class TestResume:
+    """Jobs interrupted by a restart continue from the clips not analyzed yet"""
+
+    @staticmethod
+    async def run_to_completion(processor, job_id):
+        await processor.start()
+        while processor.jobs[job_id].status == ProcessingStatus.RUNNING:
+            await asyncio.sleep(0.01)
+        await processor.stop()
+
+    def test_resumes_interrupted_job_without_reanalyzing(self, store_path):
+        scores = {"a.mp4": 0.9, "b.mp4": 0.4, "c.mp4": 0.7}
+        # A previous run analyzed a.mp4, then the worker stopped
+        store = JobStore(store_path)
+        store.save_job(make_job(clips=list(scores)))
+        store.save_clip_result("job-1", "a.mp4", make_result("a.mp4", 0.9).model_dump_json())
+        store.close()
+
+        selector = FakeSelector(scores)
+        processor = BackgroundProcessor(ai_selector=selector)
+        asyncio.run(self.run_to_completion(processor, "job-1"))
+
+        assert sorted(selector.analyzed) == ["b.mp4", "c.mp4"]
+        job = processor.get_job_status("job-1")
+        assert job.status == ProcessingStatus.COMPLETED
+        assert [result.clip_path for result in job.results] == ["a.mp4", "c.mp4", "b.mp4"]
+
+    def test_finished_job_results_survive_a_restart(self, store_path):
+        scores = {"a.mp4": 0.9, "b.mp4": 0.4}
+        processor = BackgroundProcessor(ai_selector=FakeSelector(scores))
+        job_id = processor.create_job(list(scores), "music.wav")
+        asyncio.run(processor.start_processing(job_id))
+        processor.job_store.close()
+
+        restarted = BackgroundProcessor(ai_selector=FakeSelector(scores))
+
+        assert restarted.get_job_status(job_id).status == ProcessingStatus.COMPLETED
+        assert [result.clip_path for result in restarted.get_job_results(job_id)] == ["a.mp4", "b.mp4"]
+
+    def test_result_persist_failure_does_not_fail_the_job(self, store_path):
+        processor = BackgroundProcessor(ai_selector=FakeSelector({"a.mp4": 0.9}))
+        job_id = processor.create_job(["a.mp4"], "music.wav")
+
+        def broken(*args):
+            raise OSError("disk full")
+        processor.job_store.save_clip_result = broken
+        asyncio.run(processor.start_processing(job_id))
+
+        assert processor.get_job_status(job_id).status == ProcessingStatus.COMPLETED
+
+
+class TestExpiry:
+    """Old finished jobs are removed from memory and from the store"""
+
+    def test_expired_jobs_are_deleted_from_the_store(self, store_path):
+        store = JobStore(store_path)
+        old = time.time() - 48 * 3600
+        store.save_job(make_job("old-done", status="completed", created_at=old))
+        store.save_job(make_job("old-running", status="running", created_at=old))
+        store.save_job(make_job("new-done", status="completed"))
+        store.save_clip_result("old-done", "a.mp4", "{}")
+        store.close()
+
+        processor = BackgroundProcessor(ai_selector=FakeSelector({}))
+        assert processor.cleanup_old_jobs(max_age_hours=24) == 1
+
+        assert set(processor.jobs) == {"old-running", "new-done"}
+        assert {job["job_id"] for job in processor.job_store.load_jobs()} == {"old-running", "new-done"}
+        assert processor.job_store.load_clip_results("old-done") == {}
@@ -0,0 +1,101 @@
+"""
+Media info tests: concurrent probes of one file share a single ffprobe
+"""
+
+import asyncio
+import subprocess
+
+import pytest
+
+from media_info import MediaInfo, MediaInfoService
+
+
+class FakeProbe:
+    """Stands in for ffprobe; each call blocks until released"""
+
+    def __init__(self):
+        self.calls = 0
+        self.outcomes = []
+
+    async def __call__(self, path):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else None
+        await asyncio.sleep(0.05)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return MediaInfo(path=path, duration=12.5, fps=25.0, width=1280, height=720,
+                         video_codec="h264", audio_codec="aac")
+
+
+@pytest.fixture
+def media(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"not really a video")
+    return str(path)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    service = MediaInfoService()
+    probe = FakeProbe()
+    monkeypatch.setattr(service, "_run_probe", probe)
+    service.fake_probe = probe
+    return service
+
+
+class TestSharedProbe:
+    """In-flight probes are shared, cached, and isolated from other callers' cancellation"""
+
+    def test_concurrent_callers_share_one_probe(self, service, media):
+        async def run():
+            return await asyncio.gather(*(service.probe(media) for _ in range(4)))
+
+        results = asyncio.run(run())
+
+        assert service.fake_probe.calls == 1
+        assert all(result is results[0] for result in results)
+        assert asyncio.run(service.duration(media)) == 12.5
+        assert service.fake_probe.calls == 1
+
+    def test_probe_errors_reach_every_waiter(self, service, media):
+        service.fake_probe.outcomes = [subprocess.CalledProcessError(1, "ffprobe")]
+
+        async def run():
+            return await asyncio.gather(*(service.probe(media) for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(run())
+
+        assert service.fake_probe.calls == 1
+        assert all(isinstance(result, subprocess.CalledProcessError) for result in results)
+
+    def test_cancelling_the_owner_does_not_fail_waiters(self, service, media):
+        async def run():
+            owner = asyncio.create_task(service.probe(media))
+            await asyncio.sleep(0)
+            waiters = [asyncio.create_task(service.probe(media)) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            owner.cancel()
+            results = await asyncio.gather(*waiters)
+            with pytest.raises(asyncio.CancelledError):
+                await owner
+            return results
+
+        results = asyncio.run(run())
+
+        assert [result.duration for result in results] == [12.5, 12.5]
+        # The first waiter took over the probe; the second shared it
+        assert service.fake_probe.calls == 2
+
+    def test_cancelled_waiter_leaves_the_probe_running(self, service, media):
+        async def run():
+            owner = asyncio.create_task(service.probe(media))
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(service.probe(media))
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            return await owner
+
+        assert asyncio.run(run()).duration == 12.5
+        assert service.fake_probe.calls == 1
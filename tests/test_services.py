@@ -0,0 +1,139 @@
+"""
+Shared services tests: built once, shared, and never built on the event loop
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import services
+from services import Services
+
+
+class FakeModules:
+    """Stands in for the analyzer modules; counts builds and can hold a build open"""
+
+    def __init__(self):
+        self.builds = {}
+        self.release = {}
+
+    def hold(self, name):
+        self.release[name] = threading.Event()
+        return self.release[name]
+
+    def service(self, name):
+        def build(**kwargs):
+            self.builds[name] = self.builds.get(name, 0) + 1
+            if name in self.release:
+                assert self.release[name].wait(timeout=5)
+            else:
+                time.sleep(0.01)
+            return SimpleNamespace(name=name, story_narrative=f"{name}-narrative", **kwargs)
+        return build
+
+    def load_module(self, module):
+        return SimpleNamespace(
+            AIContentSelector=self.service("ai_selector"),
+            VisualAnalyzer=self.service("visual_analyzer"),
+            SimpleBeatDetector=self.service("beat_detector"),
+            VideoProcessor=self.service("video_processor"),
+        )
+
+
+@pytest.fixture
+def modules(monkeypatch):
+    fake = FakeModules()
+    monkeypatch.setattr(services, "load_module", fake.load_module)
+    return fake
+
+
+class TestSharedServices:
+    """Each service is built once per process and every caller gets the same instance"""
+
+    def test_concurrent_first_use_builds_once(self, modules):
+        shared = Services()
+        seen = []
+        threads = [threading.Thread(target=lambda: seen.append(shared.ai_selector)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert modules.builds["ai_selector"] == 1
+        assert all(selector is seen[0] for selector in seen)
+        assert shared.story_generator == "ai_selector-narrative"
+
+    def test_video_processors_share_the_analyzers(self, modules):
+        shared = Services()
+        first, second = shared.video_processor(), shared.video_processor()
+
+        assert first is not second
+        assert first.ai_selector is second.ai_selector is shared.ai_selector
+        assert first.beat_detector is second.beat_detector is shared.beat_detector
+        assert first.visual_analyzer is second.visual_analyzer is shared.visual_analyzer
+        assert modules.builds == {"ai_selector": 1, "beat_detector": 1, "visual_analyzer": 1, "video_processor": 2}
+
+    def test_building_one_service_does_not_block_another(self, modules):
+        shared = Services()
+        release = modules.hold("ai_selector")
+        builder = threading.Thread(target=lambda: shared.ai_selector)
+        builder.start()
+        try:
+            # The selector build is still in progress; the beat detector has its own lock
+            assert shared.beat_detector.name == "beat_detector"
+        finally:
+            release.set()
+            builder.join()
+
+    def test_status_does_not_build_anything(self, modules):
+        status = Services().status()
+
+        assert modules.builds == {}
+        assert not status["analyzers"]["ready"]
+
+
+class TestResolve:
+    """Async callers wait for a service without blocking the event loop"""
+
+    def test_resolve_waits_off_the_event_loop(self, modules):
+        shared = Services()
+        release = modules.hold("ai_selector")
+        # As with WORKER_WARMUP=background: warm-up is building the selector in a thread
+        warm_up = threading.Thread(target=lambda: shared.ai_selector)
+        warm_up.start()
+
+        async def run():
+            ticks = 0
+            resolving = asyncio.create_task(shared.resolve("ai_selector"))
+            while ticks < 5:
+                await asyncio.sleep(0.01)
+                ticks += 1
+            assert not resolving.done()
+            release.set()
+            return ticks, await resolving
+
+        try:
+            ticks, selector = asyncio.run(run())
+        finally:
+            release.set()
+            warm_up.join()
+
+        assert ticks == 5
+        assert selector is shared.ai_selector
+        assert modules.builds["ai_selector"] == 1
+
+    def test_resolve_returns_built_services_directly(self, modules):
+        shared = Services()
+        detector = shared.beat_detector
+
+        async def run():
+            return await shared.resolve("beat_detector"), await shared.new_video_processor()
+
+        resolved, processor = asyncio.run(run())
+
+        assert resolved is detector
+        assert processor.beat_detector is detector
+        assert modules.builds["beat_detector"] == 1
@@ -0,0 +1,145 @@
+"""
+Streaming top-k selection tests: heap ordering, ties and the early-stop bound
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from ai_content_selector import AIContentSelector, MAX_FAST_SCORE
+from clip_scheduler import ClipScheduler
+from config import Config
+from top_k_selector import TopKSelector
+
+
+def select(scores, k):
+    selector = TopKSelector(k, lambda item: item[1])
+    for i, score in enumerate(scores):
+        selector.push((f"clip{i}", score))
+    return selector
+
+
+class TestTopKSelector:
+    """Bounded min-heap behaviour"""
+
+    def test_keeps_the_k_best_best_first(self):
+        selector = select([0.2, 0.9, 0.5, 0.1, 0.7, 0.3], k=3)
+
+        assert [score for _, score in selector.results()] == [0.9, 0.7, 0.5]
+        assert selector.min_score == 0.5
+        assert selector.seen == 6
+        assert len(selector) == 3
+
+    def test_fewer_items_than_k(self):
+        selector = select([0.4, 0.8], k=5)
+
+        assert not selector.full
+        assert [name for name, _ in selector.results()] == ["clip1", "clip0"]
+
+    def test_push_reports_whether_the_item_is_kept(self):
+        selector = TopKSelector(2, lambda score: score)
+
+        assert selector.push(0.5)
+        assert selector.push(0.3)
+        assert not selector.push(0.1)
+        assert selector.push(0.6)
+        assert selector.results() == [0.6, 0.5]
+
+    def test_ties_keep_the_earlier_item(self):
+        # An equal score does not displace a kept item, and equal scores stay in arrival order
+        selector = select([0.5, 0.5, 0.5, 0.5], k=2)
+
+        assert [name for name, _ in selector.results()] == ["clip0", "clip1"]
+
+    def test_equal_scores_never_compare_items(self):
+        selector = TopKSelector(2, lambda item: 0.5)
+        for item in ({"a": 1}, {"b": 2}, {"c": 3}):
+            selector.push(item)
+
+        assert len(selector.results()) == 2
+
+
+class TestCanStop:
+    """can_stop() is only true when no unseen item could change the selection"""
+
+    def test_not_before_the_heap_is_full(self):
+        selector = select([0.9], k=2)
+
+        assert not selector.can_stop(0.0)
+
+    def test_stops_when_lowest_kept_score_reaches_the_bound(self):
+        selector = select([0.8, 0.6], k=2)
+
+        assert selector.can_stop(0.6)
+        assert selector.can_stop(0.5)
+
+    def test_continues_while_an_unseen_item_could_enter(self):
+        selector = select([0.8, 0.6], k=2)
+
+        # A remaining item scoring up to 0.7 would displace the 0.6
+        assert not selector.can_stop(0.7)
+
+    def test_bound_is_sound(self):
+        # Whenever can_stop() holds, no later item within the bound changes the result
+        scores = [0.9, 0.95, 0.9, 0.3, 0.9, 0.85]
+        bound = 0.9
+        selector = TopKSelector(3, lambda item: item[1])
+        for i, score in enumerate(scores):
+            selector.push((f"clip{i}", score))
+            if selector.can_stop(bound):
+                stopped_at = selector.results()
+                for j, later in enumerate(scores[i + 1:]):
+                    selector.push((f"late{j}", later))
+                assert selector.results() == stopped_at
+                return
+        pytest.fail("expected the selection to become final")
+
+
+class TestEarlyExit:
+    """_select_best_clips_batch() stops only once remaining clips cannot enter the top k"""
+
+    @staticmethod
+    def run_batch(scores, target_count, monkeypatch, ceiling=1.0):
+        monkeypatch.setattr(Config, "SELECTION_SCORE_CEILING", ceiling)
+        analyzed = []
+
+        async def analyze_clip_fast(path, story_style, style_preset):
+            await asyncio.sleep(0.01)
+            # Recorded on completion: clips still in flight at the early exit are cancelled
+            analyzed.append(path)
+            return SimpleNamespace(clip_path=path, final_score=scores[path])
+
+        # Only the attributes the batch path uses; building a real selector loads every analyzer
+        selector = AIContentSelector.__new__(AIContentSelector)
+        selector.clip_scheduler = ClipScheduler(max_concurrency=1, per_job_limit=1)
+        selector.analyze_clip_fast = analyze_clip_fast
+
+        results = asyncio.run(selector._select_best_clips_batch(
+            list(scores), target_count, "traditional", "romantic", fast_mode=True
+        ))
+        return [result.clip_path for result in results], analyzed
+
+    def test_analyzes_every_clip_below_the_score_ceiling(self, monkeypatch):
+        scores = {f"clip{i}.mp4": score for i, score in enumerate([0.7, 0.8, 0.75, 0.85, 0.6])}
+
+        selected, analyzed = self.run_batch(scores, 2, monkeypatch)
+
+        assert len(analyzed) == len(scores)
+        assert selected == ["clip3.mp4", "clip1.mp4"]
+
+    def test_stops_once_the_selection_is_at_the_ceiling(self, monkeypatch):
+        scores = {"a.mp4": MAX_FAST_SCORE, "b.mp4": MAX_FAST_SCORE, "c.mp4": 0.5, "d.mp4": 0.4}
+
+        selected, analyzed = self.run_batch(scores, 2, monkeypatch)
+
+        assert analyzed == ["a.mp4", "b.mp4"]
+        assert selected == ["a.mp4", "b.mp4"]
+
+    def test_configured_ceiling_allows_an_earlier_exit(self, monkeypatch):
+        scores = {"a.mp4": 0.7, "b.mp4": 0.65, "c.mp4": 0.5, "d.mp4": 0.8}
+
+        selected, analyzed = self.run_batch(scores, 2, monkeypatch, ceiling=0.6)
+
+        assert analyzed == ["a.mp4", "b.mp4"]
+        assert selected == ["a.mp4", "b.mp4"]
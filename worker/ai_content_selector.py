@@ -11,9 +11,9 @@ Creates truly intelligent, story-driven wedding highlights.
 """
 
 import time
-import asyncio
 import os
 import tempfile
+from dataclasses import asdict
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 from pydantic import BaseModel
@@ -25,6 +25,14 @@ try:
     from .style_presets import StylePresetEngine, StylePresetResult
     from .openai_vision import OpenAIVisionClient
     from .ai_story_narrative import AIStoryNarrativeGenerator, ClipDescription, StoryNarrative
+    from .visual_analyzer import VisualAnalyzer, VisualAnalysisResult
+    from .analysis_executor import get_analysis_executor
+    from .clip_scheduler import aclosing, get_clip_scheduler
+    from .top_k_selector import TopKSelector
+    from .clip_prescreener import ClipPrescreener
+    from .analysis_cache import AnalysisCache
+    from .ffmpeg_pool import get_ffmpeg_pool
+    from .config import Config
 except ImportError:
     from wedding_object_detector import WeddingObjectDetector, WeddingObjectDetectionResult
     from emotion_analyzer import EmotionAnalyzer, EmotionAnalysisResult
@@ -32,6 +40,30 @@ except ImportError:
     from style_presets import StylePresetEngine, StylePresetResult
     from openai_vision import OpenAIVisionClient
     from ai_story_narrative import AIStoryNarrativeGenerator, ClipDescription, StoryNarrative
+    from visual_analyzer import VisualAnalyzer, VisualAnalysisResult
+    from analysis_executor import get_analysis_executor
+    from clip_scheduler import aclosing, get_clip_scheduler
+    from top_k_selector import TopKSelector
+    from clip_prescreener import ClipPrescreener
+    from analysis_cache import AnalysisCache
+    from ffmpeg_pool import get_ffmpeg_pool
+    from config import Config
+
+# Highest score each scoring function can produce: _calculate_final_score
+# caps at 1.0, and _calculate_final_score_fast is 0.5 + 0.3 + a fixed 0.2 x 0.5
+MAX_FINAL_SCORE = 1.0
+MAX_FAST_SCORE = 0.9
+
+# Stand-ins shown when no clip description could be generated (from
+# _describe_clip and OpenAIVisionClient); never cached, so a later run retries
+PLACEHOLDER_DESCRIPTIONS = frozenset({
+    "AI analysis in progress...",
+    "Unable to generate description",
+    "AI analysis not available",
+    "AI analysis unavailable",
+    "Image not found",
+    "Unable to analyze this clip",
+})
 
 class AIContentSelectionResult(BaseModel):
     """Result of AI-powered content selection"""
@@ -43,6 +75,7 @@ class AIContentSelectionResult(BaseModel):
     final_score: float  # Overall quality score for this clip
     selection_reason: str  # Human-readable reason for selection
     description: str  # 1-2 sentence description of the clip content
+    visual_analysis: Optional[VisualAnalysisResult] = None  # Only when INCLUDE_VISUAL_ANALYSIS is on
 
 class AIContentSelector:
     """Main AI-powered content selection system"""
@@ -55,19 +88,139 @@ class AIContentSelector:
         self.vision = OpenAIVisionClient()
         self.story_narrative = AIStoryNarrativeGenerator()
         
-        # Simple cache to avoid re-analyzing the same clips
-        self._analysis_cache = {}
+        # Optionally score visual quality in the same decode pass
+        self.include_visual_analysis = Config.INCLUDE_VISUAL_ANALYSIS
+        self.visual_analyzer = VisualAnalyzer() if self.include_visual_analysis else None
+        
+        # Per-clip decoding and detection run in worker processes/threads
+        self.analysis_executor = get_analysis_executor()
+        
+        # Global clip concurrency shared with every other job
+        self.clip_scheduler = get_clip_scheduler()
         
-        # Clear cache on startup to ensure fresh analysis
-        print("INFO:ai_content_selector:🧹 Cleared analysis cache for fresh analysis")
+        # Persistent cache so unchanged clips are never re-analyzed
+        self.analysis_cache: Optional[AnalysisCache] = None
+        if Config.ANALYSIS_CACHE_ENABLED:
+            try:
+                self.analysis_cache = AnalysisCache()
+                stats = self.analysis_cache.stats()
+                print(f"INFO:ai_content_selector:💾 Analysis cache: {stats['entries']} entries at {stats['path']}")
+            except Exception as e:
+                print(f"WARNING:ai_content_selector:Analysis cache unavailable, analyzing without cache: {e}")
+        
+        # Cheap first tier that drops unusable clips before full analysis
+        self.prescreener = ClipPrescreener(self.analysis_cache)
         
         print("INFO:ai_content_selector:✅ AI Content Selector initialized")
     
     def clear_cache(self):
         """Clear the analysis cache to force fresh analysis"""
-        self._analysis_cache.clear()
+        if self.analysis_cache is not None:
+            self.analysis_cache.clear()
         print("INFO:ai_content_selector:🧹 Analysis cache cleared")
     
+    def _analysis_params(self, mode: str) -> Dict[str, Any]:
+        """Everything besides the clip contents that affects cached analysis results"""
+        return {
+            "mode": mode,
+            "object_detector": WeddingObjectDetector.ANALYZER_VERSION,
+            "emotion_analyzer": EmotionAnalyzer.ANALYZER_VERSION if mode == "full" else None,
+            "visual_analyzer": VisualAnalyzer.ANALYZER_VERSION if self.visual_analyzer is not None and mode == "full" else None,
+            "frame_reader": Config.FRAME_READER,
+            "frame_width": Config.ANALYSIS_FRAME_WIDTH if Config.FRAME_READER == "ffmpeg" else None,
+            "vision_model": self.vision.model if self.vision.enabled else None,
+        }
+    
+    def _load_cached_analysis(self, video_path: str, params: Dict[str, Any]) -> Optional[Tuple[WeddingObjectDetectionResult, EmotionAnalysisResult, Optional[VisualAnalysisResult], Optional[str]]]:
+        """Return cached (object, emotion, visual, description) results for a clip, if any (description None if never generated)"""
+        if self.analysis_cache is None:
+            return None
+        payload = self.analysis_cache.get("analysis", video_path, params)
+        if payload is None:
+            return None
+        try:
+            visual = payload.get("visual_analysis")
+            description = payload.get("description")
+            return (
+                WeddingObjectDetectionResult.model_validate(payload["object_analysis"]),
+                EmotionAnalysisResult.model_validate(payload["emotion_analysis"]),
+                VisualAnalysisResult(**visual) if visual else None,
+                # Entries written before placeholders were excluded may still hold one
+                None if description in PLACEHOLDER_DESCRIPTIONS else description,
+            )
+        except Exception as e:
+            print(f"WARNING:ai_content_selector:Ignoring unreadable cache entry for {Path(video_path).name}: {e}")
+            return None
+    
+    def _store_cached_analysis(self, video_path: str, params: Dict[str, Any],
+                               object_analysis: WeddingObjectDetectionResult,
+                               emotion_analysis: EmotionAnalysisResult,
+                               visual_analysis: Optional[VisualAnalysisResult],
+                               description: str) -> None:
+        """Persist the expensive per-clip analysis results (placeholder descriptions are left out)"""
+        if self.analysis_cache is None:
+            return
+        try:
+            self.analysis_cache.put("analysis", video_path, params, {
+                "object_analysis": object_analysis.model_dump(mode="json"),
+                "emotion_analysis": emotion_analysis.model_dump(mode="json"),
+                "visual_analysis": asdict(visual_analysis) if visual_analysis else None,
+                "description": None if description in PLACEHOLDER_DESCRIPTIONS else description,
+            })
+        except Exception as e:
+            print(f"WARNING:ai_content_selector:Failed to cache analysis for {Path(video_path).name}: {e}")
+    
+    async def _get_story_arc(self, video_path: str, params: Dict[str, Any],
+                             object_analysis: WeddingObjectDetectionResult,
+                             emotion_analysis: EmotionAnalysisResult,
+                             story_style: str) -> StoryArcResult:
+        """Create the story arc for a clip, reusing a cached arc for the same analysis and style"""
+        arc_params = dict(params, story_style=story_style, story_arc_creator=StoryArcCreator.ANALYZER_VERSION)
+        if self.analysis_cache is not None:
+            payload = self.analysis_cache.get("story_arc", video_path, arc_params)
+            if payload is not None:
+                return StoryArcResult.model_validate(payload)
+        
+        story_arc = await self.story_creator.create_story_arc(
+            object_analysis, emotion_analysis, story_style
+        )
+        
+        if self.analysis_cache is not None:
+            try:
+                self.analysis_cache.put("story_arc", video_path, arc_params, story_arc.model_dump(mode="json"))
+            except Exception as e:
+                print(f"WARNING:ai_content_selector:Failed to cache story arc for {Path(video_path).name}: {e}")
+        return story_arc
+    
+    async def _describe_clip(self, video_path: str) -> str:
+        """Generate a 1-2 sentence clip description using OpenAI Vision"""
+        if not self.vision.enabled:
+            return "AI analysis not available"
+        description = "AI analysis in progress..."
+        try:
+            thumb_path = await self._extract_thumbnail(video_path)
+            if thumb_path and self.vision:
+                description = self.vision.generate_clip_description(thumb_path)
+                # Clean up thumbnail
+                try:
+                    os.unlink(thumb_path)
+                except:
+                    pass
+        except Exception as e:
+            print(f"WARNING:ai_content_selector:Description generation failed: {e}")
+            description = "Unable to generate description"
+        return description
+    
+    async def _describe_missing(self, video_path: str, params: Dict[str, Any],
+                                object_analysis: WeddingObjectDetectionResult,
+                                emotion_analysis: EmotionAnalysisResult,
+                                visual_analysis: Optional[VisualAnalysisResult]) -> str:
+        """Describe a cached clip that has no description yet, caching it if one is generated"""
+        description = await self._describe_clip(video_path)
+        if description not in PLACEHOLDER_DESCRIPTIONS:
+            self._store_cached_analysis(video_path, params, object_analysis, emotion_analysis, visual_analysis, description)
+        return description
+    
     async def analyze_clip(self, 
                           video_path: str,
                           story_style: str = 'traditional',
@@ -83,25 +236,33 @@ class AIContentSelector:
         Returns:
             AIContentSelectionResult with complete analysis
         """
-        # Check cache first (but only for non-object detection parts)
-        cache_key = f"{video_path}_{story_style}_{style_preset}_v2"
-        # Note: We don't cache object detection as it should be real-time
-        
         print(f"INFO:ai_content_selector:🎬 Analyzing clip: {Path(video_path).name}")
         
-        # Run base analyses in parallel for efficiency
-        object_task = self.object_detector.analyze_clip(video_path)
-        emotion_task = self.emotion_analyzer.analyze_clip(video_path)
-        object_analysis, emotion_analysis = await asyncio.gather(object_task, emotion_task)
-
-        # Optionally enrich with OpenAI Vision hints before story arc
-        object_analysis, emotion_analysis = await self._maybe_enrich_with_vision(
-            video_path, object_analysis, emotion_analysis
-        )
+        # Reuse cached analysis when this exact file was analyzed with the same settings
+        params = self._analysis_params("full")
+        cached = self._load_cached_analysis(video_path, params)
+        if cached is not None:
+            object_analysis, emotion_analysis, visual_analysis, description = cached
+            print(f"INFO:ai_content_selector:💾 Using cached analysis for {Path(video_path).name}")
+            if description is None:
+                description = await self._describe_missing(video_path, params, object_analysis, emotion_analysis, visual_analysis)
+        else:
+            # Decode the clip once and feed every analyzer from the same frames
+            object_analysis, emotion_analysis, visual_analysis = await self._run_shared_analysis(video_path)
+            
+            # Optionally enrich with OpenAI Vision hints before story arc
+            object_analysis, emotion_analysis = await self._maybe_enrich_with_vision(
+                video_path, object_analysis, emotion_analysis
+            )
+            
+            # Generate clip description using OpenAI Vision
+            description = await self._describe_clip(video_path)
+            
+            self._store_cached_analysis(video_path, params, object_analysis, emotion_analysis, visual_analysis, description)
         
         # Create story arc
-        story_arc = await self.story_creator.create_story_arc(
-            object_analysis, emotion_analysis, story_style
+        story_arc = await self._get_story_arc(
+            video_path, params, object_analysis, emotion_analysis, story_style
         )
         
         # Apply style preset
@@ -119,21 +280,6 @@ class AIContentSelector:
             object_analysis, emotion_analysis, story_arc, final_score
         )
         
-        # Generate clip description using OpenAI Vision
-        description = "AI analysis in progress..."
-        try:
-            thumb_path = await self._extract_thumbnail(video_path)
-            if thumb_path and self.vision:
-                description = self.vision.generate_clip_description(thumb_path)
-                # Clean up thumbnail
-                try:
-                    os.unlink(thumb_path)
-                except:
-                    pass
-        except Exception as e:
-            print(f"WARNING:ai_content_selector:Description generation failed: {e}")
-            description = "Unable to generate description"
-        
         print(f"INFO:ai_content_selector:✅ Analysis complete: score={final_score:.2f}, reason={selection_reason[:50]}...")
         
         result = AIContentSelectionResult(
@@ -144,14 +290,17 @@ class AIContentSelector:
             style_preset=style_preset_result,
             final_score=final_score,
             selection_reason=selection_reason,
-            description=description
+            description=description,
+            visual_analysis=visual_analysis
         )
         
-        # Cache the result
-        self._analysis_cache[cache_key] = result
-        
         return result
     
+    async def _run_shared_analysis(self, video_path: str) -> Tuple[WeddingObjectDetectionResult, EmotionAnalysisResult, Optional[VisualAnalysisResult]]:
+        """Run object, emotion and (optionally) visual analysis over a single decode of the clip"""
+        # CPU-bound work runs in the analysis executor so the event loop stays responsive
+        return await self.analysis_executor.shared_analysis(video_path)
+    
     async def analyze_clip_fast(self, 
                                video_path: str,
                                story_style: str = 'traditional',
@@ -163,32 +312,42 @@ class AIContentSelector:
         """
         print(f"INFO:ai_content_selector:⚡ Fast analyzing clip: {Path(video_path).name}")
         
-        # Check cache first (but only for non-object detection parts)
-        cache_key = f"{video_path}_{story_style}_{style_preset}_fast_v2"
-        # Note: We don't cache object detection as it should be real-time
-        
-        # Only do basic object detection (skip emotion analysis)
-        object_analysis = await self.object_detector.analyze_clip(video_path)
-        
-        # Create minimal emotion analysis result
-        emotion_analysis = EmotionAnalysisResult(
-            clip_path=video_path,
-            duration=object_analysis.duration,
-            emotions={'neutral': 0.5},  # Default neutral emotion score
-            emotional_moments=[(0.0, 'neutral', 0.5)],  # Single moment as tuple
-            overall_sentiment='neutral',
-            excitement_level=0.3,  # Default moderate excitement
-            analysis_duration=0.1
-        )
-        
-        # Optional: enrich with OpenAI Vision on fast path too
-        object_analysis, emotion_analysis = await self._maybe_enrich_with_vision(
-            video_path, object_analysis, emotion_analysis
-        )
+        # Reuse cached analysis when this exact file was analyzed with the same settings
+        params = self._analysis_params("fast")
+        cached = self._load_cached_analysis(video_path, params)
+        if cached is not None:
+            object_analysis, emotion_analysis, _, description = cached
+            print(f"INFO:ai_content_selector:💾 Using cached analysis for {Path(video_path).name}")
+            if description is None:
+                description = await self._describe_missing(video_path, params, object_analysis, emotion_analysis, None)
+        else:
+            # Only do basic object detection (skip emotion analysis)
+            object_analysis = await self.analysis_executor.object_analysis(video_path)
+            
+            # Create minimal emotion analysis result
+            emotion_analysis = EmotionAnalysisResult(
+                clip_path=video_path,
+                duration=object_analysis.duration,
+                emotions={'neutral': 0.5},  # Default neutral emotion score
+                emotional_moments=[(0.0, 'neutral', 0.5)],  # Single moment as tuple
+                overall_sentiment='neutral',
+                excitement_level=0.3,  # Default moderate excitement
+                analysis_duration=0.1
+            )
+            
+            # Optional: enrich with OpenAI Vision on fast path too
+            object_analysis, emotion_analysis = await self._maybe_enrich_with_vision(
+                video_path, object_analysis, emotion_analysis
+            )
+            
+            # Generate clip description using OpenAI Vision
+            description = await self._describe_clip(video_path)
+            
+            self._store_cached_analysis(video_path, params, object_analysis, emotion_analysis, None, description)
 
         # Create basic story arc
-        story_arc = await self.story_creator.create_story_arc(
-            object_analysis, emotion_analysis, story_style
+        story_arc = await self._get_story_arc(
+            video_path, params, object_analysis, emotion_analysis, story_style
         )
         
         # Apply style preset
@@ -206,21 +365,6 @@ class AIContentSelector:
             object_analysis, emotion_analysis, story_arc, final_score
         )
         
-        # Generate clip description using OpenAI Vision
-        description = "AI analysis in progress..."
-        try:
-            thumb_path = await self._extract_thumbnail(video_path)
-            if thumb_path and self.vision:
-                description = self.vision.generate_clip_description(thumb_path)
-                # Clean up thumbnail
-                try:
-                    os.unlink(thumb_path)
-                except:
-                    pass
-        except Exception as e:
-            print(f"WARNING:ai_content_selector:Description generation failed: {e}")
-            description = "Unable to generate description"
-        
         print(f"INFO:ai_content_selector:⚡ Fast analysis complete: score={final_score:.2f}")
         
         result = AIContentSelectionResult(
@@ -234,9 +378,6 @@ class AIContentSelector:
             description=description
         )
         
-        # Cache the result
-        self._analysis_cache[cache_key] = result
-        
         return result
 
     async def _maybe_enrich_with_vision(self,
@@ -277,10 +418,7 @@ class AIContentSelector:
                 "-q:v", "2",
                 out,
             ]
-            proc = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
-            stdout, stderr = await proc.communicate()
-            if proc.returncode != 0:
-                return None
+            await get_ffmpeg_pool().run(cmd)
             return out
         except Exception:
             return None
@@ -343,24 +481,26 @@ class AIContentSelector:
         """
         print(f"INFO:ai_content_selector:🎯 Selecting best {target_count} clips from {len(video_paths)} videos")
         
+        # Tier one: reject black, blurry, shaky and very short clips; survivors come best first
+        if Config.PRESCREEN_ENABLED:
+            video_paths, _ = await self.prescreener.screen_clips(video_paths, keep_at_least=target_count)
+        
         # For large clip sets or fast mode, use batch processing with early exit
         if len(video_paths) > 8 or fast_mode:
             return await self._select_best_clips_batch(video_paths, target_count, story_style, style_preset, fast_mode)
         
-        # For smaller sets, use full parallel analysis
-        analysis_tasks = []
-        for video_path in video_paths:
-            task = self.analyze_clip(video_path, story_style, style_preset)
-            analysis_tasks.append(task)
-        
-        # Run all analyses in parallel
-        all_results = await asyncio.gather(*analysis_tasks)
+        # For smaller sets, analyze every clip (within the global clip limit)
+        selector = TopKSelector(target_count, lambda result: result.final_score)
+        async with aclosing(self.clip_scheduler.stream(
+            video_paths, lambda path: self.analyze_clip(path, story_style, style_preset)
+        )) as outcomes:
+            async for outcome in outcomes:
+                if outcome.error is not None:
+                    raise outcome.error
+                selector.push(outcome.result)
         
-        # Sort by final score
-        all_results.sort(key=lambda x: x.final_score, reverse=True)
-        
-        # Select top clips
-        selected_clips = all_results[:target_count]
+        # Top clips, best first
+        selected_clips = selector.results()
         
         print(f"INFO:ai_content_selector:✅ Selected {len(selected_clips)} clips")
         for i, result in enumerate(selected_clips[:5]):  # Show top 5
@@ -375,46 +515,35 @@ class AIContentSelector:
                                      style_preset: str,
                                      fast_mode: bool = True) -> List[AIContentSelectionResult]:
         """
-        Optimized batch processing for large clip sets with early exit
+        Optimized streaming analysis for large clip sets with early exit
         
-        Processes clips in batches and stops when we have enough high-quality clips
+        Consumes results as clips complete and stops as soon as no remaining clip can enter the selection
         """
-        print(f"INFO:ai_content_selector:🚀 Using batch processing for {len(video_paths)} clips")
-        
-        # Process clips in batches of 4 for better memory management
-        batch_size = 4
-        all_results = []
-        processed_count = 0
-        
-        for i in range(0, len(video_paths), batch_size):
-            batch = video_paths[i:i + batch_size]
-            print(f"INFO:ai_content_selector:📦 Processing batch {i//batch_size + 1}/{(len(video_paths) + batch_size - 1)//batch_size}")
-            
-            # Analyze batch in parallel (use fast mode if enabled)
-            batch_tasks = []
-            for video_path in batch:
-                if fast_mode:
-                    task = self.analyze_clip_fast(video_path, story_style, style_preset)
-                else:
-                    task = self.analyze_clip(video_path, story_style, style_preset)
-                batch_tasks.append(task)
-            
-            batch_results = await asyncio.gather(*batch_tasks)
-            all_results.extend(batch_results)
-            processed_count += len(batch)
-            
-            # Early exit: if we have enough high-quality clips, stop processing
-            if len(all_results) >= target_count * 2:  # Get 2x target for better selection
-                high_quality_count = len([r for r in all_results if r.final_score > 0.6])
-                if high_quality_count >= target_count:
-                    print(f"INFO:ai_content_selector:⚡ Early exit: Found {high_quality_count} high-quality clips after {processed_count} processed")
+        print(f"INFO:ai_content_selector:🚀 Streaming analysis of {len(video_paths)} clips")
+        
+        async def analyze(video_path: str) -> AIContentSelectionResult:
+            if fast_mode:
+                return await self.analyze_clip_fast(video_path, story_style, style_preset)
+            return await self.analyze_clip(video_path, story_style, style_preset)
+        
+        # Only the best target_count results are kept (min-heap, O(target_count) memory)
+        selector = TopKSelector(target_count, lambda result: result.final_score)
+        score_bound = self._score_ceiling(fast_mode)
+        
+        # Results arrive as each clip finishes; closing the stream cancels clips still in flight
+        async with aclosing(self.clip_scheduler.stream(video_paths, analyze)) as outcomes:
+            async for outcome in outcomes:
+                if outcome.error is not None:
+                    raise outcome.error
+                selector.push(outcome.result)
+                
+                # Early exit: no remaining clip can score above the lowest selected one
+                if selector.seen < len(video_paths) and selector.can_stop(score_bound):
+                    print(f"INFO:ai_content_selector:⚡ Early exit: top {target_count} all score >= {score_bound:.2f} (the most a remaining clip can score) after {selector.seen} processed, skipping {len(video_paths) - selector.seen} clips")
                     break
         
-        # Sort by final score
-        all_results.sort(key=lambda x: x.final_score, reverse=True)
-        
-        # Select top clips
-        selected_clips = all_results[:target_count]
+        processed_count = selector.seen
+        selected_clips = selector.results()
         
         print(f"INFO:ai_content_selector:✅ Selected {len(selected_clips)} clips from {processed_count} processed")
         for i, result in enumerate(selected_clips[:5]):  # Show top 5
@@ -422,6 +551,17 @@ class AIContentSelector:
         
         return selected_clips
     
+    def _score_ceiling(self, fast_mode: bool) -> float:
+        """
+        Upper bound on the score of any clip not analyzed yet
+        
+        The scoring function's maximum, unless SELECTION_SCORE_CEILING is set
+        lower: the pre-screen score measures image quality, not the content
+        the final score rewards, so it cannot bound a clip's final score, and
+        a lower ceiling is an assumption that trades exactness for speed.
+        """
+        return min(Config.SELECTION_SCORE_CEILING, MAX_FAST_SCORE if fast_mode else MAX_FINAL_SCORE)
+    
     def _calculate_final_score_fast(self,
                                    object_analysis: WeddingObjectDetectionResult,
                                    emotion_analysis: EmotionAnalysisResult,
@@ -0,0 +1,130 @@
+"""
+Persistent Analysis Cache for ClipSense
+
+Stores AI analysis results (object detection, emotion analysis, story arcs)
+in a SQLite database so re-running the same wedding folder - for example
+while trying different style presets - does not re-analyze any clip.
+
+Entries are content-addressed: the key combines the file fingerprint
+(size, mtime, head/tail hash) with the analyzer versions and analysis
+parameters, so moving a folder keeps its cache and changing a file or an
+analyzer invalidates it. The database is capped in size and evicts the
+least recently used entries first.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+try:
+    from .config import Config
+    from .fingerprint import cached_fingerprint
+except ImportError:
+    from config import Config
+    from fingerprint import cached_fingerprint
+
+
+class AnalysisCache:
+    """SQLite-backed, size-bounded LRU cache of analysis results"""
+
+    def __init__(self, db_path: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.db_path = db_path or os.path.join(Config.CACHE_DIR, "analysis_cache.sqlite")
+        self.max_bytes = max_bytes if max_bytes is not None else Config.ANALYSIS_CACHE_MAX_MB * 1024 * 1024
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_analysis_cache_accessed ON analysis_cache (accessed_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(kind: str, fingerprint: str, params: Dict[str, Any]) -> str:
+        """Build a cache key from the entry kind, file fingerprint and analysis parameters"""
+        material = json.dumps({"kind": kind, "fingerprint": fingerprint, "params": params}, sort_keys=True)
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def get(self, kind: str, video_path: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the cached payload for a clip, or None on a miss"""
+        try:
+            key = self.make_key(kind, cached_fingerprint(video_path), params)
+        except OSError:
+            return None
+
+        try:
+            with self._lock:
+                row = self._conn.execute("SELECT payload FROM analysis_cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                self._conn.execute("UPDATE analysis_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+        except sqlite3.Error as e:
+            # A locked or damaged database degrades to a miss
+            print(f"WARNING:analysis_cache:Cache read failed for {video_path}: {e}")
+            return None
+
+        return json.loads(row[0])
+
+    def put(self, kind: str, video_path: str, params: Dict[str, Any], payload: Dict[str, Any]) -> None:
+        """Store a payload for a clip and evict old entries if the cache is over its size cap"""
+        try:
+            key = self.make_key(kind, cached_fingerprint(video_path), params)
+        except OSError:
+            return
+
+        data = json.dumps(payload)
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO analysis_cache (key, kind, payload, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, kind, data, len(data), now, now)
+                )
+                self._evict()
+                self._conn.commit()
+        except sqlite3.Error as e:
+            # Not caching a result is harmless; the caller already has it
+            print(f"WARNING:analysis_cache:Cache write failed for {video_path}: {e}")
+            try:
+                self._conn.rollback()
+            except sqlite3.Error:
+                pass
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM analysis_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for key, size in self._conn.execute("SELECT key, size FROM analysis_cache ORDER BY accessed_at ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        print(f"INFO:analysis_cache:🧹 Evicted {evicted} cache entries (cache size {total / (1024 * 1024):.1f}MB)")
+
+    def clear(self) -> None:
+        """Remove every cached entry"""
+        with self._lock:
+            self._conn.execute("DELETE FROM analysis_cache")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count and total payload size"""
+        with self._lock:
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM analysis_cache").fetchone()
+        return {"entries": count, "size_bytes": size, "max_bytes": self.max_bytes, "path": self.db_path}
@@ -0,0 +1,224 @@
+"""
+Analysis Executor for ClipSense
+
+Runs the CPU-bound per-clip analysis (frame decoding, OpenCV detectors,
+audio features) off the FastAPI event loop. By default clips are analyzed
+in a pool of worker processes, which gives real multi-core scaling and
+keeps /ping and /health responsive during long jobs; a thread pool can be
+used instead (OpenCV and NumPy release the GIL for most of the work).
+
+Each worker builds its analyzers and face cascade once, in the pool
+initializer, and reuses them for every clip it processes.
+
+Cancelling the awaiting task also cancels the clip's CancellationToken,
+so a worker stops decoding within a frame instead of finishing the clip.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+from typing import Optional, Tuple
+try:
+    from .cancellation import CancellationToken
+    from .config import Config
+    from .emotion_analyzer import EmotionAnalyzer, EmotionAnalysisResult
+    from .frame_features import get_face_cascade
+    from .frame_source import FrameSource
+    from .visual_analyzer import VisualAnalyzer, VisualAnalysisResult
+    from .wedding_object_detector import WeddingObjectDetector, WeddingObjectDetectionResult
+except ImportError:
+    from cancellation import CancellationToken
+    from config import Config
+    from emotion_analyzer import EmotionAnalyzer, EmotionAnalysisResult
+    from frame_features import get_face_cascade
+    from frame_source import FrameSource
+    from visual_analyzer import VisualAnalyzer, VisualAnalysisResult
+    from wedding_object_detector import WeddingObjectDetector, WeddingObjectDetectionResult
+
+
+class _Analyzers:
+    """Analyzer instances owned by one worker"""
+
+    def __init__(self, include_visual: bool):
+        get_face_cascade()
+        self.object_detector = WeddingObjectDetector()
+        self.emotion_analyzer = EmotionAnalyzer()
+        self.visual_analyzer = VisualAnalyzer() if include_visual else None
+        # Audio features overlap with the frame pass inside the worker
+        self.audio_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="emotion-audio")
+
+
+# One set per worker thread (thread pool) or per worker process (process pool)
+_local = threading.local()
+
+
+def _init_worker(include_visual: bool) -> None:
+    _local.analyzers = _Analyzers(include_visual)
+
+
+def _analyzers() -> _Analyzers:
+    analyzers = getattr(_local, "analyzers", None)
+    if analyzers is None:
+        _init_worker(Config.INCLUDE_VISUAL_ANALYSIS)
+        analyzers = _local.analyzers
+    return analyzers
+
+
+def run_shared_analysis(video_path: str, cancel_token: Optional[CancellationToken] = None) -> Tuple[WeddingObjectDetectionResult, EmotionAnalysisResult, Optional[VisualAnalysisResult]]:
+    """Object, emotion and (optionally) visual analysis over a single decode of the clip"""
+    analyzers = _analyzers()
+    start_time = time.time()
+
+    audio_future = analyzers.audio_pool.submit(analyzers.emotion_analyzer._analyze_audio_emotions_sync, video_path)
+
+    source = FrameSource(video_path, cancel_token=cancel_token)
+    object_pass = analyzers.object_detector.create_frame_consumer(video_path)
+    emotion_pass = analyzers.emotion_analyzer.create_frame_consumer(video_path)
+    consumers = [object_pass, emotion_pass]
+
+    visual_pass = None
+    if analyzers.visual_analyzer is not None:
+        visual_pass = analyzers.visual_analyzer.create_frame_consumer(video_path)
+        consumers.append(visual_pass)
+
+    try:
+        source.run(consumers)
+    except BaseException:
+        # Failed or cancelled: drop the audio job (if not started) rather than wait for it
+        audio_future.cancel()
+        raise
+    audio_emotions = audio_future.result()
+    decode_duration = time.time() - start_time
+
+    object_analysis = object_pass.build_result(source.duration, decode_duration)
+    emotion_analysis = analyzers.emotion_analyzer.build_result(emotion_pass, audio_emotions, source.duration, start_time)
+    visual_analysis = visual_pass.build_result(source.duration, decode_duration) if visual_pass else None
+
+    return object_analysis, emotion_analysis, visual_analysis
+
+
+def run_object_analysis(video_path: str, cancel_token: Optional[CancellationToken] = None) -> WeddingObjectDetectionResult:
+    """Object detection only (fast analysis mode)"""
+    analyzers = _analyzers()
+    start_time = time.time()
+
+    source = FrameSource(video_path, cancel_token=cancel_token)
+    detection_pass = analyzers.object_detector.create_frame_consumer(video_path)
+    source.run([detection_pass])
+
+    return detection_pass.build_result(source.duration, time.time() - start_time)
+
+
+class AnalysisExecutor:
+    """Dispatches per-clip analysis to a process or thread pool"""
+
+    def __init__(self, mode: Optional[str] = None, workers: Optional[int] = None,
+                 include_visual: Optional[bool] = None):
+        self.mode = (mode or Config.ANALYSIS_EXECUTOR).lower()
+        self.workers = workers or Config.get_analysis_workers()
+        self.include_visual = Config.INCLUDE_VISUAL_ANALYSIS if include_visual is None else include_visual
+        self._executor: Optional[Executor] = None
+        self._warm_up: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.mode == "process":
+                    # spawn: never fork a process that holds event loop, OpenCV and FFmpeg threads
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                        initargs=(self.include_visual,)
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix="analysis",
+                        initializer=_init_worker,
+                        initargs=(self.include_visual,)
+                    )
+                print(f"INFO:analysis_executor:⚙️ Analysis executor: {self.workers} {self.mode} workers")
+            return self._executor
+
+    async def submit(self, func, *args, cancellable: bool = False):
+        """
+        Run a module-level (picklable) function in a worker
+
+        With cancellable=True, func receives a CancellationToken as its last
+        argument; cancelling the awaiting task cancels the token, so the
+        worker abandons the clip instead of running it to completion.
+        """
+        executor = self._get_executor()
+        token = None
+        if cancellable:
+            token = CancellationToken()
+            args = (*args, token)
+        try:
+            future: Future = executor.submit(func, *args)
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise
+        if token is not None:
+            # The marker file is only needed until the worker has let go of the clip
+            future.add_done_callback(lambda _: token.close())
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if token is not None:
+                token.cancel()
+                if future.done():
+                    # The worker finished before the cancel marker was written
+                    token.close()
+            raise
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise
+
+    def _discard(self, executor: Executor) -> None:
+        # A worker died (e.g. a decoder crash); start a fresh pool for later clips
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    async def shared_analysis(self, video_path: str) -> Tuple[WeddingObjectDetectionResult, EmotionAnalysisResult, Optional[VisualAnalysisResult]]:
+        """run_shared_analysis() in a worker"""
+        return await self.submit(run_shared_analysis, video_path, cancellable=True)
+
+    async def object_analysis(self, video_path: str) -> WeddingObjectDetectionResult:
+        """run_object_analysis() in a worker"""
+        return await self.submit(run_object_analysis, video_path, cancellable=True)
+
+    def warm_up(self) -> None:
+        """Start the pool now instead of on the first clip"""
+        executor = self._get_executor()
+        # Submitting a no-op makes the pool start (and initialize) a worker
+        self._warm_up = executor.submit(os.getpid)
+
+    @property
+    def ready(self) -> bool:
+        """Whether the pool is running (and has finished warming up, if it was warmed)"""
+        return self._executor is not None and (self._warm_up is None or self._warm_up.done())
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_executor: Optional[AnalysisExecutor] = None
+
+
+def get_analysis_executor() -> AnalysisExecutor:
+    """Shared process-wide analysis executor"""
+    global _executor
+    if _executor is None:
+        _executor = AnalysisExecutor()
+    return _executor
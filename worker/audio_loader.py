@@ -0,0 +1,70 @@
+"""
+Audio Loader for ClipSense
+
+Decodes audio (from music files or video clips) straight into a NumPy array
+by piping mono 32-bit float PCM out of FFmpeg at the analysis sample rate.
+Nothing is written to disk, and an optional duration limit is passed to
+FFmpeg as -t so only the part of the track that will be analyzed is
+decoded.
+"""
+
+import subprocess
+from typing import List, Optional
+import numpy as np
+try:
+    from .ffmpeg_pool import get_ffmpeg_pool
+except ImportError:
+    from ffmpeg_pool import get_ffmpeg_pool
+
+
+def _decode_command(path: str, sample_rate: int, duration: Optional[float] = None,
+                    offset: Optional[float] = None) -> List[str]:
+    cmd = ["ffmpeg", "-nostdin", "-loglevel", "error"]
+    if offset:
+        cmd += ["-ss", f"{offset:.3f}"]
+    cmd += ["-i", path, "-vn", "-sn", "-dn"]
+    if duration is not None:
+        cmd += ["-t", f"{duration:.3f}"]
+    cmd += [
+        "-ac", "1",
+        "-ar", str(sample_rate),
+        "-c:a", "pcm_f32le",
+        "-f", "f32le",
+        "pipe:1"
+    ]
+    return cmd
+
+
+def _to_array(pcm: bytes) -> np.ndarray:
+    # astype copies into a writable, native-endian array
+    return np.frombuffer(pcm, dtype="<f4").astype(np.float32)
+
+
+def load_audio(path: str, sample_rate: int, duration: Optional[float] = None,
+               offset: Optional[float] = None) -> np.ndarray:
+    """
+    Decode an audio track to a mono float32 array
+
+    Args:
+        path: Audio or video file
+        sample_rate: Output sample rate in Hz
+        duration: Decode at most this many seconds
+        offset: Start decoding at this position in seconds
+
+    Returns:
+        Mono samples in [-1, 1] at sample_rate
+
+    Raises:
+        subprocess.CalledProcessError: If FFmpeg fails (e.g. no audio stream)
+    """
+    cmd = _decode_command(path, sample_rate, duration, offset)
+    result = subprocess.run(cmd, capture_output=True, check=True)
+    return _to_array(result.stdout)
+
+
+async def load_audio_async(path: str, sample_rate: int, duration: Optional[float] = None,
+                           offset: Optional[float] = None) -> np.ndarray:
+    """load_audio() through the shared FFmpeg pool, without blocking the event loop"""
+    cmd = _decode_command(path, sample_rate, duration, offset)
+    result = await get_ffmpeg_pool().run(cmd, capture_output=True)
+    return _to_array(result.stdout)
@@ -3,20 +3,37 @@ Background Processing Module for ClipSense
 
 Handles AI analysis in the background with real-time progress updates.
 Uses asyncio tasks and progress tracking for efficient processing.
+Jobs and per-clip results are persisted in the job store, so jobs survive
+worker restarts and interrupted jobs resume where they stopped. Progress
+and per-clip results are pushed to WebSocket subscribers as they happen.
 """
 
 import asyncio
 import time
 import uuid
-from typing import Dict, List, Optional, Callable, Any
+from typing import TYPE_CHECKING, Dict, List, Optional, Callable, Any
 from dataclasses import dataclass
 from enum import Enum
 import json
 from pathlib import Path
 
 try:
-    from .ai_content_selector import AIContentSelector, AIContentSelectionResult
+    from .clip_scheduler import aclosing, get_clip_scheduler
+    from .top_k_selector import TopKSelector
+    from .config import Config
+    from .job_store import JobStore
+    from .job_events import JobEventClient, get_job_event_hub
+    from .services import get_services, load_module
 except ImportError:
+    from clip_scheduler import aclosing, get_clip_scheduler
+    from top_k_selector import TopKSelector
+    from config import Config
+    from job_store import JobStore
+    from job_events import JobEventClient, get_job_event_hub
+    from services import get_services, load_module
+
+if TYPE_CHECKING:
+    # Imported on first use: the selector pulls in OpenCV, librosa and the analyzers
     from ai_content_selector import AIContentSelector, AIContentSelectionResult
 
 class ProcessingStatus(Enum):
@@ -39,25 +56,198 @@ class ProcessingJob:
     status: ProcessingStatus
     progress: float  # 0.0 to 1.0
     current_step: str
-    results: Optional[List[AIContentSelectionResult]] = None
+    results: Optional[List["AIContentSelectionResult"]] = None
     error: Optional[str] = None
     created_at: float = 0.0
     started_at: Optional[float] = None
     completed_at: Optional[float] = None
 
+def summarize_result(result: "AIContentSelectionResult") -> Dict[str, Any]:
+    """JSON-friendly summary of a clip result, as returned by the job status endpoints"""
+    return {
+        "clip_path": result.clip_path,
+        "final_score": result.final_score,
+        "selection_reason": result.selection_reason,
+        "description": result.description,
+        "object_analysis": {
+            "key_moments": result.object_analysis.key_moments,
+            "scene_classification": result.object_analysis.scene_classification,
+            "objects_detected": result.object_analysis.objects_detected,
+        },
+        "story_arc": {
+            "scene_classification": result.story_arc.scene_classification,
+            "emotional_tone": result.story_arc.emotional_tone,
+            "story_importance": result.story_arc.story_importance,
+        },
+    }
+
 class BackgroundProcessor:
     """Handles background AI processing with progress tracking"""
     
-    def __init__(self):
-        self.ai_selector = AIContentSelector()
+    def __init__(self, ai_selector: Optional["AIContentSelector"] = None):
+        self._ai_selector = ai_selector
+        self.clip_scheduler = get_clip_scheduler()
         self.jobs: Dict[str, ProcessingJob] = {}
         self.progress_callbacks: Dict[str, Callable] = {}
+        # Running job tasks; cancelling one stops its analysis workers and FFmpeg processes
+        self._job_tasks: Dict[str, asyncio.Task] = {}
+        self._expiry_task: Optional[asyncio.Task] = None
+        # Selections of stored jobs, turned into results when the job is first read
+        self._unloaded_selections: Dict[str, List[str]] = {}
+        self.events = get_job_event_hub()
+        
+        # Durable job records; without them jobs only live in memory
+        self.job_store: Optional[JobStore] = None
+        try:
+            self.job_store = JobStore()
+            self._load_jobs()
+        except Exception as e:
+            print(f"WARNING:background_processor:Job store unavailable, jobs will not survive restarts: {e}")
+    
+    async def resolve_ai_selector(self) -> "AIContentSelector":
+        """Injected selector, or the application-wide one (built off the event loop on first use)"""
+        if self._ai_selector is None:
+            self._ai_selector = await get_services().resolve("ai_selector")
+        return self._ai_selector
     
-    def clear_ai_cache(self):
+    def _load_jobs(self) -> None:
+        """Restore jobs (and finished selections) recorded by previous runs"""
+        for record in self.job_store.load_jobs():
+            job = ProcessingJob(
+                job_id=record["job_id"],
+                clips=record["clips"],
+                music_path=record["music_path"],
+                target_duration=record["target_duration"],
+                story_style=record["story_style"],
+                style_preset=record["style_preset"],
+                status=ProcessingStatus(record["status"]),
+                progress=record["progress"],
+                current_step=record["current_step"],
+                error=record["error"],
+                created_at=record["created_at"],
+                started_at=record["started_at"],
+                completed_at=record["completed_at"]
+            )
+            if record["selected"] is not None:
+                # Parsing results needs the analyzer modules; defer it so startup stays fast
+                self._unloaded_selections[job.job_id] = record["selected"]
+            self.jobs[job.job_id] = job
+        if self.jobs:
+            print(f"INFO:background_processor:📂 Loaded {len(self.jobs)} jobs from {self.job_store.db_path}")
+    
+    def _with_results(self, job: Optional[ProcessingJob]) -> Optional[ProcessingJob]:
+        """The job, with a stored selection loaded into its results if not done yet"""
+        if job is not None and job.job_id in self._unloaded_selections:
+            selected = self._unloaded_selections.pop(job.job_id)
+            stored = self._stored_results(job.job_id)
+            job.results = [stored[clip_path] for clip_path in selected if clip_path in stored]
+        return job
+    
+    def _stored_results(self, job_id: str) -> Dict[str, "AIContentSelectionResult"]:
+        """Per-clip results recorded for a job (unreadable entries are skipped and re-analyzed)"""
+        if self.job_store is None:
+            return {}
+        result_type = load_module("ai_content_selector").AIContentSelectionResult
+        results = {}
+        for clip_path, result_json in self.job_store.load_clip_results(job_id).items():
+            try:
+                results[clip_path] = result_type.model_validate_json(result_json)
+            except ValueError as e:
+                print(f"WARNING:background_processor:Ignoring stored result for {clip_path}: {e}")
+        return results
+    
+    def _job_changed(self, job: ProcessingJob) -> None:
+        """Record the job's current state and push it to subscribers"""
+        self.events.publish(job.job_id, self._progress_event(job), coalesce=True)
+        if self.job_store is None:
+            return
+        try:
+            self.job_store.save_job({
+                "job_id": job.job_id,
+                "clips": job.clips,
+                "music_path": job.music_path,
+                "target_duration": job.target_duration,
+                "story_style": job.story_style,
+                "style_preset": job.style_preset,
+                "status": job.status.value,
+                "progress": job.progress,
+                "current_step": job.current_step,
+                "error": job.error,
+                "selected": ([result.clip_path for result in job.results] if job.results is not None
+                             else self._unloaded_selections.get(job.job_id)),
+                "created_at": job.created_at,
+                "started_at": job.started_at,
+                "completed_at": job.completed_at,
+            })
+        except Exception as e:
+            print(f"WARNING:background_processor:Failed to persist job {job.job_id}: {e}")
+    
+    @staticmethod
+    def _progress_event(job: ProcessingJob) -> Dict[str, Any]:
+        return {
+            "type": "job_progress",
+            "status": job.status.value,
+            "progress": job.progress,
+            "current_step": job.current_step,
+            "error": job.error,
+        }
+    
+    def subscribe(self, client: JobEventClient, job_id: str) -> bool:
+        """Subscribe a client to a job's events, starting with its current state"""
+        job = self._with_results(self.jobs.get(job_id))
+        if job is None:
+            return False
+        self.events.subscribe(client, job_id)
+        if job.results is not None:
+            client.put({"type": "job_results", "job_id": job_id, "results": [summarize_result(result) for result in job.results]},
+                       ("job_results", job_id))
+        client.put({**self._progress_event(job), "job_id": job_id}, ("job_progress", job_id))
+        return True
+    
+    def run_job(self, job_id: str) -> None:
+        """Run start_processing in a task owned by the processor until it finishes"""
+        task = asyncio.create_task(self.start_processing(job_id))
+        self._job_tasks[job_id] = task
+        task.add_done_callback(lambda _: self._job_tasks.pop(job_id, None))
+    
+    async def start(self) -> None:
+        """Resume jobs interrupted by a restart and start periodic expiry (call on app startup)"""
+        interrupted = [job for job in self.jobs.values()
+                       if job.status in (ProcessingStatus.PENDING, ProcessingStatus.RUNNING)]
+        for job in interrupted:
+            print(f"INFO:background_processor:🔁 Resuming interrupted job {job.job_id}")
+            self.run_job(job.job_id)
+        
+        if self._expiry_task is None:
+            self._expiry_task = asyncio.create_task(self._expire_jobs_periodically())
+    
+    async def stop(self) -> None:
+        """Stop periodic expiry and running jobs (call on app shutdown; jobs resume on the next start)"""
+        tasks = list(self._job_tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        if self._expiry_task is not None:
+            self._expiry_task.cancel()
+            try:
+                await self._expiry_task
+            except asyncio.CancelledError:
+                pass
+            self._expiry_task = None
+    
+    async def _expire_jobs_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(Config.JOB_CLEANUP_INTERVAL_MINUTES * 60)
+            try:
+                self.cleanup_old_jobs(Config.JOB_MAX_AGE_HOURS)
+            except Exception as e:
+                print(f"WARNING:background_processor:Job expiry failed: {e}")
+    
+    async def clear_ai_cache(self):
         """Clear the AI selector cache to force fresh analysis"""
-        if hasattr(self.ai_selector, '_analysis_cache'):
-            self.ai_selector._analysis_cache.clear()
-            print("INFO:background_processor:🧹 Cleared AI analysis cache")
+        (await self.resolve_ai_selector()).clear_cache()
+        print("INFO:background_processor:🧹 Cleared AI analysis cache")
         
     def create_job(self, 
                    clips: List[str], 
@@ -82,20 +272,27 @@ class BackgroundProcessor:
         )
         
         self.jobs[job_id] = job
+        self._job_changed(job)
         print(f"INFO:background_processor:📋 Created job {job_id} for {len(clips)} clips")
         
         return job_id
     
     def get_job_status(self, job_id: str) -> Optional[ProcessingJob]:
         """Get the current status of a job"""
-        return self.jobs.get(job_id)
+        return self._with_results(self.jobs.get(job_id))
     
     def cancel_job(self, job_id: str) -> bool:
         """Cancel a running job"""
         if job_id in self.jobs:
             job = self.jobs[job_id]
-            if job.status == ProcessingStatus.RUNNING:
+            if job.status in (ProcessingStatus.PENDING, ProcessingStatus.RUNNING):
                 job.status = ProcessingStatus.CANCELLED
+                job.completed_at = time.time()
+                self._job_changed(job)
+                # Cancelling the task interrupts clips in flight instead of waiting for them
+                task = self._job_tasks.get(job_id)
+                if task is not None:
+                    task.cancel()
                 print(f"INFO:background_processor:❌ Cancelled job {job_id}")
                 return True
         return False
@@ -106,10 +303,12 @@ class BackgroundProcessor:
             return
         
         job = self.jobs[job_id]
+        if job.status == ProcessingStatus.CANCELLED:
+            return
         job.status = ProcessingStatus.RUNNING
-        job.started_at = time.time()
+        job.started_at = job.started_at or time.time()
         job.current_step = "Starting AI analysis..."
-        job.progress = 0.0
+        self._job_changed(job)
         
         print(f"INFO:background_processor:🚀 Starting job {job_id}")
         
@@ -118,75 +317,99 @@ class BackgroundProcessor:
             await self._process_clips_batch(job)
             
             if job.status != ProcessingStatus.CANCELLED:
+                if job.results is not None:
+                    self.events.publish(job_id, {"type": "job_results", "results": [summarize_result(result) for result in job.results]},
+                                        coalesce=True)
                 job.status = ProcessingStatus.COMPLETED
                 job.completed_at = time.time()
                 job.progress = 1.0
                 job.current_step = "Completed!"
+                self._job_changed(job)
                 
                 print(f"INFO:background_processor:✅ Job {job_id} completed in {job.completed_at - job.started_at:.2f}s")
                 
+        except asyncio.CancelledError:
+            if job.status != ProcessingStatus.CANCELLED:
+                # Shutdown rather than cancel_job: the job stays running and resumes on restart
+                raise
+            print(f"INFO:background_processor:🛑 Job {job_id} stopped after {job.progress:.0%}")
+            
         except Exception as e:
             job.status = ProcessingStatus.FAILED
             job.error = str(e)
             job.completed_at = time.time()
+            self._job_changed(job)
             print(f"INFO:background_processor:❌ Job {job_id} failed: {e}")
     
     async def _process_clips_batch(self, job: ProcessingJob) -> None:
-        """Process clips in batches with progress updates"""
+        """Analyze clips through the shared scheduler, updating progress as each one completes"""
+        # Keep only the clips that can still be selected
+        target_count = max(5, job.target_duration // 3)
+        ai_selector = await self.resolve_ai_selector()
+        
         clips = job.clips
+        if Config.PRESCREEN_ENABLED:
+            job.current_step = f"Pre-screening {len(clips)} clips..."
+            self._job_changed(job)
+            clips, _ = await ai_selector.prescreener.screen_clips(clips, keep_at_least=target_count)
         total_clips = len(clips)
-        batch_size = 3  # Process 3 clips at a time for better performance
+        selector = TopKSelector(target_count, lambda result: result.final_score)
+        
+        # Clips finished before a restart are not analyzed again
+        done = self._stored_results(job.job_id)
+        for clip_path in clips:
+            if clip_path in done:
+                selector.push(done[clip_path])
+        processed_count = selector.seen
+        clips = [clip_path for clip_path in clips if clip_path not in done]
+        if processed_count:
+            print(f"INFO:background_processor:🔁 Job {job.job_id}: {processed_count}/{total_clips} clips already analyzed")
         
-        all_results = []
-        processed_count = 0
+        job.current_step = f"Analyzing {total_clips} clips..."
+        self._job_changed(job)
+        print(f"INFO:background_processor:📦 Job {job.job_id}: {job.current_step}")
         
-        # Process clips in batches
-        for i in range(0, total_clips, batch_size):
-            if job.status == ProcessingStatus.CANCELLED:
-                break
+        async def analyze(clip_path: str) -> "AIContentSelectionResult":
+            return await ai_selector.analyze_clip_fast(clip_path, job.story_style, job.style_preset)
+        
+        # Closing the stream on cancellation stops scheduling and cancels clips in flight
+        async with aclosing(self.clip_scheduler.stream(clips, analyze)) as outcomes:
+            async for outcome in outcomes:
+                processed_count += 1
                 
-            batch = clips[i:i + batch_size]
-            batch_num = i // batch_size + 1
-            total_batches = (total_clips + batch_size - 1) // batch_size
-            
-            job.current_step = f"Processing batch {batch_num}/{total_batches} ({len(batch)} clips)..."
-            job.progress = processed_count / total_clips
-            
-            print(f"INFO:background_processor:📦 Job {job.job_id}: {job.current_step}")
-            
-            # Process batch in parallel
-            batch_tasks = []
-            for clip_path in batch:
-                task = self.ai_selector.analyze_clip_fast(
-                    clip_path, 
-                    job.story_style, 
-                    job.style_preset
-                )
-                batch_tasks.append(task)
-            
-            try:
-                batch_results = await asyncio.gather(*batch_tasks)
-                all_results.extend(batch_results)
-                processed_count += len(batch)
+                if outcome.error is not None:
+                    print(f"INFO:background_processor:⚠️ Job {job.job_id}: Clip {Path(outcome.clip).name} failed: {outcome.error}")
+                else:
+                    selected = selector.push(outcome.result)
+                    if self.job_store is not None:
+                        try:
+                            self.job_store.save_clip_result(job.job_id, outcome.clip, outcome.result.model_dump_json())
+                        except Exception as e:
+                            # The result is still used; only a restart would analyze the clip again
+                            print(f"WARNING:background_processor:Failed to persist result for {outcome.clip}: {e}")
+                    if self.events.has_subscribers(job.job_id):
+                        self.events.publish(job.job_id, {
+                            "type": "clip_result",
+                            "result": summarize_result(outcome.result),
+                            "selected": selected
+                        })
+                    print(f"INFO:background_processor:✅ Job {job.job_id}: Processed {processed_count}/{total_clips} clips")
                 
-                print(f"INFO:background_processor:✅ Job {job.job_id}: Processed {processed_count}/{total_clips} clips")
+                job.progress = processed_count / total_clips
+                job.current_step = f"Analyzed {processed_count}/{total_clips} clips..."
+                self._job_changed(job)
                 
-            except Exception as e:
-                print(f"INFO:background_processor:⚠️ Job {job.job_id}: Batch failed: {e}")
-                # Continue with next batch
-                continue
-        
-        # Sort results by score and select best clips
-        if all_results:
-            all_results.sort(key=lambda x: x.final_score, reverse=True)
-            target_count = min(len(all_results), max(5, job.target_duration // 3))
-            job.results = all_results[:target_count]
+                if job.status == ProcessingStatus.CANCELLED:
+                    break
+        
+        if len(selector):
+            job.results = selector.results()
             
             print(f"INFO:background_processor:🎯 Job {job.job_id}: Selected {len(job.results)} best clips")
     
-    def get_job_results(self, job_id: str) -> Optional[List[AIContentSelectionResult]]:
+    def get_job_results(self, job_id: str) -> Optional[List["AIContentSelectionResult"]]:
         """Get the results of a completed job"""
-        job = self.jobs.get(job_id)
+        job = self._with_results(self.jobs.get(job_id))
         if job and job.status == ProcessingStatus.COMPLETED:
             return job.results
         return None
@@ -204,11 +427,21 @@ class BackgroundProcessor:
         
         for job_id in jobs_to_remove:
             del self.jobs[job_id]
+            self._unloaded_selections.pop(job_id, None)
+        if self.job_store is not None:
+            self.job_store.delete_jobs(jobs_to_remove)
         
         if jobs_to_remove:
             print(f"INFO:background_processor:🧹 Cleaned up {len(jobs_to_remove)} old jobs")
         
         return len(jobs_to_remove)
 
-# Global background processor instance
-background_processor = BackgroundProcessor()
+_processor: Optional[BackgroundProcessor] = None
+
+
+def get_background_processor() -> BackgroundProcessor:
+    """Shared process-wide background processor (opens the job store on first use)"""
+    global _processor
+    if _processor is None:
+        _processor = BackgroundProcessor()
+    return _processor
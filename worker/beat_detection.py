@@ -5,13 +5,13 @@ Analyzes music files to detect beats and downbeats for precise clip timing.
 Uses librosa for audio analysis and beat tracking.
 """
 
-import os
 import librosa
 import numpy as np
 from typing import List, Tuple, Optional
-import tempfile
-import subprocess
-import asyncio
+try:
+    from .audio_loader import load_audio_async
+except ImportError:
+    from audio_loader import load_audio_async
 
 
 class BeatDetector:
@@ -33,12 +33,10 @@ class BeatDetector:
             List of beat times in seconds
         """
         try:
-            # Convert to WAV if needed for better compatibility
-            wav_path = await self._ensure_wav_format(music_path)
-            
-            # Load audio file
+            # Decode only the target duration straight from FFmpeg
             print(f"🎵 Loading audio file: {music_path}")
-            y, sr = librosa.load(wav_path, sr=self.sample_rate)
+            sr = self.sample_rate
+            y = await load_audio_async(music_path, sr, duration=target_duration)
             
             # Detect tempo and beats
             print("🥁 Detecting tempo and beats...")
@@ -77,12 +75,10 @@ class BeatDetector:
             List of downbeat times in seconds
         """
         try:
-            # Convert to WAV if needed
-            wav_path = await self._ensure_wav_format(music_path)
-            
-            # Load audio file
+            # Decode only the target duration straight from FFmpeg
             print(f"🎵 Loading audio file for downbeat detection: {music_path}")
-            y, sr = librosa.load(wav_path, sr=self.sample_rate)
+            sr = self.sample_rate
+            y = await load_audio_async(music_path, sr, duration=target_duration)
             
             # Detect tempo and beats first
             tempo, beats = librosa.beat.beat_track(y=y, sr=sr, hop_length=self.hop_length)
@@ -130,45 +126,6 @@ class BeatDetector:
             print("🔄 Falling back to regular beat detection")
             return await self.detect_beats(music_path, target_duration)
     
-    async def _ensure_wav_format(self, music_path: str) -> str:
-        """Convert music file to WAV format for better librosa compatibility"""
-        if music_path.lower().endswith('.wav'):
-            return music_path
-        
-        # Create temporary WAV file
-        temp_dir = tempfile.gettempdir()
-        wav_path = os.path.join(temp_dir, f"temp_beat_detect_{os.getpid()}.wav")
-        
-        try:
-            # Convert to WAV using FFmpeg
-            cmd = [
-                "ffmpeg", "-y",
-                "-i", music_path,
-                "-acodec", "pcm_s16le",
-                "-ar", str(self.sample_rate),
-                "-ac", "1",  # Mono for beat detection
-                wav_path
-            ]
-            
-            print(f"🔄 Converting to WAV for beat detection...")
-            result = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await result.communicate()
-            
-            if result.returncode != 0:
-                raise Exception(f"FFmpeg conversion failed: {stderr.decode()}")
-            
-            return wav_path
-            
-        except Exception as e:
-            print(f"⚠️  WAV conversion failed: {e}")
-            # Return original path as fallback
-            return music_path
-    
     def _fallback_timing(self, target_duration: float) -> List[float]:
         """Fallback timing when beat detection fails"""
         # Use regular intervals based on typical music tempo
@@ -181,15 +138,3 @@ class BeatDetector:
             current_time += interval
         
         return beats
-    
-    def cleanup_temp_files(self):
-        """Clean up temporary WAV files"""
-        temp_dir = tempfile.gettempdir()
-        pattern = f"temp_beat_detect_{os.getpid()}.wav"
-        
-        try:
-            for file in os.listdir(temp_dir):
-                if file.startswith("temp_beat_detect_"):
-                    os.remove(os.path.join(temp_dir, file))
-        except Exception:
-            pass  # Ignore cleanup errors
@@ -0,0 +1,89 @@
+"""
+Cooperative Cancellation for ClipSense
+
+Cancelling an asyncio task stops the coroutine, but not the synchronous
+analysis it handed to a worker thread or process. A CancellationToken
+bridges the two: the event loop side calls cancel(), and the worker's
+frame loop calls raise_if_cancelled() between frames.
+
+Tokens are picklable so they can be passed to process-pool workers. In
+the same process an Event is checked; across processes cancellation is
+signalled by a marker file, which workers poll at most every
+POLL_INTERVAL seconds.
+"""
+
+import os
+import tempfile
+import threading
+import time
+import uuid
+from typing import Optional
+
+# Marker files live here while a cancelled operation is still running
+CANCEL_DIR = os.path.join(tempfile.gettempdir(), "clipsense-cancel")
+
+# Minimum seconds between marker file checks in another process
+POLL_INTERVAL = 0.05
+
+
+class OperationCancelled(Exception):
+    """Raised inside worker code when its cancellation token is cancelled"""
+
+
+class CancellationToken:
+    """Cancellation flag shared between the event loop and a worker thread or process"""
+
+    def __init__(self):
+        self.marker_path = os.path.join(CANCEL_DIR, uuid.uuid4().hex)
+        self._event: Optional[threading.Event] = threading.Event()
+        self._cancelled = False
+        self._next_poll = 0.0
+
+    def __getstate__(self):
+        # Events do not cross process boundaries; the copy relies on the marker file
+        return {"marker_path": self.marker_path}
+
+    def __setstate__(self, state):
+        self.marker_path = state["marker_path"]
+        self._event = None
+        self._cancelled = False
+        self._next_poll = 0.0
+
+    def cancel(self) -> None:
+        """Signal cancellation to every holder of this token"""
+        self._cancelled = True
+        if self._event is not None:
+            self._event.set()
+        try:
+            os.makedirs(CANCEL_DIR, exist_ok=True)
+            open(self.marker_path, "w").close()
+        except OSError as e:
+            print(f"WARNING:cancellation:Could not write cancel marker {self.marker_path}: {e}")
+
+    @property
+    def cancelled(self) -> bool:
+        if self._cancelled:
+            return True
+        if self._event is not None:
+            # Owning process: cancel() sets the event, no need to touch the disk
+            return self._event.is_set()
+        now = time.monotonic()
+        if now >= self._next_poll:
+            self._next_poll = now + POLL_INTERVAL
+            self._cancelled = os.path.exists(self.marker_path)
+        return self._cancelled
+
+    def raise_if_cancelled(self) -> None:
+        """
+        Raises:
+            OperationCancelled: If the token has been cancelled
+        """
+        if self.cancelled:
+            raise OperationCancelled()
+
+    def close(self) -> None:
+        """Remove the marker file once no worker is using the token any more"""
+        try:
+            os.remove(self.marker_path)
+        except OSError:
+            pass
@@ -0,0 +1,217 @@
+"""
+Clip Pre-screening for ClipSense
+
+Cheap first tier of clip selection. A handful of downscaled frame pairs
+per clip (plus container metadata) give brightness, contrast, sharpness
+(variance of the Laplacian) and frame-to-frame motion, which is enough to
+reject obviously unusable footage from raw card dumps - black frames,
+lens-cap shots, out-of-focus or violently shaky clips, accidental
+sub-second recordings - before the expensive object/emotion analysis.
+
+Survivors are returned best-first so the streaming top-k selection sees
+promising clips early; if too few clips survive, the best rejected ones
+are added back so selection never runs short.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import cv2
+import numpy as np
+try:
+    from .analysis_cache import AnalysisCache
+    from .analysis_executor import get_analysis_executor
+    from .clip_scheduler import aclosing, get_clip_scheduler
+    from .config import Config
+    from .media_info import get_media_info_service
+except ImportError:
+    from analysis_cache import AnalysisCache
+    from analysis_executor import get_analysis_executor
+    from clip_scheduler import aclosing, get_clip_scheduler
+    from config import Config
+    from media_info import get_media_info_service
+
+# Bump when metrics or thresholds change so cached screening results are invalidated
+PRESCREEN_VERSION = 1
+
+# Probe positions per clip and the width frames are scaled to before measuring
+PRESCREEN_PROBES = 5
+PRESCREEN_FRAME_WIDTH = 320
+
+
+@dataclass
+class PrescreenResult:
+    """Cheap quality metrics and the accept/reject decision for one clip"""
+    clip_path: str
+    duration: float
+    brightness: float  # Median mean luma (0-1)
+    contrast: float    # Median luma standard deviation (0-1)
+    sharpness: float   # Median variance of the Laplacian at PRESCREEN_FRAME_WIDTH
+    motion: float      # Median adjacent-frame difference (0-1, VisualAnalyzer scale)
+    score: float       # Combined cheap quality score (0-1)
+    rejected: bool = False
+    reason: Optional[str] = None
+
+
+def measure_clip(video_path: str, probes: int = PRESCREEN_PROBES, width: int = PRESCREEN_FRAME_WIDTH) -> Dict[str, float]:
+    """
+    Measure a few frame pairs spread evenly across the clip
+
+    Runs in the analysis executor. Each probe seeks to a position and reads
+    two consecutive frames, so motion reflects camera shake rather than
+    scene changes between distant probes.
+
+    Raises:
+        ValueError: If the clip cannot be opened or no frame can be read
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video file: {video_path}")
+
+    def small_gray(frame: np.ndarray) -> np.ndarray:
+        height = max(2, int(frame.shape[0] * width / frame.shape[1]))
+        return cv2.cvtColor(cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        brightness, contrast, sharpness, motion = [], [], [], []
+
+        for i in range(probes):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int((i + 0.5) * frame_count / probes))
+            ok, frame = cap.read()
+            if not ok:
+                continue
+            gray = small_gray(frame)
+            brightness.append(np.mean(gray) / 255.0)
+            contrast.append(np.std(gray) / 255.0)
+            sharpness.append(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+            ok, next_frame = cap.read()
+            if ok:
+                motion.append(min(1.0, np.mean(cv2.absdiff(gray, small_gray(next_frame))) / 255.0 * 10))
+
+        if not brightness:
+            raise ValueError(f"No readable frames in {video_path}")
+
+        return {
+            "duration": frame_count / fps if fps > 0 else 0.0,
+            "brightness": float(np.median(brightness)),
+            "contrast": float(np.median(contrast)),
+            "sharpness": float(np.median(sharpness)),
+            "motion": float(np.median(motion)) if motion else 0.0,
+        }
+    finally:
+        cap.release()
+
+
+class ClipPrescreener:
+    """Rejects unusable clips cheaply and orders the rest by a quick quality score"""
+
+    def __init__(self, analysis_cache: Optional[AnalysisCache] = None):
+        self.analysis_cache = analysis_cache
+        self.min_duration = Config.PRESCREEN_MIN_DURATION
+        self.min_brightness = Config.PRESCREEN_MIN_BRIGHTNESS
+        self.min_sharpness = Config.PRESCREEN_MIN_SHARPNESS
+        self.max_motion = Config.PRESCREEN_MAX_MOTION
+
+    def _cache_params(self) -> Dict[str, Any]:
+        return {
+            "version": PRESCREEN_VERSION,
+            "probes": PRESCREEN_PROBES,
+            "width": PRESCREEN_FRAME_WIDTH,
+        }
+
+    def evaluate(self, clip_path: str, metrics: Dict[str, float]) -> PrescreenResult:
+        """Apply the rejection thresholds and compute the quick score"""
+        brightness_score = max(0.0, 1.0 - abs(metrics["brightness"] - 0.5) * 2)
+        contrast_score = min(1.0, metrics["contrast"] * 4)
+        sharpness_score = min(1.0, metrics["sharpness"] / 200.0)
+        stability_score = 1.0 - metrics["motion"]
+        score = 0.3 * sharpness_score + 0.25 * brightness_score + 0.25 * contrast_score + 0.2 * stability_score
+
+        reason = None
+        if metrics["duration"] < self.min_duration:
+            reason = f"too short ({metrics['duration']:.1f}s)"
+        elif metrics["brightness"] < self.min_brightness:
+            reason = "black or nearly black"
+        elif metrics["sharpness"] < self.min_sharpness:
+            reason = "out of focus or flat"
+        elif metrics["motion"] > self.max_motion:
+            reason = "too shaky"
+
+        return PrescreenResult(
+            clip_path=clip_path,
+            duration=metrics["duration"],
+            brightness=metrics["brightness"],
+            contrast=metrics["contrast"],
+            sharpness=metrics["sharpness"],
+            motion=metrics["motion"],
+            score=score,
+            rejected=reason is not None,
+            reason=reason
+        )
+
+    async def screen(self, clip_path: str) -> PrescreenResult:
+        """Measure (or load cached metrics for) one clip and evaluate it"""
+        metrics = None
+        if self.analysis_cache is not None:
+            metrics = self.analysis_cache.get("prescreen", clip_path, self._cache_params())
+
+        if metrics is None:
+            try:
+                metrics = await get_analysis_executor().submit(measure_clip, clip_path)
+            except ValueError as e:
+                return PrescreenResult(clip_path, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, rejected=True, reason=f"unreadable ({e})")
+
+            # Prefer the container duration from the shared probe when ffprobe is available
+            try:
+                metrics["duration"] = await get_media_info_service().duration(clip_path) or metrics["duration"]
+            except Exception:
+                pass
+
+            if self.analysis_cache is not None:
+                try:
+                    self.analysis_cache.put("prescreen", clip_path, self._cache_params(), metrics)
+                except Exception as e:
+                    print(f"WARNING:clip_prescreener:Failed to cache pre-screen metrics for {clip_path}: {e}")
+
+        return self.evaluate(clip_path, metrics)
+
+    async def screen_clips(self, clip_paths: Sequence[str], keep_at_least: int = 0) -> Tuple[List[str], List[PrescreenResult]]:
+        """
+        Screen a set of clips
+
+        Args:
+            clip_paths: Candidate clips
+            keep_at_least: Minimum clips to return; the best rejected clips fill any shortfall
+
+        Returns:
+            (clips to analyze, best first; results for clips that were left out)
+        """
+        start_time = time.time()
+        results: List[PrescreenResult] = []
+        async with aclosing(get_clip_scheduler().stream(clip_paths, self.screen)) as outcomes:
+            async for outcome in outcomes:
+                if outcome.error is not None:
+                    # Screening is advisory: keep clips it could not measure
+                    print(f"WARNING:clip_prescreener:Pre-screening failed for {outcome.clip}: {outcome.error}")
+                    results.append(PrescreenResult(outcome.clip, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0))
+                else:
+                    results.append(outcome.result)
+
+        by_score = sorted(results, key=lambda result: result.score, reverse=True)
+        survivors = [result for result in by_score if not result.rejected]
+        rejected = [result for result in by_score if result.rejected]
+
+        # Backfill with the least bad rejects (unreadable clips last, they score 0)
+        shortfall = max(0, min(keep_at_least, len(results)) - len(survivors))
+        survivors.extend(rejected[:shortfall])
+        rejected = rejected[shortfall:]
+
+        print(f"INFO:clip_prescreener:🔎 Pre-screened {len(results)} clips in {time.time() - start_time:.2f}s: "
+              f"{len(survivors)} kept, {len(rejected)} rejected" + (f" ({shortfall} backfilled)" if shortfall else ""))
+        for result in rejected[:10]:
+            print(f"INFO:clip_prescreener:   ✗ {result.clip_path}: {result.reason}")
+
+        return [result.clip_path for result in survivors], rejected
@@ -0,0 +1,117 @@
+"""
+Clip Scheduler for ClipSense
+
+Schedules per-clip analysis across every running job. A global limit caps
+how many clips are analyzed at once (so two concurrent jobs cannot
+oversubscribe the CPU), and an optional per-job cap keeps one large job
+from starving the others. Within a job, a small set of workers pull the
+next clip from a shared iterator as soon as they finish one, so one long
+clip never idles the other slots, and results are streamed to the caller
+in completion order.
+"""
+
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Generic, Optional, Sequence, TypeVar
+try:
+    from .config import Config
+except ImportError:
+    from config import Config
+
+try:
+    from contextlib import aclosing
+except ImportError:
+    # Python < 3.10
+    @asynccontextmanager
+    async def aclosing(thing):
+        """Close an async generator on exit, like contextlib.aclosing"""
+        try:
+            yield thing
+        finally:
+            await thing.aclose()
+
+T = TypeVar("T")
+
+
+@dataclass
+class ClipOutcome(Generic[T]):
+    """Result (or error) for one scheduled clip"""
+    clip: str
+    result: Optional[T] = None
+    error: Optional[BaseException] = None
+
+
+class ClipScheduler:
+    """Global, fair, streaming scheduler for per-clip work"""
+
+    def __init__(self, max_concurrency: Optional[int] = None, per_job_limit: Optional[int] = None):
+        self.max_concurrency = max(1, max_concurrency or Config.get_clip_concurrency())
+        self.per_job_limit = max(1, per_job_limit or Config.ANALYSIS_PER_JOB_CONCURRENCY or self.max_concurrency)
+        # asyncio primitives are bound to one event loop, so keep a semaphore per loop
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def stream(self,
+                     clips: Sequence[str],
+                     func: Callable[[str], Awaitable[T]],
+                     per_job_limit: Optional[int] = None) -> AsyncIterator[ClipOutcome[T]]:
+        """
+        Run func(clip) for every clip and yield outcomes as they complete
+
+        Closing the generator early (e.g. with aclosing and a
+        break) stops scheduling further clips and cancels the ones in flight.
+
+        Args:
+            clips: Clip paths to process
+            func: Coroutine function applied to each clip
+            per_job_limit: Max clips of this job in flight (defaults to the scheduler's cap)
+        """
+        if not clips:
+            return
+
+        semaphore = self._semaphore()
+        outcomes: "asyncio.Queue[ClipOutcome[T]]" = asyncio.Queue()
+        pending = iter(clips)
+
+        async def worker() -> None:
+            # Workers share one iterator: whoever is free takes the next clip
+            for clip in pending:
+                async with semaphore:
+                    try:
+                        outcome = ClipOutcome(clip, result=await func(clip))
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        outcome = ClipOutcome(clip, error=e)
+                outcomes.put_nowait(outcome)
+
+        worker_count = min(len(clips), per_job_limit or self.per_job_limit)
+        workers = [asyncio.create_task(worker()) for _ in range(worker_count)]
+        try:
+            for _ in range(len(clips)):
+                yield await outcomes.get()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+
+_scheduler: Optional[ClipScheduler] = None
+
+
+def get_clip_scheduler() -> ClipScheduler:
+    """Shared process-wide clip scheduler"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = ClipScheduler()
+        print(f"INFO:clip_scheduler:⚙️ Clip scheduler: {_scheduler.max_concurrency} clips in flight, {_scheduler.per_job_limit} per job")
+    return _scheduler
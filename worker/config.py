@@ -29,6 +29,53 @@ class Config:
     FFMPEG_PRESET: str = os.getenv("FFMPEG_PRESET", "ultrafast")
     FFMPEG_CRF: str = os.getenv("FFMPEG_CRF", "28")
     FFMPEG_AUDIO_BITRATE: str = os.getenv("FFMPEG_AUDIO_BITRATE", "96k")
+    FFMPEG_THREADS: int = int(os.getenv("FFMPEG_THREADS", "4"))  # Threads per FFmpeg process
+    FFMPEG_MAX_CONCURRENCY: int = int(os.getenv("FFMPEG_MAX_CONCURRENCY", "0"))  # 0 = cores / FFMPEG_THREADS
+    
+    # Trimming: "reencode" cuts frame-accurately with libx264, "copy" stream-copies
+    # from normalized fixed-GOP proxies (cut starts snap to the proxy keyframe grid)
+    TRIM_MODE: str = os.getenv("TRIM_MODE", "reencode")
+    PROXY_FPS: int = int(os.getenv("PROXY_FPS", "25"))
+    PROXY_GOP_FRAMES: int = int(os.getenv("PROXY_GOP_FRAMES", "12"))  # 1 = all-intra
+    
+    # Preview render engine: "multipass" (trim, concat, overlay) or "filtergraph" (one ffmpeg pass)
+    RENDER_ENGINE: str = os.getenv("RENDER_ENGINE", "multipass")
+    
+    # Master conform: "serial" (one encoder) or "parallel" (per-clip segments + copy concat)
+    CONFORM_MODE: str = os.getenv("CONFORM_MODE", "serial")
+    
+    # Analysis settings
+    INCLUDE_VISUAL_ANALYSIS: bool = os.getenv("INCLUDE_VISUAL_ANALYSIS", "false").lower() == "true"
+    FRAME_SAMPLING_MODE: str = os.getenv("FRAME_SAMPLING_MODE", "grab")  # decode, grab or seek
+    FRAME_SEEK_MIN_GAP_SECONDS: float = float(os.getenv("FRAME_SEEK_MIN_GAP_SECONDS", "2.0"))
+    FRAME_READER: str = os.getenv("FRAME_READER", "ffmpeg")  # ffmpeg (pre-scaled pipe) or opencv
+    ANALYSIS_FRAME_WIDTH: int = int(os.getenv("ANALYSIS_FRAME_WIDTH", "640"))  # 0 = full resolution
+    ANALYSIS_EXECUTOR: str = os.getenv("ANALYSIS_EXECUTOR", "process")  # process or thread
+    ANALYSIS_WORKERS: int = int(os.getenv("ANALYSIS_WORKERS", "0"))  # 0 = cores - 1 (at least 1)
+    ANALYSIS_MAX_CONCURRENT_CLIPS: int = int(os.getenv("ANALYSIS_MAX_CONCURRENT_CLIPS", "0"))  # 0 = 2 x workers, across all jobs
+    ANALYSIS_PER_JOB_CONCURRENCY: int = int(os.getenv("ANALYSIS_PER_JOB_CONCURRENCY", "0"))  # 0 = no per-job cap
+    PRESCREEN_ENABLED: bool = os.getenv("PRESCREEN_ENABLED", "true").lower() == "true"
+    PRESCREEN_MIN_DURATION: float = float(os.getenv("PRESCREEN_MIN_DURATION", "1.0"))  # Seconds
+    PRESCREEN_MIN_BRIGHTNESS: float = float(os.getenv("PRESCREEN_MIN_BRIGHTNESS", "0.06"))  # Mean luma 0-1
+    PRESCREEN_MIN_SHARPNESS: float = float(os.getenv("PRESCREEN_MIN_SHARPNESS", "20"))  # Laplacian variance at 320px
+    PRESCREEN_MAX_MOTION: float = float(os.getenv("PRESCREEN_MAX_MOTION", "0.8"))  # Adjacent-frame motion 0-1
+    SELECTION_SCORE_CEILING: float = float(os.getenv("SELECTION_SCORE_CEILING", "1.0"))  # Assumed max clip score for early exit (1.0 = exact)
+    EMOTION_AUDIO_SAMPLE_RATE: int = int(os.getenv("EMOTION_AUDIO_SAMPLE_RATE", "16000"))
+    EMOTION_AUDIO_MAX_SECONDS: float = float(os.getenv("EMOTION_AUDIO_MAX_SECONDS", "120"))  # 0 = whole clip
+    
+    # Cache settings
+    CACHE_DIR: str = os.getenv("CLIPSENSE_CACHE_DIR", str(Path.home() / ".clipsense" / "cache"))
+    ANALYSIS_CACHE_ENABLED: bool = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() == "true"
+    ANALYSIS_CACHE_MAX_MB: int = int(os.getenv("ANALYSIS_CACHE_MAX_MB", "256"))
+    PROXY_CACHE_ENABLED: bool = os.getenv("PROXY_CACHE_ENABLED", "true").lower() == "true"
+    PROXY_CACHE_MAX_GB: float = float(os.getenv("PROXY_CACHE_MAX_GB", "20"))
+    
+    # Background jobs
+    JOB_STORE_PATH: str = os.getenv("CLIPSENSE_JOB_STORE", str(Path.home() / ".clipsense" / "jobs.sqlite"))
+    JOB_MAX_AGE_HOURS: float = float(os.getenv("JOB_MAX_AGE_HOURS", "24"))
+    JOB_CLEANUP_INTERVAL_MINUTES: float = float(os.getenv("JOB_CLEANUP_INTERVAL_MINUTES", "30"))
+    WS_CLIENT_QUEUE_SIZE: int = int(os.getenv("WS_CLIENT_QUEUE_SIZE", "256"))  # Pending events per WebSocket client
+    WORKER_WARMUP: str = os.getenv("WORKER_WARMUP", "background").lower()  # background or lazy (build analyzers on first use)
     
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
@@ -39,12 +86,51 @@ class Config:
     OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
     OPENAI_VISION_MODEL: str = os.getenv("OPENAI_VISION_MODEL", "gpt-4o-mini")
     
+    @classmethod
+    def get_ffmpeg_concurrency(cls) -> int:
+        """Number of FFmpeg processes allowed to run at once"""
+        if cls.FFMPEG_MAX_CONCURRENCY > 0:
+            return cls.FFMPEG_MAX_CONCURRENCY
+        return max(1, (os.cpu_count() or 1) // max(1, cls.FFMPEG_THREADS))
+    
+    @classmethod
+    def get_analysis_workers(cls) -> int:
+        """Number of clips analyzed in parallel by the analysis executor"""
+        if cls.ANALYSIS_WORKERS > 0:
+            return cls.ANALYSIS_WORKERS
+        # Leave a core for the event loop and FFmpeg
+        return max(1, (os.cpu_count() or 1) - 1)
+    
+    @classmethod
+    def get_clip_concurrency(cls) -> int:
+        """Clips analyzed at once across all jobs"""
+        if cls.ANALYSIS_MAX_CONCURRENT_CLIPS > 0:
+            return cls.ANALYSIS_MAX_CONCURRENT_CLIPS
+        # Extra slots keep workers busy while other clips wait on cache or network I/O
+        return 2 * cls.get_analysis_workers()
+    
+    @classmethod
+    def is_copy_trim(cls) -> bool:
+        """Whether segments are stream-copied from normalized proxies"""
+        return cls.TRIM_MODE.lower() == "copy"
+    
     @classmethod
     def get_ffmpeg_proxy_settings(cls) -> dict:
         """Get optimized FFmpeg settings for proxy creation"""
-        return {
+        settings = {
             "preset": cls.FFMPEG_PRESET,
             "crf": cls.FFMPEG_CRF,
             "audio_bitrate": cls.FFMPEG_AUDIO_BITRATE,
+            "threads": str(cls.FFMPEG_THREADS),
             "scale_filter": "scale='min(1280,iw)':-2"
         }
+        if cls.is_copy_trim():
+            # Copy trimming needs identical stream parameters in every proxy
+            # (so segments concat without re-encoding) and a fixed keyframe grid
+            settings.update({
+                "scale_filter": f"scale=1280:720,setsar=1,fps={cls.PROXY_FPS}",
+                "gop": str(max(1, cls.PROXY_GOP_FRAMES)),
+                "bframes": "0",
+                "pix_fmt": "yuv420p",
+            })
+        return settings
@@ -11,14 +11,16 @@ import subprocess
 import asyncio
 from pathlib import Path
 from typing import List, Dict, Any, Optional
-try:
-    from .video_processor import VideoProcessor
-except ImportError:
-    from video_processor import VideoProcessor
 try:
     from .timeline import read_timeline, validate_timeline_sources
+    from .ffmpeg_pool import get_ffmpeg_pool
+    from .media_info import get_media_info_service
+    from .config import Config
 except ImportError:
     from timeline import read_timeline, validate_timeline_sources
+    from ffmpeg_pool import get_ffmpeg_pool
+    from media_info import get_media_info_service
+    from config import Config
 
 
 class ConformProcessor:
@@ -92,6 +94,10 @@ class ConformProcessor:
     
     async def _conform_video_only(self, timeline: Dict[str, Any], output_path: str):
         """Conform video only without audio overlay"""
+        if Config.CONFORM_MODE.lower() == "parallel" and len(timeline['clips']) > 1:
+            await self._conform_video_parallel(timeline, output_path)
+            return
+        
         clips = timeline['clips']
         fps = timeline['fps']
         
@@ -122,6 +128,72 @@ class ConformProcessor:
         print("🎬 Conforming video from original sources...")
         await self._run_ffmpeg(cmd)
     
+    async def _conform_video_parallel(self, timeline: Dict[str, Any], output_path: str):
+        """
+        Conform each timeline clip as an independent segment, then stream-copy them together
+        
+        Every segment is encoded with identical settings (closed GOP, same
+        size, frame rate and pixel format) through the shared FFmpeg pool, so
+        the concat demuxer can join them with -c copy.
+        """
+        clips = timeline['clips']
+        fps = timeline['fps']
+        
+        # The serial conform outputs at the first clip's size; match it so segments concat cleanly
+        first_clip = await get_media_info_service().probe(clips[0]['src'])
+        width, height = first_clip.width, first_clip.height
+        
+        # Fit other aspect ratios inside that frame (letter/pillarboxed, square pixels) instead
+        # of stretching them; a uniform SAR is also what lets the segments concat with -c copy
+        frame_filter = (
+            f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1"
+        )
+        
+        segment_paths = []
+        commands = []
+        for i, clip in enumerate(clips):
+            duration = clip['out'] - clip['in']
+            segment_path = os.path.join(self.temp_dir, f"conform_segment_{i:03d}.mp4")
+            segment_paths.append(segment_path)
+            commands.append([
+                "ffmpeg", "-y",
+                "-ss", f"{clip['in']:.3f}",
+                "-i", os.path.abspath(clip['src']),
+                "-t", f"{duration:.3f}",
+                "-map", "0:v:0",
+                "-vf", frame_filter,
+                "-c:v", "libx264",
+                "-preset", "medium",  # Same quality settings as the serial conform
+                "-crf", "18",
+                "-flags", "+cgop",  # Closed GOP: each segment decodes independently
+                "-threads", str(Config.FFMPEG_THREADS),
+                "-r", str(fps),
+                "-pix_fmt", "yuv420p",
+                "-an",
+                segment_path
+            ])
+        
+        print(f"🎬 Conforming {len(clips)} segments in parallel from original sources...")
+        await asyncio.gather(*(self._run_ffmpeg(cmd) for cmd in commands))
+        
+        filelist_path = os.path.join(self.temp_dir, "conform_segments.txt")
+        with open(filelist_path, 'w') as f:
+            for segment_path in segment_paths:
+                f.write(f"file '{os.path.abspath(segment_path)}'\n")
+        
+        cmd = [
+            "ffmpeg", "-y",
+            "-f", "concat",
+            "-safe", "0",
+            "-i", filelist_path,
+            "-c", "copy",
+            output_path
+        ]
+        
+        print("🔗 Joining conformed segments...")
+        await self._run_ffmpeg(cmd)
+    
     async def _conform_with_audio(self, timeline: Dict[str, Any], output_path: str, music_path: str):
         """Conform video with audio overlay using original sources"""
         clips = timeline['clips']
@@ -152,19 +224,5 @@ class ConformProcessor:
         await self._run_ffmpeg(cmd)
     
     async def _run_ffmpeg(self, cmd: List[str]) -> subprocess.CompletedProcess:
-        """Run FFmpeg command asynchronously"""
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-        stdout, stderr = await process.communicate()
-        
-        if process.returncode != 0:
-            stderr_text = stderr.decode('utf-8') if stderr else ""
-            stdout_text = stdout.decode('utf-8') if stdout else ""
-            raise subprocess.CalledProcessError(
-                process.returncode, cmd, stdout_text, stderr_text
-            )
-        
-        return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+        """Run FFmpeg command asynchronously through the shared bounded pool"""
+        return await get_ffmpeg_pool().run(cmd, capture_output=True)
@@ -20,6 +20,16 @@ from typing import List, Dict, Any, Optional, Tuple
 from collections import defaultdict
 import asyncio
 from pydantic import BaseModel
+try:
+    from .audio_loader import load_audio
+    from .config import Config
+    from .frame_source import FrameSource, FrameConsumer, VideoOpenError
+    from .frame_features import FrameFeatures, get_face_cascade
+except ImportError:
+    from audio_loader import load_audio
+    from config import Config
+    from frame_source import FrameSource, FrameConsumer, VideoOpenError
+    from frame_features import FrameFeatures, get_face_cascade
 
 class EmotionAnalysisResult(BaseModel):
     """Result of emotion analysis"""
@@ -31,12 +41,40 @@ class EmotionAnalysisResult(BaseModel):
     excitement_level: float  # 0.0 to 1.0
     analysis_duration: float
 
+class EmotionFramePass(FrameConsumer):
+    """Collects per-frame emotion scores for one clip from shared frames"""
+    
+    # Optimized sampling: analyze every 1.5 seconds for better performance
+    interval_seconds = 1.5
+    
+    # Only grayscale face regions are analyzed
+    needs_color = False
+    
+    def __init__(self, analyzer: 'EmotionAnalyzer', video_path: str):
+        self.analyzer = analyzer
+        self.video_path = video_path
+        self.sampling_mode = analyzer.sampling_mode
+        self.emotions_over_time: Dict[str, List[Tuple[float, float]]] = defaultdict(list)
+    
+    def on_frame(self, features: FrameFeatures, timestamp: float) -> None:
+        # Analyze emotions in this frame
+        frame_emotions = self.analyzer._analyze_frame_emotions(features)
+        
+        for emotion, confidence in frame_emotions.items():
+            self.emotions_over_time[emotion].append((timestamp, confidence))
+
 class EmotionAnalyzer:
     """Analyzes emotional content in video clips"""
     
-    def __init__(self):
+    # Bump when detection logic changes so cached results are invalidated
+    ANALYZER_VERSION = 4
+    
+    def __init__(self, sampling_mode: Optional[str] = None):
+        # Frame sampling strategy (decode, grab, seek); None uses Config.FRAME_SAMPLING_MODE
+        self.sampling_mode = sampling_mode
+        
         # Load face cascade for facial expression analysis
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        self.face_cascade = get_face_cascade()
         
         # Emotion categories we'll detect
         self.emotion_categories = {
@@ -48,12 +86,21 @@ class EmotionAnalyzer:
             'celebration': self._detect_celebration
         }
         
-        # Audio analysis parameters
-        self.sample_rate = 22050
-        self.hop_length = 512
+        # Audio analysis parameters (low rate: only coarse energy/brightness/tempo are needed)
+        self.sample_rate = Config.EMOTION_AUDIO_SAMPLE_RATE
+        self.max_audio_seconds = Config.EMOTION_AUDIO_MAX_SECONDS
+        self.n_fft = 1024
+        self.hop_length = 256
+        
+        # Feature scales were calibrated at 22050 Hz
+        self.reference_sample_rate = 22050
         
         print("INFO:emotion_analyzer:✅ Emotion analyzer initialized")
     
+    def create_frame_consumer(self, video_path: str) -> 'EmotionFramePass':
+        """Create a per-clip frame consumer for use with a shared FrameSource"""
+        return EmotionFramePass(self, video_path)
+    
     async def analyze_clip(self, video_path: str, sample_rate: float = 2.0) -> EmotionAnalysisResult:
         """
         Analyze emotional content in a video clip
@@ -67,9 +114,57 @@ class EmotionAnalyzer:
         """
         start_time = time.time()
         
-        # Extract video and audio
-        video_emotions = await self._analyze_video_emotions(video_path, sample_rate)
-        audio_emotions = await self._analyze_audio_emotions(video_path)
+        # Audio features are computed in a worker thread while frames are decoded
+        audio_task = self.start_audio_analysis(video_path)
+        
+        # Extract video emotions from a single decode pass
+        source = FrameSource(video_path)
+        emotion_pass = self.create_frame_consumer(video_path)
+        try:
+            source.run([emotion_pass])
+        except VideoOpenError:
+            # Unreadable video: fall back to audio-only analysis. A reader failing mid-clip
+            # propagates instead: a partial frame set must not be analyzed (and cached) as complete
+            pass
+        
+        return await self.finish_analysis(emotion_pass, source.duration, start_time, audio_task)
+    
+    def start_audio_analysis(self, video_path: str) -> 'asyncio.Future[Dict[str, float]]':
+        """Start audio emotion analysis in a thread so it overlaps with the frame pass"""
+        return asyncio.get_running_loop().run_in_executor(None, self._analyze_audio_emotions_sync, video_path)
+    
+    async def finish_analysis(self,
+                              emotion_pass: 'EmotionFramePass',
+                              duration: float,
+                              start_time: float,
+                              audio_task: Optional['asyncio.Future[Dict[str, float]]'] = None) -> EmotionAnalysisResult:
+        """
+        Complete emotion analysis after the frame pass: add audio and combine
+        
+        Args:
+            emotion_pass: Frame consumer that has seen the clip's sampled frames
+            duration: Clip duration reported by the frame source
+            start_time: time.time() when analysis of the clip started
+            audio_task: Audio analysis started with start_audio_analysis(), if any
+            
+        Returns:
+            EmotionAnalysisResult with emotional analysis
+        """
+        if audio_task is not None:
+            audio_emotions = await audio_task
+        else:
+            audio_emotions = await self._analyze_audio_emotions(emotion_pass.video_path)
+        
+        return self.build_result(emotion_pass, audio_emotions, duration, start_time)
+    
+    def build_result(self,
+                     emotion_pass: 'EmotionFramePass',
+                     audio_emotions: Dict[str, float],
+                     duration: float,
+                     start_time: float) -> EmotionAnalysisResult:
+        """Combine frame and audio emotions into the final result (synchronous)"""
+        video_path = emotion_pass.video_path
+        video_emotions = dict(emotion_pass.emotions_over_time)
         
         # Combine video and audio analysis
         combined_emotions = self._combine_emotions(video_emotions, audio_emotions)
@@ -83,13 +178,6 @@ class EmotionAnalyzer:
         # Find emotional moments
         emotional_moments = self._find_emotional_moments(video_emotions, audio_emotions)
         
-        # Get video duration
-        cap = cv2.VideoCapture(video_path)
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        duration = frame_count / fps if fps > 0 else 0.0
-        cap.release()
-        
         end_time = time.time()
         analysis_duration = end_time - start_time
         
@@ -105,47 +193,12 @@ class EmotionAnalyzer:
             analysis_duration=analysis_duration
         )
     
-    async def _analyze_video_emotions(self, video_path: str, sample_rate: float) -> Dict[str, List[Tuple[float, float]]]:
-        """Analyze emotions from video frames"""
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            return {}
-        
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        # Optimized sampling: analyze every 1-2 seconds for better performance
-        target_interval_seconds = 1.5  # Analyze every 1.5 seconds (3x faster)
-        frame_interval = int(target_interval_seconds * fps) if fps > 0 else 1
-        if frame_interval == 0:
-            frame_interval = 1
-        
-        emotions_over_time = defaultdict(list)
-        frame_idx = 0
-        
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            if frame_idx % frame_interval == 0:
-                current_time = frame_idx / fps
-                
-                # Analyze emotions in this frame
-                frame_emotions = self._analyze_frame_emotions(frame)
-                
-                for emotion, confidence in frame_emotions.items():
-                    emotions_over_time[emotion].append((current_time, confidence))
-            
-            frame_idx += 1
-        
-        cap.release()
-        return dict(emotions_over_time)
-    
-    def _analyze_frame_emotions(self, frame: np.ndarray) -> Dict[str, float]:
+    def _analyze_frame_emotions(self, features: FrameFeatures) -> Dict[str, float]:
         """Analyze emotions in a single frame"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        gray = features.gray
         
-        # Detect faces
-        faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
+        # Detect faces (shared with the object detector when run in the same pass)
+        faces = features.faces(1.1, 4)
         
         if len(faces) == 0:
             return {emotion: 0.0 for emotion in self.emotion_categories.keys()}
@@ -277,32 +330,43 @@ class EmotionAnalyzer:
     
     async def _analyze_audio_emotions(self, video_path: str) -> Dict[str, float]:
         """Analyze emotions from audio track"""
+        return await self.start_audio_analysis(video_path)
+    
+    def _analyze_audio_emotions_sync(self, video_path: str) -> Dict[str, float]:
+        """Audio emotion features from one truncated low-rate decode and one shared STFT"""
         try:
-            # Extract audio from video
-            audio, sr = librosa.load(video_path, sr=self.sample_rate)
+            # Decode only the first max_audio_seconds, mono at the analysis rate
+            sr = self.sample_rate
+            audio = load_audio(video_path, sr, duration=self.max_audio_seconds or None)
             
             # Check if audio is silent (no audio track or very quiet)
-            if len(audio) == 0 or np.max(np.abs(audio)) < 0.001:
+            if len(audio) < self.n_fft or np.max(np.abs(audio)) < 0.001:
                 print("INFO:emotion_analyzer:No audio track detected, using visual-only analysis")
                 return {emotion: 0.0 for emotion in self.emotion_categories.keys()}
             
             # Analyze audio features
             audio_emotions = {}
             
+            # One magnitude spectrogram feeds energy, brightness and onset features
+            S = np.abs(librosa.stft(audio, n_fft=self.n_fft, hop_length=self.hop_length))
+            
             # Energy analysis
-            energy = np.mean(librosa.feature.rms(y=audio)[0])
+            energy = np.mean(librosa.feature.rms(S=S, frame_length=self.n_fft, hop_length=self.hop_length)[0])
             audio_emotions['excitement'] = min(energy * 2, 1.0)
             
-            # Spectral centroid (brightness)
-            spectral_centroid = np.mean(librosa.feature.spectral_centroid(y=audio, sr=sr)[0])
+            # Spectral centroid (brightness); already in Hz, so the normaliser does not depend on the sample rate
+            spectral_centroid = np.mean(librosa.feature.spectral_centroid(S=S, sr=sr, n_fft=self.n_fft, hop_length=self.hop_length)[0])
             audio_emotions['joy'] = min(spectral_centroid / 3000, 1.0)  # Normalize
             
-            # Zero crossing rate (speech vs music)
-            zcr = np.mean(librosa.feature.zero_crossing_rate(audio)[0])
+            # Zero crossing rate (speech vs music): a per-sample rate, so rescale it to the reference rate
+            zcr = np.mean(librosa.feature.zero_crossing_rate(audio, frame_length=self.n_fft, hop_length=self.hop_length)[0])
+            zcr *= sr / self.reference_sample_rate
             audio_emotions['celebration'] = min(zcr * 10, 1.0)  # Higher ZCR = more celebration
             
-            # Tempo analysis
-            tempo, _ = librosa.beat.beat_track(y=audio, sr=sr)
+            # Tempo analysis from the onset envelope (no full beat tracking needed)
+            mel = librosa.feature.melspectrogram(S=S ** 2, sr=sr, n_fft=self.n_fft, hop_length=self.hop_length)
+            onset_envelope = librosa.onset.onset_strength(S=librosa.power_to_db(mel), sr=sr, hop_length=self.hop_length)
+            tempo = float(librosa.feature.tempo(onset_envelope=onset_envelope, sr=sr, hop_length=self.hop_length)[0])
             audio_emotions['excitement'] = min(tempo / 200, 1.0)  # Higher tempo = more excitement
             
             return audio_emotions
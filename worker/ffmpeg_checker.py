@@ -1,12 +1,22 @@
 """
 FFmpeg and ffprobe availability checker
 Cross-platform verification of FFmpeg installation
+
+The result of the (subprocess-spawning) functionality check is cached on
+disk per binary path and modification time, so worker startup only has
+to stat the binaries once they have been verified.
 """
 
+import json
+import os
 import subprocess
 import shutil
 import platform
-from typing import Tuple, Optional
+from typing import Dict, Tuple, Optional
+try:
+    from .config import Config
+except ImportError:
+    from config import Config
 
 class FFmpegChecker:
     """Handles FFmpeg and ffprobe availability checks"""
@@ -142,6 +152,48 @@ class FFmpegChecker:
         except Exception as e:
             return False, f"FFmpeg/ffprobe test error: {str(e)}"
     
+    @staticmethod
+    def _binary_key(path: str) -> Dict[str, float]:
+        resolved = os.path.realpath(shutil.which(path) or path)
+        stat = os.stat(resolved)
+        return {"path": resolved, "mtime": stat.st_mtime, "size": stat.st_size}
+    
+    @classmethod
+    def verify_ffmpeg_functionality_cached(cls, ffmpeg_path: str, ffprobe_path: str,
+                                           cache_path: Optional[str] = None) -> Tuple[bool, str, bool]:
+        """
+        verify_ffmpeg_functionality(), reusing a previous successful result
+        while both binaries are unchanged
+        
+        Returns:
+            Tuple of (is_working, version_info, from_cache)
+        """
+        cache_path = cache_path or os.path.join(Config.CACHE_DIR, "ffmpeg_check.json")
+        try:
+            key = {"ffmpeg": cls._binary_key(ffmpeg_path), "ffprobe": cls._binary_key(ffprobe_path)}
+        except OSError:
+            is_working, version_info = cls.verify_ffmpeg_functionality(ffmpeg_path, ffprobe_path)
+            return is_working, version_info, False
+        
+        try:
+            with open(cache_path) as f:
+                cached = json.load(f)
+            if cached.get("key") == key:
+                return True, cached["version"], True
+        except (OSError, ValueError, KeyError):
+            pass
+        
+        is_working, version_info = cls.verify_ffmpeg_functionality(ffmpeg_path, ffprobe_path)
+        if is_working:
+            # Failures are not cached: they may be transient (e.g. a timeout)
+            try:
+                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+                with open(cache_path, "w") as f:
+                    json.dump({"key": key, "version": version_info}, f)
+            except OSError as e:
+                print(f"WARNING:ffmpeg_checker:Could not cache FFmpeg check: {e}")
+        return is_working, version_info, False
+    
     @classmethod
     def get_installation_instructions(cls) -> str:
         """Get platform-specific installation instructions"""
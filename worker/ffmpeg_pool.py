@@ -0,0 +1,98 @@
+"""
+Bounded FFmpeg Subprocess Pool for ClipSense
+
+All FFmpeg/ffprobe invocations go through one shared pool so concurrent
+encodes (for example proxy creation for a 40-clip job) keep every core busy
+without oversubscribing the machine. The pool size defaults to the core
+count divided by the threads each FFmpeg process is allowed to use.
+
+Cancelling a task that is waiting on run() terminates the FFmpeg process,
+so abandoned renders and previews give their cores back immediately.
+"""
+
+import asyncio
+import subprocess
+import weakref
+from typing import List, Optional
+try:
+    from .config import Config
+except ImportError:
+    from config import Config
+
+
+# Seconds a cancelled FFmpeg gets to exit after SIGTERM before it is killed
+TERMINATE_GRACE_SECONDS = 0.5
+
+
+class FFmpegPool:
+    """Runs FFmpeg commands asynchronously with a global concurrency limit"""
+
+    def __init__(self, max_concurrency: Optional[int] = None):
+        self.max_concurrency = max(1, max_concurrency or Config.get_ffmpeg_concurrency())
+        # asyncio primitives are bound to one event loop, so keep a semaphore per loop
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def run(self, cmd: List[str], capture_output: bool = False) -> subprocess.CompletedProcess:
+        """
+        Run a command once a pool slot is free
+
+        Raises:
+            subprocess.CalledProcessError: If the command exits non-zero
+        """
+        async with self._semaphore():
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE if capture_output else None,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                stdout, stderr = await process.communicate()
+            except asyncio.CancelledError:
+                # Shielded so a second cancel cannot leave the process running
+                await asyncio.shield(self._terminate(process))
+                raise
+
+        if process.returncode != 0:
+            # Always capture stderr for better error reporting
+            stderr_text = stderr.decode('utf-8') if stderr else ""
+            stdout_text = stdout.decode('utf-8') if stdout else ""
+            raise subprocess.CalledProcessError(
+                process.returncode, cmd, stdout_text, stderr_text
+            )
+
+        return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+    @staticmethod
+    async def _terminate(process: asyncio.subprocess.Process) -> None:
+        """Stop a cancelled FFmpeg: SIGTERM lets it exit cleanly, SIGKILL if it does not"""
+        if process.returncode is not None:
+            return
+        try:
+            process.terminate()
+            try:
+                await asyncio.wait_for(process.wait(), TERMINATE_GRACE_SECONDS)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+        except ProcessLookupError:
+            pass
+
+
+_pool: Optional[FFmpegPool] = None
+
+
+def get_ffmpeg_pool() -> FFmpegPool:
+    """Shared process-wide FFmpeg pool"""
+    global _pool
+    if _pool is None:
+        _pool = FFmpegPool()
+        print(f"INFO:ffmpeg_pool:⚙️ FFmpeg pool: {_pool.max_concurrency} concurrent processes, {Config.FFMPEG_THREADS} threads each")
+    return _pool
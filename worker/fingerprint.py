@@ -0,0 +1,67 @@
+"""
+File fingerprinting for ClipSense caches
+
+Identifies a media file by its content rather than its path: size, mtime and
+a hash of the first and last chunk of the file. Reading only the head and
+tail keeps fingerprinting cheap for multi-gigabyte camera originals while
+still catching re-exports and replaced files.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+# Bytes hashed from each end of the file
+FINGERPRINT_CHUNK_SIZE = 1024 * 1024
+
+# Number of paths whose fingerprints are kept in memory
+FINGERPRINT_MEMO_SIZE = 4096
+
+# path -> ((size, mtime_ns), fingerprint), least recently used first; avoids re-hashing unchanged files
+_memo: "OrderedDict[str, Tuple[Tuple[int, int], str]]" = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def file_fingerprint(path: str, chunk_size: int = FINGERPRINT_CHUNK_SIZE) -> str:
+    """
+    Compute a content fingerprint for a file
+
+    Args:
+        path: Path to the file
+        chunk_size: Bytes to hash from the head and the tail of the file
+
+    Returns:
+        Hex digest combining size, mtime and a partial head/tail hash
+    """
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+
+    with open(path, "rb") as f:
+        digest.update(f.read(chunk_size))
+        if stat.st_size > chunk_size:
+            f.seek(max(chunk_size, stat.st_size - chunk_size))
+            digest.update(f.read(chunk_size))
+
+    return digest.hexdigest()
+
+
+def cached_fingerprint(path: str) -> str:
+    """file_fingerprint(), memoized per path while the file's size and mtime are unchanged"""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    with _memo_lock:
+        cached = _memo.get(path)
+        if cached and cached[0] == signature:
+            _memo.move_to_end(path)
+            return cached[1]
+    fingerprint = file_fingerprint(path)
+    with _memo_lock:
+        _memo[path] = (signature, fingerprint)
+        _memo.move_to_end(path)
+        while len(_memo) > FINGERPRINT_MEMO_SIZE:
+            _memo.popitem(last=False)
+    return fingerprint
@@ -0,0 +1,79 @@
+"""
+Per-frame Feature Context for ClipSense
+
+Wraps a sampled frame and lazily computes the derived data the analyzers
+share: grayscale, HSV and Haar face detections. Each feature is computed at
+most once per frame no matter how many detectors (or analyzers) read it, and
+face detections are memoized per detection parameter set.
+
+Frames may be downscaled for analysis; scale is the analysis size over the
+source size, and detectors convert their pixel thresholds (calibrated on
+source-resolution frames) with pixels() and area().
+"""
+
+import threading
+import cv2
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+FACE_CASCADE_PATH = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+
+# CascadeClassifier is not safe to share between threads, so keep one per thread
+_cascades = threading.local()
+
+
+def get_face_cascade() -> cv2.CascadeClassifier:
+    """Frontal face Haar cascade, loaded once per thread"""
+    cascade = getattr(_cascades, "face", None)
+    if cascade is None:
+        cascade = cv2.CascadeClassifier(FACE_CASCADE_PATH)
+        _cascades.face = cascade
+    return cascade
+
+
+class FrameFeatures:
+    """Lazily computed, shared features of one sampled frame"""
+
+    def __init__(self, frame: np.ndarray, scale: float = 1.0):
+        # BGR frame, or a single-channel frame when no consumer needs color
+        self.frame = frame
+        self.scale = scale
+        self._gray: Optional[np.ndarray] = None
+        self._hsv: Optional[np.ndarray] = None
+        self._faces: Dict[Tuple[float, int, Optional[Tuple[int, int]]], np.ndarray] = {}
+
+    def pixels(self, length: float) -> int:
+        """A source-resolution length in pixels, at this frame's resolution"""
+        return max(1, int(round(length * self.scale)))
+
+    def area(self, area: float) -> float:
+        """A source-resolution area in pixels, at this frame's resolution"""
+        return area * self.scale * self.scale
+
+    @property
+    def gray(self) -> np.ndarray:
+        """Grayscale frame"""
+        if self._gray is None:
+            if self.frame.ndim == 2:
+                self._gray = self.frame
+            else:
+                self._gray = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    @property
+    def hsv(self) -> np.ndarray:
+        """HSV frame (requires a BGR frame)"""
+        if self._hsv is None:
+            self._hsv = cv2.cvtColor(self.frame, cv2.COLOR_BGR2HSV)
+        return self._hsv
+
+    def faces(self, scale_factor: float = 1.1, min_neighbors: int = 4,
+              min_size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """Face boxes (x, y, w, h), detected once per parameter set"""
+        key = (scale_factor, min_neighbors, min_size)
+        if key not in self._faces:
+            kwargs = {"minSize": min_size} if min_size else {}
+            self._faces[key] = get_face_cascade().detectMultiScale(
+                self.gray, scaleFactor=scale_factor, minNeighbors=min_neighbors, **kwargs
+            )
+        return self._faces[key]
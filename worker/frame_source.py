@@ -0,0 +1,327 @@
+"""
+Shared Frame Source for ClipSense
+
+Decodes a video clip once and fans the sampled frames out to every
+registered analyzer (object detection, emotion analysis, visual scoring).
+Each analyzer provides a FrameConsumer that accumulates its own state per
+clip, so the file is opened and decoded a single time regardless of how
+many analyzers look at it.
+
+Sampling modes (all produce the same frame indices and timestamps):
+- decode: read() every frame and drop the ones that are not sampled
+- grab:   grab() skipped frames without retrieving/converting them
+- seek:   jump straight to each sampled frame, grabbing across short gaps
+
+Frame readers:
+- opencv: cv2.VideoCapture with the sampling mode above (full resolution BGR)
+- ffmpeg: ffmpeg selects and downscales the sampled frames itself and writes
+          raw frames to a pipe, read into a reusable NumPy buffer. Frames are
+          gray when no consumer needs color. Consumers must copy() any frame
+          they keep beyond on_frame, since the buffer is overwritten, and
+          convert pixel thresholds with FrameFeatures.pixels()/area().
+          If ffmpeg fails before producing a frame, the OpenCV reader is
+          used instead.
+
+An optional CancellationToken is checked between frames, so a cancelled
+job stops decoding (and kills its ffmpeg reader) within one frame.
+"""
+
+import os
+import subprocess
+import tempfile
+import cv2
+import numpy as np
+from typing import List, Optional, Tuple
+try:
+    from .cancellation import CancellationToken
+    from .config import Config
+    from .frame_features import FrameFeatures
+except ImportError:
+    from cancellation import CancellationToken
+    from config import Config
+    from frame_features import FrameFeatures
+
+# Ordered from most to least conservative; a shared pass uses the most
+# conservative mode requested by any of its consumers
+SAMPLING_MODES = ("decode", "grab", "seek")
+
+FRAME_READERS = ("opencv", "ffmpeg")
+
+
+class FrameReaderError(Exception):
+    """The ffmpeg frame reader failed before producing any frames"""
+
+
+class VideoOpenError(ValueError):
+    """The clip could not be opened at all (no frames were read)"""
+
+
+class FrameConsumer:
+    """Receives sampled frames from a FrameSource during a single clip pass"""
+
+    # Seconds between analyzed frames (converted to a frame interval per clip)
+    interval_seconds: float = 1.5
+
+    # Preferred sampling mode (None = Config.FRAME_SAMPLING_MODE)
+    sampling_mode: Optional[str] = None
+
+    # Whether on_frame needs BGR frames (gray frames are enough otherwise)
+    needs_color: bool = True
+
+    def on_frame(self, features: FrameFeatures, timestamp: float) -> None:
+        """Handle one sampled frame (features are shared with the other consumers)"""
+        raise NotImplementedError
+
+
+class FrameSource:
+    """Opens a video clip once and dispatches sampled frames to consumers"""
+
+    def __init__(self, video_path: str, sampling_mode: Optional[str] = None,
+                 cancel_token: Optional[CancellationToken] = None):
+        self.video_path = video_path
+        self.sampling_mode = sampling_mode
+        self.cancel_token = cancel_token
+        self.fps = 0.0
+        self.frame_count = 0
+        self.duration = 0.0
+        self.width = 0
+        self.height = 0
+        # Dispatched frame width over source width (below 1 when frames are downscaled)
+        self.frame_scale = 1.0
+
+    @staticmethod
+    def frame_interval(fps: float, interval_seconds: float) -> int:
+        """Convert a sampling interval in seconds to a frame step (at least 1)"""
+        frame_interval = int(interval_seconds * fps) if fps > 0 else 1
+        return max(1, frame_interval)
+
+    @staticmethod
+    def normalize_sampling_mode(mode: Optional[str]) -> str:
+        """Return a valid sampling mode, falling back to the configured default"""
+        mode = (mode or Config.FRAME_SAMPLING_MODE).lower()
+        if mode not in SAMPLING_MODES:
+            print(f"WARNING:frame_source:Unknown sampling mode '{mode}', using 'decode'")
+            return "decode"
+        return mode
+
+    def _resolve_sampling_mode(self, consumers: List[FrameConsumer]) -> str:
+        """Pick the explicit source mode, or the most conservative consumer preference"""
+        if self.sampling_mode:
+            return self.normalize_sampling_mode(self.sampling_mode)
+        modes = [self.normalize_sampling_mode(consumer.sampling_mode) for consumer in consumers]
+        return min(modes, key=SAMPLING_MODES.index)
+
+    def run(self, consumers: List[FrameConsumer]) -> float:
+        """
+        Decode the clip once, feeding each consumer at its own sampling interval
+
+        Args:
+            consumers: Analyzer frame consumers to feed
+
+        Returns:
+            Clip duration in seconds (0.0 if the clip has no frames)
+
+        Raises:
+            VideoOpenError: If the clip cannot be opened
+            ValueError: If the ffmpeg reader fails mid-clip
+            OperationCancelled: If the cancel token is cancelled mid-pass
+        """
+        cap = cv2.VideoCapture(self.video_path)
+        if not cap.isOpened():
+            raise VideoOpenError(f"Could not open video file: {self.video_path}")
+
+        try:
+            self.fps = cap.get(cv2.CAP_PROP_FPS)
+            self.frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            self.duration = self.frame_count / self.fps if self.fps > 0 else 0.0
+            self.width, self.height = self._display_size(cap)
+
+            if self.duration == 0 or not consumers:
+                return self.duration
+
+            schedule: List[Tuple[FrameConsumer, int]] = [
+                (consumer, self.frame_interval(self.fps, consumer.interval_seconds))
+                for consumer in consumers
+            ]
+
+            if Config.FRAME_READER.lower() == "ffmpeg":
+                try:
+                    self._run_ffmpeg_pipe(schedule)
+                    return self.duration
+                except FileNotFoundError:
+                    print("WARNING:frame_source:ffmpeg not found, falling back to OpenCV frame reader")
+                except FrameReaderError as e:
+                    print(f"WARNING:frame_source:{e}, falling back to OpenCV frame reader")
+                self.frame_scale = 1.0
+            elif Config.FRAME_READER.lower() not in FRAME_READERS:
+                print(f"WARNING:frame_source:Unknown frame reader '{Config.FRAME_READER}', using 'opencv'")
+
+            mode = self._resolve_sampling_mode(consumers)
+            print(f"INFO:frame_source:🎞️ Decoding {os.path.basename(self.video_path)} once for {len(consumers)} analyzers ({mode} sampling)")
+            print(f"INFO:frame_source:📊 Video properties: {self.frame_count} frames, {self.fps:.2f} FPS, {self.duration:.2f}s")
+
+            if mode == "seek":
+                self._run_seek(cap, schedule)
+            else:
+                self._run_sequential(cap, schedule, retrieve_all=(mode == "decode"))
+        finally:
+            cap.release()
+
+        return self.duration
+
+    @staticmethod
+    def _display_size(cap: cv2.VideoCapture) -> Tuple[int, int]:
+        """Frame size after rotation metadata is applied (as both readers output it)"""
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        rotation = int(cap.get(cv2.CAP_PROP_ORIENTATION_META)) if hasattr(cv2, "CAP_PROP_ORIENTATION_META") else 0
+        if rotation % 180 == 90:
+            width, height = height, width
+        return width, height
+
+    def _sampled_indices(self, schedule: List[Tuple[FrameConsumer, int]]) -> List[int]:
+        """Every frame index that at least one consumer samples, in order"""
+        return sorted({
+            frame_idx
+            for _, interval in schedule
+            for frame_idx in range(0, self.frame_count, interval)
+        })
+
+    def _check_cancelled(self) -> None:
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled()
+
+    def _dispatch(self, schedule: List[Tuple[FrameConsumer, int]], frame_idx: int, frame: np.ndarray) -> None:
+        """Hand a decoded frame to every consumer that samples this index"""
+        self._check_cancelled()
+        timestamp = frame_idx / self.fps
+        # One feature context per frame so gray/HSV/faces are computed once for all consumers
+        features = FrameFeatures(frame, self.frame_scale)
+        for consumer, interval in schedule:
+            if frame_idx % interval == 0:
+                consumer.on_frame(features, timestamp)
+
+    def _run_sequential(self, cap: cv2.VideoCapture, schedule: List[Tuple[FrameConsumer, int]], retrieve_all: bool) -> None:
+        """Walk every frame; only sampled frames are retrieved unless retrieve_all is set"""
+        frame_idx = 0
+        while True:
+            # Also checked on skipped frames: long sampling gaps are still decoded here
+            self._check_cancelled()
+            due = any(frame_idx % interval == 0 for _, interval in schedule)
+
+            if due or retrieve_all:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if due:
+                    self._dispatch(schedule, frame_idx, frame)
+            elif not cap.grab():
+                # Skipped frames are demuxed and decoded but never converted to BGR
+                break
+
+            frame_idx += 1
+
+    def _run_seek(self, cap: cv2.VideoCapture, schedule: List[Tuple[FrameConsumer, int]]) -> None:
+        """Seek directly to each sampled frame, grabbing forward across short gaps"""
+        needed = self._sampled_indices(schedule)
+        # Below this gap a sequential grab() is cheaper than a keyframe seek
+        min_seek_gap = max(1, int(self.fps * Config.FRAME_SEEK_MIN_GAP_SECONDS))
+
+        position = 0
+        for frame_idx in needed:
+            gap = frame_idx - position
+            if gap >= min_seek_gap:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+            else:
+                grabbed = True
+                for _ in range(gap):
+                    if not cap.grab():
+                        grabbed = False
+                        break
+                if not grabbed:
+                    break
+
+            ret, frame = cap.read()
+            if not ret:
+                break
+            self._dispatch(schedule, frame_idx, frame)
+            position = frame_idx + 1
+
+    def _scaled_size(self) -> Tuple[int, int]:
+        """Analysis frame size: downscaled to Config.ANALYSIS_FRAME_WIDTH, even dimensions"""
+        target_width = Config.ANALYSIS_FRAME_WIDTH
+        if target_width <= 0 or self.width <= target_width:
+            width, height = self.width, self.height
+        else:
+            width = target_width
+            height = int(round(self.height * target_width / self.width))
+        return max(2, width - width % 2), max(2, height - height % 2)
+
+    def _run_ffmpeg_pipe(self, schedule: List[Tuple[FrameConsumer, int]]) -> None:
+        """Let ffmpeg select and downscale the sampled frames, reading raw frames from a pipe"""
+        needed = self._sampled_indices(schedule)
+        width, height = self._scaled_size()
+        color = any(consumer.needs_color for consumer, _ in schedule)
+        pix_fmt, shape = ("bgr24", (height, width, 3)) if color else ("gray", (height, width))
+
+        # Select by decoded frame number so indices/timestamps match the OpenCV reader
+        intervals = sorted({interval for _, interval in schedule})
+        select_expr = "+".join(f"not(mod(n,{interval}))" for interval in intervals)
+
+        print(f"INFO:frame_source:🎞️ Decoding {os.path.basename(self.video_path)} once for {len(schedule)} analyzers (ffmpeg pipe, {width}x{height} {pix_fmt})")
+        print(f"INFO:frame_source:📊 Video properties: {self.frame_count} frames, {self.fps:.2f} FPS, {self.duration:.2f}s, {self.width}x{self.height}")
+
+        cmd = [
+            "ffmpeg", "-nostdin", "-loglevel", "error",
+            "-i", self.video_path,
+            "-an", "-sn",
+            "-vf", f"select='{select_expr}',scale={width}:{height}:flags=area",
+            "-fps_mode", "passthrough",
+            "-f", "rawvideo", "-pix_fmt", pix_fmt,
+            "pipe:1"
+        ]
+        # stderr goes to a file rather than a pipe, so a chatty ffmpeg can never block on it
+        stderr_file = tempfile.TemporaryFile()
+        try:
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file, bufsize=0)
+        except FileNotFoundError:
+            stderr_file.close()
+            raise
+        self.frame_scale = width / self.width if self.width else 1.0
+
+        # One buffer reused for every frame; no per-frame allocation
+        frame = np.empty(shape, dtype=np.uint8)
+        view = memoryview(frame).cast("B")
+        frame_size = frame.nbytes
+
+        dispatched = 0
+        exhausted = False
+        try:
+            for frame_idx in needed:
+                filled = 0
+                while filled < frame_size:
+                    read = process.stdout.readinto(view[filled:])
+                    if not read:
+                        break
+                    filled += read
+                if filled < frame_size:
+                    exhausted = True
+                    break
+                self._dispatch(schedule, frame_idx, frame)
+                dispatched += 1
+        finally:
+            process.stdout.close()
+            if process.poll() is None:
+                process.kill()
+            returncode = process.wait()
+            stderr_file.seek(0)
+            error = "; ".join(line for line in stderr_file.read().decode(errors="replace").splitlines() if line)
+            stderr_file.close()
+
+        # Running out of frames is normal (frame counts are estimates) unless ffmpeg failed
+        if exhausted and returncode != 0:
+            message = f"ffmpeg frame reader failed (exit code {returncode}) for {self.video_path}: {error or 'no error output'}"
+            if dispatched == 0:
+                raise FrameReaderError(message)
+            # Consumers already hold part of the clip, so it cannot be replayed with OpenCV
+            raise ValueError(message)
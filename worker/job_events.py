@@ -0,0 +1,139 @@
+"""
+Job Event Streaming for ClipSense
+
+Pushes background job progress to WebSocket clients instead of having the
+UI poll the status endpoints. Clients subscribe to the jobs they display;
+BackgroundProcessor publishes small incremental events (progress, each
+clip result as it finishes, the final selection) to just those clients.
+
+Every client has its own bounded outbox drained by its own sender task,
+so a slow client never delays the job or the other clients:
+- progress and final selection events are coalesced per job (only the
+  latest of each is pending)
+- when the outbox is full the oldest event is dropped; a job with any
+  dropped event gets one job_resync event, sent ahead of the outbox,
+  telling the client to refetch the job status
+"""
+
+import asyncio
+import itertools
+import json
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Union
+try:
+    from .config import Config
+except ImportError:
+    from config import Config
+
+
+class JobEventClient:
+    """One connected client: its subscriptions and bounded, coalescing outbox"""
+
+    def __init__(self, send: Callable[[str], Awaitable[None]], max_pending: Optional[int] = None):
+        self._send = send
+        self.max_pending = max(2, max_pending or Config.WS_CLIENT_QUEUE_SIZE)
+        self.jobs: Set[str] = set()
+        self.dropped = 0
+        # key -> event (or pre-serialized text); coalesced events reuse their key, the rest get a unique one
+        self._pending: "OrderedDict[Hashable, Union[str, Dict[str, Any]]]" = OrderedDict()
+        self._serial = itertools.count()
+        # Jobs with dropped events, sent as job_resync ahead of the outbox; never dropped, at most one per job
+        self._resync_jobs: Dict[str, None] = {}
+        self._wakeup = asyncio.Event()
+
+    def put(self, event: Union[str, Dict[str, Any]], coalesce_key: Optional[Hashable] = None) -> None:
+        """Queue an event without blocking; coalesce_key replaces a pending event with the same key"""
+        key = coalesce_key if coalesce_key is not None else next(self._serial)
+        if key in self._pending:
+            self._pending[key] = event
+            self._pending.move_to_end(key)
+        else:
+            while len(self._pending) >= self.max_pending:
+                self._drop_oldest()
+            self._pending[key] = event
+        self._wakeup.set()
+
+    def _drop_oldest(self) -> None:
+        _, event = self._pending.popitem(last=False)
+        self.dropped += 1
+        if isinstance(event, dict) and event.get("job_id") is not None:
+            # The client missed an update of this job; tell it to resync instead of silently diverging
+            self._resync_jobs[event["job_id"]] = None
+
+    async def run(self) -> None:
+        """Send queued events until cancelled or the connection fails"""
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                while self._resync_jobs or self._pending:
+                    if self._resync_jobs:
+                        job_id = next(iter(self._resync_jobs))
+                        del self._resync_jobs[job_id]
+                        event = {"type": "job_resync", "job_id": job_id}
+                    else:
+                        _, event = self._pending.popitem(last=False)
+                    await self._send(event if isinstance(event, str) else json.dumps(event))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Connection closed; the endpoint's receive loop removes the client
+            self._pending.clear()
+            self._resync_jobs.clear()
+
+
+class JobEventHub:
+    """Routes job events to the clients subscribed to each job"""
+
+    def __init__(self):
+        self.clients: Set[JobEventClient] = set()
+        self._subscribers: Dict[str, Set[JobEventClient]] = {}
+
+    def add_client(self, client: JobEventClient) -> None:
+        self.clients.add(client)
+
+    def remove_client(self, client: JobEventClient) -> None:
+        for job_id in list(client.jobs):
+            self.unsubscribe(client, job_id)
+        self.clients.discard(client)
+
+    def subscribe(self, client: JobEventClient, job_id: str) -> None:
+        client.jobs.add(job_id)
+        self._subscribers.setdefault(job_id, set()).add(client)
+
+    def unsubscribe(self, client: JobEventClient, job_id: str) -> None:
+        client.jobs.discard(job_id)
+        subscribers = self._subscribers.get(job_id)
+        if subscribers is not None:
+            subscribers.discard(client)
+            if not subscribers:
+                del self._subscribers[job_id]
+
+    def has_subscribers(self, job_id: str) -> bool:
+        return job_id in self._subscribers
+
+    def publish(self, job_id: str, event: Dict[str, Any], coalesce: bool = False) -> None:
+        """Queue an event for every subscriber of the job (coalesce: keep only the latest of this type)"""
+        subscribers = self._subscribers.get(job_id)
+        if not subscribers:
+            return
+        event = {**event, "job_id": job_id}
+        key = (event["type"], job_id) if coalesce else None
+        for client in subscribers:
+            client.put(event, key)
+
+    def broadcast(self, event: Union[str, Dict[str, Any]]) -> None:
+        """Queue an event for every connected client"""
+        for client in self.clients:
+            client.put(event)
+
+
+_hub: Optional[JobEventHub] = None
+
+
+def get_job_event_hub() -> JobEventHub:
+    """Shared process-wide job event hub"""
+    global _hub
+    if _hub is None:
+        _hub = JobEventHub()
+    return _hub
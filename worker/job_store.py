@@ -0,0 +1,120 @@
+"""
+Persistent Job Store for ClipSense
+
+Records background analysis jobs in SQLite (WAL mode): job settings and
+state, every per-clip analysis result as it completes, and the final
+selection. A worker restart therefore loses nothing - finished jobs keep
+their results, and interrupted jobs resume from the clips they had not
+analyzed yet.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+try:
+    from .config import Config
+except ImportError:
+    from config import Config
+
+# Job columns persisted as-is (lists are stored as JSON)
+JOB_FIELDS = (
+    "job_id", "clips", "music_path", "target_duration", "story_style", "style_preset",
+    "status", "progress", "current_step", "error", "selected",
+    "created_at", "started_at", "completed_at",
+)
+JSON_FIELDS = ("clips", "selected")
+
+
+class JobStore:
+    """SQLite-backed store of jobs and their per-clip results"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or Config.JOB_STORE_PATH
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        # WAL keeps progress writes cheap and readers unblocked; NORMAL sync is durable across process crashes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                clips TEXT NOT NULL,
+                music_path TEXT NOT NULL,
+                target_duration INTEGER NOT NULL,
+                story_style TEXT NOT NULL,
+                style_preset TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress REAL NOT NULL,
+                current_step TEXT NOT NULL,
+                error TEXT,
+                selected TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                completed_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS job_clips (
+                job_id TEXT NOT NULL REFERENCES jobs (job_id) ON DELETE CASCADE,
+                clip_path TEXT NOT NULL,
+                result TEXT NOT NULL,
+                PRIMARY KEY (job_id, clip_path)
+            );
+        """)
+        self._conn.commit()
+
+    def save_job(self, job: Dict[str, Any]) -> None:
+        """Insert or update a job's settings and state"""
+        values = [json.dumps(job.get(field)) if field in JSON_FIELDS else job.get(field) for field in JOB_FIELDS]
+        placeholders = ", ".join("?" for _ in JOB_FIELDS)
+        # Upsert rather than REPLACE: a REPLACE deletes the row, which would cascade to the clip results
+        updates = ", ".join(f"{field} = excluded.{field}" for field in JOB_FIELDS[1:])
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO jobs ({', '.join(JOB_FIELDS)}) VALUES ({placeholders}) "
+                f"ON CONFLICT (job_id) DO UPDATE SET {updates}",
+                values
+            )
+            self._conn.commit()
+
+    def load_jobs(self) -> List[Dict[str, Any]]:
+        """All stored jobs, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(JOB_FIELDS)} FROM jobs ORDER BY created_at").fetchall()
+        jobs = []
+        for row in rows:
+            job = dict(zip(JOB_FIELDS, row))
+            for field in JSON_FIELDS:
+                job[field] = json.loads(job[field]) if job[field] is not None else None
+            jobs.append(job)
+        return jobs
+
+    def save_clip_result(self, job_id: str, clip_path: str, result_json: str) -> None:
+        """Record the analysis result for one clip of a job"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO job_clips (job_id, clip_path, result) VALUES (?, ?, ?)",
+                (job_id, clip_path, result_json)
+            )
+            self._conn.commit()
+
+    def load_clip_results(self, job_id: str) -> Dict[str, str]:
+        """clip_path -> result JSON for every clip of a job analyzed so far"""
+        with self._lock:
+            rows = self._conn.execute("SELECT clip_path, result FROM job_clips WHERE job_id = ?", (job_id,)).fetchall()
+        return dict(rows)
+
+    def delete_jobs(self, job_ids: List[str]) -> None:
+        """Remove jobs and their clip results"""
+        if not job_ids:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM jobs WHERE job_id = ?", [(job_id,) for job_id in job_ids])
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
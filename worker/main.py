@@ -21,57 +21,69 @@ from pydantic import BaseModel
 import json
 try:
     # Try relative imports first (when run as module)
-    from .video_processor import VideoProcessor
     from .conform import ConformProcessor
     from .config import Config
     from .ffmpeg_checker import FFmpegChecker
-    from .simple_beat_detector import SimpleBeatDetector
     from .fcp7_xml_generator import generate_fcp7_xml
-    from .visual_analyzer import VisualAnalyzer
-    from .ai_content_selector import AIContentSelector
-    from .ai_story_narrative import StoryNarrative
-    from .background_processor import background_processor, ProcessingStatus
+    from .ai_story_narrative import ClipDescription, StoryNarrative
+    from .background_processor import get_background_processor, ProcessingStatus, summarize_result
+    from .job_events import JobEventClient, get_job_event_hub
+    from .proxy_store import get_proxy_store
+    from .services import get_services
 except ImportError:
     # Fall back to absolute imports (when run directly)
-    from video_processor import VideoProcessor
     from conform import ConformProcessor
     from config import Config
     from ffmpeg_checker import FFmpegChecker
-    from simple_beat_detector import SimpleBeatDetector
     from fcp7_xml_generator import generate_fcp7_xml
-    from visual_analyzer import VisualAnalyzer
-    from ai_content_selector import AIContentSelector
-    from ai_story_narrative import StoryNarrative
-    from background_processor import background_processor, ProcessingStatus
+    from ai_story_narrative import ClipDescription, StoryNarrative
+    from background_processor import get_background_processor, ProcessingStatus, summarize_result
+    from job_events import JobEventClient, get_job_event_hub
+    from proxy_store import get_proxy_store
+    from services import get_services
 
 # Global state
 ffmpeg_available = False
 ffmpeg_path = None
 ffprobe_path = None
 ffmpeg_version = None
+ffmpeg_checked = False
+ffmpeg_check_cached = False
+# Running FFmpeg check (started by the startup hook)
+ffmpeg_check: Optional[asyncio.Future] = None
 
 # WebSocket connection manager
 class ConnectionManager:
+    """Connected WebSockets; every message goes through the client's own bounded outbox"""
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.active_connections: Dict[WebSocket, JobEventClient] = {}
+        self._senders: Dict[WebSocket, asyncio.Task] = {}
+        self.events = get_job_event_hub()
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket) -> JobEventClient:
         await websocket.accept()
-        self.active_connections.append(websocket)
+        client = JobEventClient(websocket.send_text)
+        self.active_connections[websocket] = client
+        self.events.add_client(client)
+        # A slow client only ever stalls its own sender task
+        self._senders[websocket] = asyncio.create_task(client.run())
+        return client
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        client = self.active_connections.pop(websocket, None)
+        if client is not None:
+            self.events.remove_client(client)
+        sender = self._senders.pop(websocket, None)
+        if sender is not None:
+            sender.cancel()
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
+        client = self.active_connections.get(websocket)
+        if client is not None:
+            client.put(message)
 
     async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except:
-                # Remove disconnected connections
-                self.active_connections.remove(connection)
+        self.events.broadcast(message)
 
 manager = ConnectionManager()
 
@@ -142,27 +154,39 @@ def find_available_port(start_port: int, max_retries: int = 3) -> Optional[int]:
     return None
 
 def initialize_ffmpeg_check():
-    """Initialize FFmpeg availability check"""
-    global ffmpeg_available, ffmpeg_path, ffprobe_path, ffmpeg_version
+    """Initialize FFmpeg availability check (cached on disk while the binaries are unchanged)"""
+    global ffmpeg_available, ffmpeg_path, ffprobe_path, ffmpeg_version, ffmpeg_checked, ffmpeg_check_cached
     
     print("🔍 Checking FFmpeg availability...")
     
     is_available, ffmpeg_path, ffprobe_path = FFmpegChecker.check_ffmpeg_availability()
     
     if is_available:
-        is_working, version_info = FFmpegChecker.verify_ffmpeg_functionality(ffmpeg_path, ffprobe_path)
+        is_working, version_info, ffmpeg_check_cached = FFmpegChecker.verify_ffmpeg_functionality_cached(ffmpeg_path, ffprobe_path)
         if is_working:
             ffmpeg_available = True
             ffmpeg_version = version_info
-            print(f"✅ FFmpeg found: {version_info}")
+            print(f"✅ FFmpeg found: {version_info}{' (cached check)' if ffmpeg_check_cached else ''}")
         else:
             print(f"❌ FFmpeg verification failed: {version_info}")
     else:
         print("❌ FFmpeg or ffprobe not found in PATH")
         print(FFmpegChecker.get_installation_instructions())
-
-# Initialize FFmpeg check
-initialize_ffmpeg_check()
+    ffmpeg_checked = True
+
+async def ffmpeg_ready() -> bool:
+    """Whether FFmpeg is usable, waiting for the startup check if it is still running"""
+    if ffmpeg_check is not None and not ffmpeg_check.done():
+        try:
+            await asyncio.shield(ffmpeg_check)
+        except Exception:
+            pass
+    return ffmpeg_available
+
+def log_background_failure(name: str, future: asyncio.Future) -> None:
+    """Done-callback for fire-and-forget startup work: report failures instead of dropping them"""
+    if not future.cancelled() and future.exception() is not None:
+        print(f"❌ {name} failed: {future.exception()}")
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -187,8 +211,27 @@ app.mount("/thumbnails", StaticFiles(directory=THUMBNAIL_DIR), name="thumbnails"
 EXPORT_DIR = "/Users/anastasiosk/Documents/devprojects/OS/clipsense2/tests/testwedding/Export"
 app.mount("/videos", StaticFiles(directory=EXPORT_DIR), name="videos")
 
-# Initialize video processor
-video_processor = VideoProcessor()
+# Shared analyzers and caches, built once per process
+services = get_services()
+
+@app.on_event("startup")
+async def resume_background_jobs():
+    """Check FFmpeg, resume background jobs interrupted by a restart and start job expiry"""
+    global ffmpeg_check
+    loop = asyncio.get_running_loop()
+    # Checked in the background so /ping answers right away; endpoints that need FFmpeg wait for it
+    ffmpeg_check = loop.run_in_executor(None, initialize_ffmpeg_check)
+    ffmpeg_check.add_done_callback(lambda future: log_background_failure("FFmpeg check", future))
+    if Config.WORKER_WARMUP == "background":
+        # Import and build the analyzers once the server is listening, so /ping answers right away
+        warm_up = loop.run_in_executor(None, services.warm_up)
+        warm_up.add_done_callback(lambda future: log_background_failure("Service warm-up", future))
+    # Built here rather than at import: it opens the job store
+    await get_background_processor().start()
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    await get_background_processor().stop()
 
 class AutoCutRequest(BaseModel):
     """Request model for auto-cut processing"""
@@ -365,7 +408,7 @@ async def auto_cut(request: AutoCutRequest):
     print(f"  - Use AI selection: {getattr(request, 'use_ai_selection', 'Not provided')}")
     
     # Check FFmpeg availability first
-    if not ffmpeg_available:
+    if not await ffmpeg_ready():
         return AutoCutResponse(
             ok=False,
             error="FFmpeg not found. Please install FFmpeg and restart the worker."
@@ -387,7 +430,8 @@ async def auto_cut(request: AutoCutRequest):
             )
         
         # Process the videos with timing
-        result = await video_processor.process_highlight(
+        processor = await services.new_video_processor()
+        result = await processor.process_highlight(
             clips=request.clips,
             music_path=request.music,
             target_duration=request.target_seconds
@@ -429,7 +473,7 @@ async def auto_cut(request: AutoCutRequest):
 @app.post("/conform", response_model=ConformResponse)
 async def conform_timeline(request: ConformRequest):
     """Conform a timeline to master quality output"""
-    if not ffmpeg_available:
+    if not await ffmpeg_ready():
         return ConformResponse(ok=False, error="FFmpeg not available")
     
     start_time = time.time()
@@ -474,7 +518,7 @@ async def analyze_music(request: AnalyzeMusicRequest):
     Returns:
         AnalyzeMusicResponse with tempo, beat times, bar times, and metadata
     """
-    if not ffmpeg_available:
+    if not await ffmpeg_ready():
         return AnalyzeMusicResponse(ok=False, error="FFmpeg not available")
     
     try:
@@ -486,8 +530,8 @@ async def analyze_music(request: AnalyzeMusicRequest):
             )
         
         # Analyze the music
-        detector = SimpleBeatDetector()
-        analysis = await detector.analyze_music(request.music_path, request.target_duration)
+        beat_detector = await services.resolve("beat_detector")
+        analysis = await beat_detector.analyze_music(request.music_path, request.target_duration)
         
         return AnalyzeMusicResponse(
             ok=True,
@@ -567,8 +611,8 @@ async def analyze_visual_endpoint(request: VisualAnalysisRequest):
             )
         
         # Perform visual analysis
-        analyzer = VisualAnalyzer()
-        result = await analyzer.analyze_clip(request.video_path, request.sample_rate)
+        visual_analyzer = await services.resolve("visual_analyzer")
+        result = await visual_analyzer.analyze_clip(request.video_path, request.sample_rate)
         
         return VisualAnalysisResponse(
             ok=True,
@@ -647,7 +691,7 @@ async def ai_autocut_endpoint(request: AISelectionRequest):
         print(f"🤖 AI Autocut request: {len(request.clips)} clips, {request.target_duration}s, {request.story_style}/{request.style_preset}")
         
         # Process with AI selection
-        processor = VideoProcessor()
+        processor = await services.new_video_processor()
         result = await processor.assemble_with_ai_selection(
             clips=request.clips,
             music_path=request.music_path,
@@ -657,6 +701,7 @@ async def ai_autocut_endpoint(request: AISelectionRequest):
             use_ai_selection=request.use_ai_selection
         )
         
+        ai_results = result.pop("ai_results", None)
         print(f"🔍 AI result: {result}")
         print(f"🔍 AI result type: {type(result)}")
         print(f"🔍 AI result ok: {result.get('ok', 'MISSING')}")
@@ -664,29 +709,14 @@ async def ai_autocut_endpoint(request: AISelectionRequest):
         if not result.get("ok", False):
             return AISelectionResponse(ok=False, error=result.get("error", "Unknown error"))
         
-        # Get AI analysis if available
-        print("🤖 Getting AI analysis...")
-        ai_selector = AIContentSelector()
         selected_clips = []
         story_breakdown = {}
         quality_metrics = {}
         
-        if request.use_ai_selection:
+        # Report on the analysis the assembly already did (absent if AI selection fell back)
+        if request.use_ai_selection and ai_results is not None:
             try:
-                print("🎯 Calling AI selector...")
-                print(f"🎯 Request clips: {request.clips}")
-                print(f"🎯 Target count: {len(request.clips)}")
-                print(f"🎯 Story style: {request.story_style}")
-                print(f"🎯 Style preset: {request.style_preset}")
-                
-                # Get AI analysis for selected clips
-                ai_results = await ai_selector.select_best_clips(
-                    request.clips,
-                    target_count=len(request.clips),
-                    story_style=request.story_style,
-                    style_preset=request.style_preset
-                )
-                print(f"✅ AI selector returned {len(ai_results)} results")
+                print(f"✅ Reporting on {len(ai_results)} AI-selected clips")
                 
                 # Debug: Check if descriptions are present
                 for i, ai_result in enumerate(ai_results):
@@ -792,13 +822,23 @@ async def ai_autocut_endpoint(request: AISelectionRequest):
 @app.get("/health")
 async def health_check():
     """Detailed health check including FFmpeg availability"""
+    # Waits for the startup FFmpeg check (/ping is the instant liveness probe)
+    await ffmpeg_ready()
     return {
         "status": "healthy" if ffmpeg_available else "unhealthy",
         "ffmpeg_available": ffmpeg_available,
         "ffmpeg_version": ffmpeg_version,
         "ffmpeg_path": ffmpeg_path,
         "ffprobe_path": ffprobe_path,
-        "installation_instructions": FFmpegChecker.get_installation_instructions() if not ffmpeg_available else None
+        "installation_instructions": FFmpegChecker.get_installation_instructions() if not ffmpeg_available else None,
+        "subsystems": {
+            "ffmpeg": {"ready": ffmpeg_available, "checked": ffmpeg_checked, "cached": ffmpeg_check_cached},
+            **services.status(),
+            "job_store": {
+                "ready": get_background_processor().job_store is not None,
+                "jobs": len(get_background_processor().jobs),
+            },
+        },
     }
 
 @app.get("/ping")
@@ -810,14 +850,20 @@ async def ping():
 async def clear_analysis_cache():
     """Clear the AI analysis cache to force fresh analysis"""
     try:
-        if 'ai_selector' in globals():
-            ai_selector.clear_cache()
-            return {"status": "success", "message": "Analysis cache cleared"}
-        else:
-            return {"status": "error", "message": "AI selector not initialized"}
+        # The cache is persistent and shared by every AI selector instance
+        await get_background_processor().clear_ai_cache()
+        return {"status": "success", "message": "Analysis cache cleared"}
     except Exception as e:
         return {"status": "error", "message": f"Failed to clear cache: {str(e)}"}
 
+@app.get("/cache/proxies")
+async def proxy_cache_stats():
+    """Persistent proxy store statistics"""
+    proxy_store = get_proxy_store()
+    if proxy_store is None:
+        return {"enabled": False}
+    return {"enabled": True, **proxy_store.stats()}
+
 
 # Background Processing Endpoints
 @app.post("/preview/start", response_model=BackgroundJobResponse)
@@ -833,14 +879,14 @@ async def preview_start(request: AutoCutRequest):
             if not os.path.exists(clip_path):
                 raise HTTPException(status_code=400, detail=f"Clip file not found: {clip_path}")
 
-        job_id = background_processor.create_job(
+        job_id = get_background_processor().create_job(
             clips=request.clips,
             music_path=request.music,
             target_duration=request.target_seconds,
             story_style=request.story_style or 'traditional',
             style_preset=request.style_preset or 'romantic'
         )
-        asyncio.create_task(background_processor.start_processing(job_id))
+        get_background_processor().run_job(job_id)
         return BackgroundJobResponse(ok=True, job_id=job_id)
     except HTTPException:
         raise
@@ -849,30 +895,12 @@ async def preview_start(request: AutoCutRequest):
 
 @app.get("/preview/status/{job_id}", response_model=JobStatusResponse)
 async def preview_status(job_id: str):
-    job = background_processor.get_job_status(job_id)
+    job = get_background_processor().get_job_status(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     results_dict = None
     if job.results:
-        results_dict = [
-            {
-                "clip_path": r.clip_path,
-                "final_score": r.final_score,
-                "selection_reason": r.selection_reason,
-                "description": r.description,
-                "object_analysis": {
-                    "key_moments": r.object_analysis.key_moments,
-                    "scene_classification": r.object_analysis.scene_classification,
-                    "objects_detected": r.object_analysis.objects_detected,
-                },
-                "story_arc": {
-                    "scene_classification": r.story_arc.scene_classification,
-                    "emotional_tone": r.story_arc.emotional_tone,
-                    "story_importance": r.story_arc.story_importance,
-                },
-            }
-            for r in job.results
-        ]
+        results_dict = [summarize_result(r) for r in job.results]
     return JobStatusResponse(
         ok=True,
         job_id=job.job_id,
@@ -888,7 +916,7 @@ async def preview_status(job_id: str):
 
 @app.get("/preview/result/{job_id}")
 async def preview_result(job_id: str):
-    results = background_processor.get_job_results(job_id)
+    results = get_background_processor().get_job_results(job_id)
     if results is None:
         raise HTTPException(status_code=404, detail="Job not found or not completed")
 
@@ -950,7 +978,7 @@ async def start_background_job(request: BackgroundJobRequest):
                 raise HTTPException(status_code=400, detail=f"Clip file not found: {clip_path}")
         
         # Create background job
-        job_id = background_processor.create_job(
+        job_id = get_background_processor().create_job(
             clips=request.clips,
             music_path=request.music_path,
             target_duration=request.target_duration,
@@ -959,7 +987,7 @@ async def start_background_job(request: BackgroundJobRequest):
         )
         
         # Start processing in background
-        asyncio.create_task(background_processor.start_processing(job_id))
+        get_background_processor().run_job(job_id)
         
         print(f"INFO:main:🚀 Started background job {job_id} for {len(request.clips)} clips")
         
@@ -975,7 +1003,7 @@ async def start_background_job(request: BackgroundJobRequest):
 @app.get("/background/status/{job_id}", response_model=JobStatusResponse)
 async def get_job_status(job_id: str):
     """Get the status of a background job"""
-    job = background_processor.get_job_status(job_id)
+    job = get_background_processor().get_job_status(job_id)
     
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
@@ -1013,7 +1041,7 @@ async def get_job_status(job_id: str):
 @app.post("/background/cancel/{job_id}")
 async def cancel_job(job_id: str):
     """Cancel a running background job"""
-    success = background_processor.cancel_job(job_id)
+    success = get_background_processor().cancel_job(job_id)
     
     if not success:
         raise HTTPException(status_code=404, detail="Job not found or cannot be cancelled")
@@ -1023,7 +1051,7 @@ async def cancel_job(job_id: str):
 @app.get("/background/results/{job_id}")
 async def get_job_results(job_id: str):
     """Get the results of a completed background job"""
-    results = background_processor.get_job_results(job_id)
+    results = get_background_processor().get_job_results(job_id)
     
     if results is None:
         raise HTTPException(status_code=404, detail="Job not found or not completed")
@@ -1069,7 +1097,7 @@ async def generate_story_narrative(request: dict):
         print(f"🎬 Generating {narrative_style} story narrative from {len(video_paths)} clips")
         
         # Generate story narrative
-        ai_selector = AIContentSelector()
+        ai_selector = await services.resolve("ai_selector")
         story_narrative = await ai_selector.generate_story_narrative(
             video_paths, narrative_style, target_duration
         )
@@ -1113,8 +1141,8 @@ async def generate_story_narrative_live_endpoint(request: StoryNarrativeRequest)
         print(f"🎬 Live story narrative request: {len(request.clips)} clips, style: {request.narrative_style}")
         
         # Initialize AI components
-        ai_selector = AIContentSelector()
-        story_generator = AIStoryNarrativeGenerator()
+        ai_selector = await services.resolve("ai_selector")
+        story_generator = ai_selector.story_narrative
         
         # Progress callback for WebSocket updates
         async def progress_callback(progress_data):
@@ -1217,19 +1245,57 @@ async def generate_story_narrative_live_endpoint(request: StoryNarrativeRequest)
 @app.post("/background/cleanup")
 async def cleanup_old_jobs():
     """Clean up old completed jobs"""
-    cleaned_count = background_processor.cleanup_old_jobs()
+    cleaned_count = get_background_processor().cleanup_old_jobs()
     return {"ok": True, "cleaned_jobs": cleaned_count}
 
+def parse_ws_command(data: str) -> Optional[Dict[str, Any]]:
+    """Parse a {"action": "subscribe"|"unsubscribe", "job_id": ...} message (None for anything else)"""
+    try:
+        command = json.loads(data)
+    except ValueError:
+        return None
+    if (isinstance(command, dict) and command.get("action") in ("subscribe", "unsubscribe")
+            and isinstance(command.get("job_id"), str)):
+        return command
+    return None
+
+def subscribe_to_job(client: JobEventClient, job_id: str) -> None:
+    if not get_background_processor().subscribe(client, job_id):
+        client.put({"type": "error", "job_id": job_id, "error": "Job not found"})
+
 @app.websocket("/ws/live-analysis")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for live analysis updates"""
-    await manager.connect(websocket)
+    """
+    WebSocket endpoint for live analysis updates
+
+    Send {"action": "subscribe", "job_id": "..."} to receive a job's
+    job_progress, clip_result and job_results events (and
+    {"action": "unsubscribe", ...} to stop). Other text is echoed back.
+    """
+    client = await manager.connect(websocket)
     try:
         while True:
-            # Keep connection alive
             data = await websocket.receive_text()
-            # Echo back for connection testing
-            await manager.send_personal_message(f"Echo: {data}", websocket)
+            command = parse_ws_command(data)
+            if command is None:
+                # Echo back for connection testing
+                await manager.send_personal_message(f"Echo: {data}", websocket)
+            elif command["action"] == "subscribe":
+                subscribe_to_job(client, command["job_id"])
+            else:
+                manager.events.unsubscribe(client, command["job_id"])
+    except WebSocketDisconnect:
+        manager.disconnect(websocket)
+
+@app.websocket("/ws/jobs/{job_id}")
+async def job_events_endpoint(websocket: WebSocket, job_id: str):
+    """WebSocket endpoint streaming the events of a single job"""
+    client = await manager.connect(websocket)
+    subscribe_to_job(client, job_id)
+    try:
+        while True:
+            # Nothing to handle from the client; wait for it to go away
+            await websocket.receive_text()
     except WebSocketDisconnect:
         manager.disconnect(websocket)
 
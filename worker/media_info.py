@@ -0,0 +1,173 @@
+"""
+Media Info Service for ClipSense
+
+Probes each media file once with a single ffprobe JSON call and returns
+duration, frame rate, resolution and codecs together. Results are cached by file fingerprint and shared by
+VideoProcessor, ConformProcessor and anything else that needs metadata, so
+a job no longer spawns one ffprobe per duration lookup.
+"""
+
+import asyncio
+import json
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+try:
+    from .fingerprint import cached_fingerprint
+    from .ffmpeg_pool import get_ffmpeg_pool
+except ImportError:
+    from fingerprint import cached_fingerprint
+    from ffmpeg_pool import get_ffmpeg_pool
+
+# Number of probed files kept in memory
+MEDIA_INFO_CACHE_SIZE = 2048
+
+
+@dataclass
+class MediaInfo:
+    """Container and stream metadata for one media file"""
+    path: str
+    duration: float
+    fps: float = 0.0
+    width: int = 0
+    height: int = 0
+    video_codec: Optional[str] = None
+    audio_codec: Optional[str] = None
+
+
+def _parse_rate(rate: Optional[str]) -> float:
+    """Parse an ffprobe rational frame rate such as '30000/1001'"""
+    if not rate:
+        return 0.0
+    try:
+        num, _, den = rate.partition("/")
+        return float(num) / float(den or 1) if float(den or 1) else 0.0
+    except ValueError:
+        return 0.0
+
+
+class MediaInfoService:
+    """Probes media files once and caches the result by content fingerprint"""
+
+    def __init__(self, max_entries: int = MEDIA_INFO_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, MediaInfo]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.probes = 0
+
+    def _remember(self, key: str, info: MediaInfo) -> None:
+        self._cache[key] = info
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def _cached(self, key: str) -> Optional[MediaInfo]:
+        info = self._cache.get(key)
+        if info is None:
+            return None
+        self._cache.move_to_end(key)
+        return info
+
+    async def probe(self, path: str) -> MediaInfo:
+        """
+        Get metadata for a media file, probing it only if it is not cached
+
+        Args:
+            path: Media file path
+
+        Raises:
+            subprocess.CalledProcessError: If ffprobe fails
+        """
+        key = cached_fingerprint(path)
+        while True:
+            info = self._cached(key)
+            if info is not None:
+                return info
+
+            # Concurrent requests for the same file share one ffprobe
+            pending = self._in_flight.get(key)
+            if pending is None:
+                break
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The caller running the probe was cancelled, not this one: probe again
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            info = await self._run_probe(path)
+            self._remember(key, info)
+            future.set_result(info)
+            return info
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure does not log a warning
+            future.exception()
+            raise
+        except BaseException:
+            # Cancellation belongs to this caller only; waiters start their own probe
+            future.cancel()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    async def _run_probe(self, path: str) -> MediaInfo:
+        cmd = [
+            "ffprobe",
+            "-v", "quiet",
+            "-print_format", "json",
+            "-show_format",
+            "-show_streams",
+            os.path.abspath(path)
+        ]
+        result = await get_ffmpeg_pool().run(cmd, capture_output=True)
+        self.probes += 1
+        return self._parse(path, json.loads(result.stdout or b"{}"))
+
+    @staticmethod
+    def _parse(path: str, data: dict) -> MediaInfo:
+        streams = data.get("streams", [])
+        video = next((s for s in streams if s.get("codec_type") == "video"), {})
+        audio = next((s for s in streams if s.get("codec_type") == "audio"), {})
+
+        duration = data.get("format", {}).get("duration") or video.get("duration") or 0.0
+
+        width, height = int(video.get("width", 0)), int(video.get("height", 0))
+        # Report display dimensions for rotated (portrait phone) footage
+        rotation = int(video.get("tags", {}).get("rotate", 0) or 0)
+        for side_data in video.get("side_data_list", []):
+            rotation = int(side_data.get("rotation", rotation) or rotation)
+        if rotation % 180 != 0:
+            width, height = height, width
+
+        return MediaInfo(
+            path=path,
+            duration=float(duration),
+            fps=_parse_rate(video.get("avg_frame_rate")) or _parse_rate(video.get("r_frame_rate")),
+            width=width,
+            height=height,
+            video_codec=video.get("codec_name"),
+            audio_codec=audio.get("codec_name"),
+        )
+
+    async def duration(self, path: str) -> float:
+        """Duration in seconds"""
+        return (await self.probe(path)).duration
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+_service: Optional[MediaInfoService] = None
+
+
+def get_media_info_service() -> MediaInfoService:
+    """Shared process-wide media info service"""
+    global _service
+    if _service is None:
+        _service = MediaInfoService()
+    return _service
@@ -7,11 +7,6 @@ try:
 except ImportError:
     from config import Config
 
-try:
-    from openai import OpenAI
-except Exception:
-    OpenAI = None  # type: ignore
-
 
 class OpenAIVisionClient:
     """Thin wrapper around OpenAI Vision to classify thumbnail images."""
@@ -21,15 +16,19 @@ class OpenAIVisionClient:
         self.api_key = api_key or Config.OPENAI_API_KEY
         self.model = model or Config.OPENAI_VISION_MODEL
         self._client = None
-        if self.enabled and OpenAI is not None:
+        if self.enabled:
+            try:
+                # Imported only when vision is on: the SDK takes most of a second to import
+                from openai import OpenAI
+            except Exception:
+                print("WARNING:openai_vision:openai package not available; disabling vision.")
+                self.enabled = False
+                return
             try:
                 self._client = OpenAI(api_key=self.api_key)
             except Exception as e:
                 print(f"WARNING:openai_vision:Failed to initialize OpenAI client: {e}")
                 self.enabled = False
-        elif self.enabled and OpenAI is None:
-            print("WARNING:openai_vision:openai package not available; disabling vision.")
-            self.enabled = False
 
     def analyze_thumbnail(self, image_path: str) -> Dict[str, Any]:
         """
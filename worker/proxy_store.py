@@ -0,0 +1,148 @@
+"""
+Persistent Proxy Store for ClipSense
+
+Keeps 720p proxies across jobs so iterating on the same footage skips the
+proxy stage entirely. Proxies are keyed on the source file fingerprint plus
+the proxy encode settings, written atomically (encode to a temporary file,
+then rename into place) and evicted least-recently-used once the store
+grows past its size cap.
+"""
+
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, Optional
+try:
+    from .config import Config
+    from .fingerprint import cached_fingerprint
+except ImportError:
+    from config import Config
+    from fingerprint import cached_fingerprint
+
+# Settings that do not change the encoded proxy and must not split the cache
+NON_OUTPUT_SETTINGS = ("threads",)
+
+# Proxies used this recently are never evicted (they may belong to a running job)
+EVICTION_GRACE_SECONDS = 15 * 60
+
+# Abandoned partial writes older than this are removed during eviction
+STALE_PARTIAL_SECONDS = 60 * 60
+
+
+class ProxyStore:
+    """Size-capped, content-addressed directory of proxy files"""
+
+    def __init__(self, store_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.store_dir = store_dir or os.path.join(Config.CACHE_DIR, "proxies")
+        self.max_bytes = max_bytes if max_bytes is not None else int(Config.PROXY_CACHE_MAX_GB * 1024 ** 3)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.store_dir, exist_ok=True)
+
+    def proxy_key(self, clip_path: str, settings: Dict[str, Any]) -> str:
+        """Cache key for a source clip encoded with the given proxy settings"""
+        output_settings = {k: v for k, v in settings.items() if k not in NON_OUTPUT_SETTINGS}
+        material = json.dumps({"source": cached_fingerprint(clip_path), "settings": output_settings}, sort_keys=True)
+        return hashlib.sha256(material.encode()).hexdigest()[:32]
+
+    def proxy_path(self, key: str) -> str:
+        return os.path.join(self.store_dir, f"{key}.mp4")
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Return the stored proxy for a key (marking it recently used), or None"""
+        path = self.proxy_path(key)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return path
+
+    def partial_path(self, key: str) -> str:
+        """Unique temporary path to encode into before commit()"""
+        return os.path.join(self.store_dir, f"{key}.{uuid.uuid4().hex[:8]}.partial.mp4")
+
+    def commit(self, key: str, partial_path: str) -> str:
+        """Atomically move a finished encode into the store and enforce the size cap"""
+        path = self.proxy_path(key)
+        os.replace(partial_path, path)
+        self.evict()
+        return path
+
+    def discard(self, partial_path: str) -> None:
+        """Remove a failed or cancelled partial encode"""
+        try:
+            os.remove(partial_path)
+        except OSError:
+            pass
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.store_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".mp4"):
+                    stat = entry.stat()
+                    entries.append((entry.path, entry.name.endswith(".partial.mp4"), stat.st_size, stat.st_mtime))
+        return entries
+
+    def evict(self) -> None:
+        """Delete least recently used proxies until the store fits in max_bytes"""
+        now = time.time()
+        proxies = []
+        total = 0
+        for path, partial, size, mtime in self._entries():
+            if partial:
+                if now - mtime > STALE_PARTIAL_SECONDS:
+                    self.discard(path)
+                continue
+            proxies.append((mtime, path, size))
+            total += size
+
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for mtime, path, size in sorted(proxies):
+            if total <= self.max_bytes or now - mtime < EVICTION_GRACE_SECONDS:
+                break
+            self.discard(path)
+            total -= size
+            evicted += 1
+        if evicted:
+            print(f"INFO:proxy_store:🧹 Evicted {evicted} proxies (store size {total / 1024 ** 3:.2f}GB)")
+
+    def clear(self) -> None:
+        """Remove every stored proxy"""
+        for path, _, _, _ in self._entries():
+            self.discard(path)
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count, size and hit/miss counters"""
+        proxies = [(size, mtime) for _, partial, size, mtime in self._entries() if not partial]
+        return {
+            "path": self.store_dir,
+            "entries": len(proxies),
+            "size_bytes": sum(size for size, _ in proxies),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "oldest_access": min((mtime for _, mtime in proxies), default=None),
+        }
+
+
+_store: Optional[ProxyStore] = None
+
+
+def get_proxy_store() -> Optional[ProxyStore]:
+    """Shared proxy store, or None when PROXY_CACHE_ENABLED is off"""
+    global _store
+    if not Config.PROXY_CACHE_ENABLED:
+        return None
+    if _store is None:
+        _store = ProxyStore()
+    return _store
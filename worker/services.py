@@ -0,0 +1,169 @@
+"""
+Shared Services for ClipSense
+
+Application-scoped instances of the analyzers and processors used by the
+API endpoints and the background processor. Building an AIContentSelector
+loads Haar cascades, opens the analysis cache and sets up the vision and
+narrative clients, so it is done once per process instead of per request;
+every endpoint shares the same instances and therefore the same caches.
+
+VideoProcessor and ConformProcessor keep per-render temp directories, so
+they are not shared: video_processor() returns a fresh, cheap processor
+wired to the shared analyzers.
+
+Instances are created lazily on first use, and so are the modules behind
+them (OpenCV, librosa and the analyzers take seconds to import), which
+keeps importing the API itself fast. warm_up() imports and builds
+everything (and starts the analysis workers) ahead of the first request;
+with WORKER_WARMUP=background it runs once the server is listening.
+Async code gets services through resolve() / new_video_processor(), which
+build them (or wait for warm_up()) in a worker thread rather than on the
+event loop.
+"""
+
+import asyncio
+import importlib
+import threading
+import time
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+try:
+    from .config import Config
+except ImportError:
+    from config import Config
+
+if TYPE_CHECKING:
+    from ai_content_selector import AIContentSelector
+    from ai_story_narrative import AIStoryNarrativeGenerator
+    from simple_beat_detector import SimpleBeatDetector
+    from video_processor import VideoProcessor
+    from visual_analyzer import VisualAnalyzer
+
+
+def load_module(name: str) -> ModuleType:
+    """Import a sibling worker module on first use (works as a package or from the worker directory)"""
+    if __package__:
+        return importlib.import_module(f".{name}", __package__)
+    return importlib.import_module(name)
+
+
+class Services:
+    """Lazily built, process-wide analyzer and processor instances"""
+
+    def __init__(self):
+        # One lock per service: building one never blocks callers of another
+        self._locks = {name: threading.Lock() for name in ("_ai_selector", "_visual_analyzer", "_beat_detector")}
+        self._ai_selector: Optional["AIContentSelector"] = None
+        self._visual_analyzer: Optional["VisualAnalyzer"] = None
+        self._beat_detector: Optional["SimpleBeatDetector"] = None
+        self._video_processor_type: Optional[type] = None
+        self.warming = False
+        self.warmed = False
+        self.warm_up_error: Optional[str] = None
+
+    def _get(self, field: str, build: Callable[[], Any]) -> Any:
+        # Built services are returned without locking; the lock only serializes the first build
+        service = getattr(self, field)
+        if service is None:
+            with self._locks[field]:
+                service = getattr(self, field)
+                if service is None:
+                    service = build()
+                    setattr(self, field, service)
+        return service
+
+    @property
+    def ai_selector(self) -> "AIContentSelector":
+        return self._get("_ai_selector", lambda: load_module("ai_content_selector").AIContentSelector())
+
+    @property
+    def story_generator(self) -> "AIStoryNarrativeGenerator":
+        return self.ai_selector.story_narrative
+
+    @property
+    def visual_analyzer(self) -> "VisualAnalyzer":
+        return self._get("_visual_analyzer", lambda: load_module("visual_analyzer").VisualAnalyzer())
+
+    @property
+    def beat_detector(self) -> "SimpleBeatDetector":
+        return self._get("_beat_detector", lambda: load_module("simple_beat_detector").SimpleBeatDetector())
+
+    def video_processor(self) -> "VideoProcessor":
+        """A new VideoProcessor for one request, using the shared analyzers"""
+        if self._video_processor_type is None:
+            self._video_processor_type = load_module("video_processor").VideoProcessor
+        return self._video_processor_type(
+            ai_selector=self.ai_selector,
+            beat_detector=self.beat_detector,
+            visual_analyzer=self.visual_analyzer
+        )
+
+    async def resolve(self, name: str) -> Any:
+        """
+        A service property (ai_selector, visual_analyzer, beat_detector) for async callers
+
+        Until the service is built, it is resolved in a worker thread: building it
+        (or waiting for warm_up() to finish building it) takes seconds and must not
+        block the event loop.
+        """
+        if getattr(self, f"_{name}") is not None:
+            return getattr(self, name)
+        return await asyncio.get_running_loop().run_in_executor(None, getattr, self, name)
+
+    async def new_video_processor(self) -> "VideoProcessor":
+        """video_processor() for async callers, built off the event loop until everything it needs is ready"""
+        if None in (self._ai_selector, self._visual_analyzer, self._beat_detector, self._video_processor_type):
+            return await asyncio.get_running_loop().run_in_executor(None, self.video_processor)
+        return self.video_processor()
+
+    def warm_up(self) -> None:
+        """Build every service and start the analysis workers (blocking; run off the event loop)"""
+        start_time = time.time()
+        self.warming = True
+        try:
+            self.ai_selector.analysis_executor.warm_up()
+            self.visual_analyzer
+            self.beat_detector
+            self._video_processor_type = load_module("video_processor").VideoProcessor
+        except Exception as e:
+            # Not fatal: whatever failed is built (or fails visibly) on first use
+            self.warm_up_error = str(e)
+            print(f"WARNING:services:Warm-up failed: {e}")
+            return
+        finally:
+            self.warming = False
+        self.warmed = True
+        print(f"INFO:services:🔥 Services warmed up in {time.time() - start_time:.2f}s")
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness of each service, without building anything"""
+        selector = self._ai_selector
+        executor = selector.analysis_executor if selector is not None else None
+        return {
+            "analyzers": {
+                "ready": selector is not None and self._visual_analyzer is not None,
+                "warming": self.warming,
+                "error": self.warm_up_error,
+            },
+            "music_analysis": {"ready": self._beat_detector is not None},
+            "analysis_executor": {
+                "ready": executor is not None and executor.ready,
+                "mode": executor.mode if executor is not None else None,
+                "workers": executor.workers if executor is not None else None,
+            },
+            "analysis_cache": {
+                "ready": selector is not None and selector.analysis_cache is not None,
+                "enabled": Config.ANALYSIS_CACHE_ENABLED,
+            },
+        }
+
+
+_services: Optional[Services] = None
+
+
+def get_services() -> Services:
+    """Shared process-wide services"""
+    global _services
+    if _services is None:
+        _services = Services()
+    return _services
@@ -12,13 +12,39 @@ Uses a simplified approach for stable beat detection:
 import os
 import librosa
 import numpy as np
-import tempfile
-import subprocess
-import asyncio
 import soundfile as sf
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 import time
+try:
+    from .analysis_cache import AnalysisCache
+    from .audio_loader import load_audio_async
+    from .config import Config
+except ImportError:
+    from analysis_cache import AnalysisCache
+    from audio_loader import load_audio_async
+    from config import Config
+
+# Bump when the analysis output changes so cached results are invalidated
+ANALYZER_VERSION = 1
+
+_music_cache: Optional[AnalysisCache] = None
+_music_cache_failed = False
+
+
+def get_music_cache() -> Optional[AnalysisCache]:
+    """Shared music analysis cache, or None when caching is disabled or unavailable"""
+    global _music_cache, _music_cache_failed
+    if not Config.ANALYSIS_CACHE_ENABLED or _music_cache_failed:
+        return None
+    if _music_cache is None:
+        try:
+            _music_cache = AnalysisCache(db_path=os.path.join(Config.CACHE_DIR, "music_cache.sqlite"))
+        except Exception as e:
+            _music_cache_failed = True
+            print(f"WARNING:simple_beat_detector:Music analysis cache unavailable, analyzing without cache: {e}")
+            return None
+    return _music_cache
 
 
 class SimpleBeatDetector:
@@ -30,11 +56,31 @@ class SimpleBeatDetector:
         self.time_signature = 4   # 4/4 time signature (4 beats per bar)
         self.min_tempo = 60       # Minimum reasonable tempo
         self.max_tempo = 200      # Maximum reasonable tempo
+        self.start_bpm = 120      # Prior for librosa tempo estimation
+        self.tightness = 100      # How strictly beats follow the tempo
         
+    def _cache_params(self) -> Dict[str, Any]:
+        """Detector settings that affect the analysis"""
+        return {
+            "version": ANALYZER_VERSION,
+            "sample_rate": self.sample_rate,
+            "hop_length": self.hop_length,
+            "time_signature": self.time_signature,
+            "min_tempo": self.min_tempo,
+            "max_tempo": self.max_tempo,
+            "start_bpm": self.start_bpm,
+            "tightness": self.tightness,
+        }
+    
     async def analyze_music(self, music_path: str, target_duration: Optional[float] = None) -> Dict[str, Any]:
         """
         Simple and reliable music analysis
         
+        Results are cached by audio fingerprint. With the cache enabled the
+        whole track is analyzed once and every target_duration is served by
+        filtering its beat and bar grid; without it only the first
+        target_duration seconds are decoded.
+        
         Args:
             music_path: Path to music file
             target_duration: Optional target duration to limit analysis
@@ -47,66 +93,20 @@ class SimpleBeatDetector:
         try:
             print(f"🎵 Simple music analysis: {Path(music_path).name}")
             
-            # Convert to WAV if needed
-            wav_path = await self._ensure_wav_format(music_path)
-            
-            # Load audio file
-            print("📊 Loading audio file...")
-            y, sr = librosa.load(wav_path, sr=self.sample_rate)
-            
-            # Limit duration if specified
-            if target_duration is not None:
-                max_samples = int(target_duration * self.sample_rate)
-                y = y[:max_samples]
-            
-            print(f"📈 Audio loaded: {len(y)/self.sample_rate:.1f}s, {self.sample_rate}Hz")
-            
-            # Step 1: Find the actual start of musical content
-            print("🎵 Detecting musical content start...")
-            music_start = self._find_music_start(y, sr)
-            print(f"🎼 Music starts at: {music_start:.2f}s")
-            
-            # Trim audio to start from musical content
-            if music_start > 0:
-                start_sample = int(music_start * sr)
-                y = y[start_sample:]
-                print(f"✂️  Trimmed audio: {len(y)/sr:.1f}s remaining")
-            
-            # Step 2: Tempo estimation using librosa
-            print("🥁 Estimating tempo...")
-            tempo, beats = librosa.beat.beat_track(
-                y=y, sr=sr, hop_length=self.hop_length,
-                start_bpm=120, tightness=100
-            )
+            cache = get_music_cache()
+            track = self._load_cached_track(music_path)
+            cached = track is not None
             
-            # Ensure tempo is within reasonable bounds
-            tempo = max(self.min_tempo, min(self.max_tempo, float(tempo)))
-            
-            print(f"🎼 Detected tempo: {tempo:.1f} BPM")
-            
-            # Step 3: Generate regular beats based on tempo
-            print("🎯 Generating regular beats...")
-            beat_interval = 60.0 / tempo
-            duration = len(y) / sr
-            
-            # Generate beats from 0 to duration (relative to music start)
-            beat_times = np.arange(0, duration, beat_interval)
-            
-            # Step 4: Generate bars (every 4 beats)
-            print("🎼 Generating bars...")
-            bar_interval = beat_interval * self.time_signature
-            bar_times = np.arange(0, duration, bar_interval)
-            
-            # Step 5: Align beats and bars to the grid
-            print("🔧 Aligning beats and bars...")
-            aligned_beats = self._align_to_grid(beat_times, beat_interval)
-            aligned_bars = self._align_to_grid(bar_times, bar_interval)
+            if cached:
+                print(f"💾 Using cached music analysis ({track['tempo']:.1f} BPM)")
+            else:
+                # A cached analysis must serve any later target_duration, so it covers the whole track
+                track = await self._analyze_track(music_path, target_duration if cache is None else None)
+                self._store_cached_track(music_path, track)
             
-            # Adjust timestamps to absolute time (add music_start offset)
-            if music_start > 0:
-                aligned_beats = aligned_beats + music_start
-                aligned_bars = aligned_bars + music_start
-                print(f"⏰ Adjusted timestamps: +{music_start:.2f}s offset")
+            aligned_beats = np.array(track["beat_times"])
+            aligned_bars = np.array(track["bar_times"])
+            tempo = track["tempo"]
             
             # Filter to target duration if specified
             if target_duration is not None:
@@ -135,7 +135,9 @@ class SimpleBeatDetector:
                 "bars_per_minute": float(bars_per_minute),
                 "beats_per_bar": beats_per_bar,
                 "time_signature": f"{self.time_signature}/4",
+                "music_start": track["music_start"],
                 "analysis_duration": analysis_duration,
+                "cached": cached,
                 "confidence": {
                     "tempo": 0.8,  # High confidence for regular beats
                     "beats": 0.9,  # Very high confidence for regular beats
@@ -149,6 +151,107 @@ class SimpleBeatDetector:
             print("🔄 Falling back to basic analysis...")
             return self._fallback_analysis(target_duration)
     
+    def _load_cached_track(self, music_path: str) -> Optional[Dict[str, Any]]:
+        """Cached full-track analysis, if any (a failing cache is a miss)"""
+        cache = get_music_cache()
+        if cache is None:
+            return None
+        try:
+            return cache.get("music", music_path, self._cache_params())
+        except Exception as e:
+            print(f"WARNING:simple_beat_detector:Music cache read failed, analyzing without cache: {e}")
+            return None
+    
+    def _store_cached_track(self, music_path: str, track: Dict[str, Any]) -> None:
+        cache = get_music_cache()
+        # Truncated analyses cannot serve longer target durations, so only full tracks are kept
+        if cache is None or not track["complete"]:
+            return
+        try:
+            cache.put("music", music_path, self._cache_params(), track)
+        except Exception as e:
+            # The analysis itself succeeded; only the cache entry is lost
+            print(f"WARNING:simple_beat_detector:Failed to cache music analysis for {music_path}: {e}")
+    
+    async def _analyze_track(self, music_path: str, max_duration: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Analyze a track: music start, tempo, beat/bar grid and onset envelope
+        
+        Args:
+            music_path: Path to music file
+            max_duration: Decode and analyze only this many seconds
+            
+        Returns:
+            JSON-serializable dict with absolute beat_times and bar_times
+        """
+        # Decode straight from FFmpeg; -t keeps long songs from being decoded in full
+        print("📊 Loading audio file...")
+        sr = self.sample_rate
+        y = await load_audio_async(music_path, sr, duration=max_duration)
+        complete = max_duration is None or len(y) < int(max_duration * sr)
+        
+        print(f"📈 Audio loaded: {len(y)/self.sample_rate:.1f}s, {self.sample_rate}Hz")
+        
+        # Step 1: Find the actual start of musical content
+        print("🎵 Detecting musical content start...")
+        music_start = self._find_music_start(y, sr)
+        print(f"🎼 Music starts at: {music_start:.2f}s")
+        
+        # Trim audio to start from musical content
+        if music_start > 0:
+            start_sample = int(music_start * sr)
+            y = y[start_sample:]
+            print(f"✂️  Trimmed audio: {len(y)/sr:.1f}s remaining")
+        
+        # Step 2: Tempo estimation using librosa (onset envelope kept for the cache)
+        print("🥁 Estimating tempo...")
+        onset_envelope = librosa.onset.onset_strength(y=y, sr=sr, hop_length=self.hop_length)
+        tempo, beats = librosa.beat.beat_track(
+            onset_envelope=onset_envelope, sr=sr, hop_length=self.hop_length,
+            start_bpm=self.start_bpm, tightness=self.tightness
+        )
+        
+        # Ensure tempo is within reasonable bounds
+        tempo = max(self.min_tempo, min(self.max_tempo, float(np.atleast_1d(tempo)[0])))
+        
+        print(f"🎼 Detected tempo: {tempo:.1f} BPM")
+        
+        # Step 3: Generate regular beats based on tempo
+        print("🎯 Generating regular beats...")
+        beat_interval = 60.0 / tempo
+        duration = len(y) / sr
+        
+        # Generate beats from 0 to duration (relative to music start)
+        beat_times = np.arange(0, duration, beat_interval)
+        
+        # Step 4: Generate bars (every 4 beats)
+        print("🎼 Generating bars...")
+        bar_interval = beat_interval * self.time_signature
+        bar_times = np.arange(0, duration, bar_interval)
+        
+        # Step 5: Align beats and bars to the grid
+        print("🔧 Aligning beats and bars...")
+        aligned_beats = self._align_to_grid(beat_times, beat_interval)
+        aligned_bars = self._align_to_grid(bar_times, bar_interval)
+        
+        # Adjust timestamps to absolute time (add music_start offset)
+        if music_start > 0:
+            aligned_beats = aligned_beats + music_start
+            aligned_bars = aligned_bars + music_start
+            print(f"⏰ Adjusted timestamps: +{music_start:.2f}s offset")
+        
+        return {
+            "tempo": float(tempo),
+            "music_start": float(music_start),
+            "duration": float(duration + music_start),
+            "complete": complete,
+            "analyzed_duration": max_duration,
+            "beat_times": aligned_beats.tolist(),
+            "bar_times": aligned_bars.tolist(),
+            "onset_hop_seconds": self.hop_length / sr,
+            "onset_envelope": np.round(onset_envelope, 4).tolist(),
+        }
+    
     def _find_music_start(self, y: np.ndarray, sr: int) -> float:
         """Find the actual start of musical content (not silence/intro)"""
         try:
@@ -208,45 +311,6 @@ class SimpleBeatDetector:
         
         return np.unique(np.array(aligned))
     
-    async def _ensure_wav_format(self, music_path: str) -> str:
-        """Convert music file to WAV format for better librosa compatibility"""
-        if music_path.lower().endswith('.wav'):
-            return music_path
-        
-        # Create temporary WAV file
-        temp_dir = tempfile.gettempdir()
-        wav_path = os.path.join(temp_dir, f"temp_beat_detect_{os.getpid()}.wav")
-        
-        try:
-            # Convert to WAV using FFmpeg
-            cmd = [
-                "ffmpeg", "-y",
-                "-i", music_path,
-                "-acodec", "pcm_s16le",
-                "-ar", str(self.sample_rate),
-                "-ac", "1",  # Mono for beat detection
-                wav_path
-            ]
-            
-            print(f"🔄 Converting to WAV for analysis...")
-            result = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await result.communicate()
-            
-            if result.returncode != 0:
-                raise Exception(f"FFmpeg conversion failed: {stderr.decode()}")
-            
-            return wav_path
-            
-        except Exception as e:
-            print(f"⚠️  WAV conversion failed: {e}")
-            # Return original path as fallback
-            return music_path
-    
     def _fallback_analysis(self, target_duration: Optional[float] = None) -> Dict[str, Any]:
         """Fallback analysis when simple methods fail"""
         # Use regular intervals based on typical music tempo (120 BPM)
@@ -292,14 +356,3 @@ class SimpleBeatDetector:
                 "overall": 0.5
             }
         }
-    
-    def cleanup_temp_files(self):
-        """Clean up temporary WAV files"""
-        temp_dir = tempfile.gettempdir()
-        
-        try:
-            for file in os.listdir(temp_dir):
-                if file.startswith("temp_beat_detect_"):
-                    os.remove(os.path.join(temp_dir, file))
-        except Exception:
-            pass  # Ignore cleanup errors
@@ -37,6 +37,9 @@ class StoryArcResult(BaseModel):
 class StoryArcCreator:
     """Creates narrative story arcs for wedding highlights"""
     
+    # Bump when detection logic changes so cached results are invalidated
+    ANALYZER_VERSION = 1
+    
     def __init__(self):
         # Story structure templates for different wedding styles
         self.story_templates = {
@@ -0,0 +1,66 @@
+"""
+Streaming Top-K Selection for ClipSense
+
+Keeps only the best k clip results seen so far in a bounded min-heap, so
+selection memory is O(k) regardless of folder size, and decides when
+further analysis can no longer change the selection: given an upper bound
+on the score of every item not offered yet, the selection is final once
+the lowest kept score reaches that bound.
+"""
+
+import heapq
+import itertools
+from typing import Callable, Generic, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class TopKSelector(Generic[T]):
+    """Bounded min-heap of the k highest-scoring items"""
+
+    def __init__(self, k: int, score: Callable[[T], float]):
+        self.k = max(1, k)
+        self._score = score
+        self._heap: List[Tuple[float, int, T]] = []
+        # Tie-breaker so equal scores never compare the items themselves
+        self._counter = itertools.count()
+        self.seen = 0
+
+    def push(self, item: T) -> bool:
+        """Offer an item; returns True if it is currently in the top k"""
+        self.seen += 1
+        entry = (self._score(item), next(self._counter), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return True
+        if entry[0] > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+            return True
+        return False
+
+    @property
+    def full(self) -> bool:
+        return len(self._heap) >= self.k
+
+    @property
+    def min_score(self) -> Optional[float]:
+        """Lowest score in the current top k (None while empty)"""
+        return self._heap[0][0] if self._heap else None
+
+    def can_stop(self, score_bound: float) -> bool:
+        """
+        Whether no remaining item can enter the top k
+
+        score_bound must be an upper bound on the score of every item not
+        offered yet. push() only displaces the lowest kept item for a
+        strictly higher score, so once the heap is full and its lowest score
+        is at least the bound, the selection can no longer change.
+        """
+        return self.full and self.min_score >= score_bound
+
+    def results(self) -> List[T]:
+        """Kept items, best first"""
+        return [item for _, _, item in sorted(self._heap, key=lambda entry: (-entry[0], entry[1]))]
+
+    def __len__(self) -> int:
+        return len(self._heap)
@@ -15,7 +15,7 @@ import math
 import time
 import shutil
 from pathlib import Path
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Callable, Optional
 import asyncio
 try:
     from .config import Config
@@ -23,22 +23,32 @@ try:
     from .simple_beat_detector import SimpleBeatDetector
     from .visual_analyzer import VisualAnalyzer
     from .ai_content_selector import AIContentSelector
+    from .ffmpeg_pool import get_ffmpeg_pool
+    from .proxy_store import get_proxy_store
+    from .media_info import get_media_info_service
 except ImportError:
     from config import Config
     from timeline import write_timeline
     from simple_beat_detector import SimpleBeatDetector
     from visual_analyzer import VisualAnalyzer
     from ai_content_selector import AIContentSelector
+    from ffmpeg_pool import get_ffmpeg_pool
+    from proxy_store import get_proxy_store
+    from media_info import get_media_info_service
 
 class VideoProcessor:
     """Handles all video processing operations using FFmpeg"""
     
-    def __init__(self):
+    def __init__(self,
+                 ai_selector: Optional[AIContentSelector] = None,
+                 beat_detector: Optional[SimpleBeatDetector] = None,
+                 visual_analyzer: Optional[VisualAnalyzer] = None):
         self.temp_dir = None
         self.proxy_dir = None
-        self.beat_detector = SimpleBeatDetector()
-        self.visual_analyzer = VisualAnalyzer()
-        self.ai_selector = AIContentSelector() # New: Initialize AI Content Selector
+        # Pass the shared instances (services.get_services()) to avoid rebuilding analyzers per request
+        self.beat_detector = beat_detector or SimpleBeatDetector()
+        self.visual_analyzer = visual_analyzer or VisualAnalyzer()
+        self.ai_selector = ai_selector or AIContentSelector()
         
         # Set default export directory
         self.export_dir = "/Users/anastasiosk/Documents/devprojects/OS/clipsense2/tests/testwedding/Export"
@@ -93,7 +103,9 @@ class VideoProcessor:
             use_ai_selection: Whether to use AI content selection
             
         Returns:
-            Dictionary with proxy output path, timeline path, and metrics
+            Dictionary with proxy output path, timeline path, and metrics; when
+            AI selection ran, "ai_results" holds the selected clips'
+            AIContentSelectionResult objects
         """
         start_time = time.time()
         
@@ -133,10 +145,15 @@ class VideoProcessor:
                 clips_to_process = selected_clip_paths
             else:
                 print("📹 Using all provided clips...")
+                selected_clips = None
                 clips_to_process = clips
             
             # Continue with normal processing using selected clips
-            return await self.assemble_from_sources(clips_to_process, music_path, target_duration)
+            result = await self.assemble_from_sources(clips_to_process, music_path, target_duration)
+            if selected_clips is not None:
+                # Callers report on these instead of analyzing the clips again
+                result["ai_results"] = selected_clips
+            return result
             
         except Exception as e:
             print(f"❌ AI selection error: {e}")
@@ -212,50 +229,67 @@ class VideoProcessor:
             # Use bar times for clip alignment if we have enough bars
             if len(bar_times) >= len(proxy_paths):
                 print(f"🎯 Using {len(bar_times)} detected bars for clip alignment")
-                trimmed_segments = await self._trim_segments_with_bars(proxy_paths, bar_times, target_duration)
+                plan = await self._plan_bar_segments(proxy_paths, bar_times, target_duration)
             elif len(beat_times) >= len(proxy_paths):
                 print(f"🎯 Using {len(beat_times)} detected beats for timing")
-                trimmed_segments = await self._trim_segments_with_beats(proxy_paths, beat_times, target_duration)
+                plan = await self._plan_beat_segments(proxy_paths, beat_times, target_duration)
             else:
                 print(f"⚠️  Not enough beats/bars found for {len(proxy_paths)} clips")
                 print("🔄 Using regular timing as fallback")
                 segment_duration = target_duration / len(proxy_paths)
-                trimmed_segments = await self._trim_segments(proxy_paths, segment_duration)
+                plan = await self._plan_equal_segments(proxy_paths, segment_duration)
             
-            # Step 4: Check if we need to loop segments to reach target duration
-            actual_duration = 0.0
-            for seg in trimmed_segments:
-                actual_duration += await self._get_video_duration(seg)
+            # Segment lengths come from the plan; rendered files never need probing
+            segment_durations = [self._planned_length(segment) for segment in plan]
+            actual_duration = sum(segment_durations)
             
-            print(f"📊 Natural duration: {actual_duration:.2f}s from {len(trimmed_segments)} clips")
-            print(f"🎯 Target duration: {target_duration}s (will use natural duration)")
-            print(f"🔍 DEBUG: actual_duration = {actual_duration}, type = {type(actual_duration)}")
-            
-            # Use natural duration instead of forcing target duration
-            # This ensures clips are not looped and duration matches actual content
-            
-            # Step 4: Concatenate all segments
-            print("🔗 Concatenating segments...")
-            concatenated_video = await self._concatenate_segments(trimmed_segments)
-            
-            # Step 5: Overlay and normalize music
-            render_start_time = time.time()
-            print("🎵 Overlaying music and normalizing audio...")
-            
-            if Config.ENABLE_TIMING_LOGS:
-                print(f"🕐 [TIMING] Final render started at {time.strftime('%H:%M:%S')}")
-            
-            final_output = await self._overlay_music(concatenated_video, music_path)
-            render_time = time.time() - render_start_time
-            
-            if Config.ENABLE_TIMING_LOGS:
-                print(f"⏱️  Render took {render_time:.2f} seconds")
-                print(f"🕐 [TIMING] Final render completed at {time.strftime('%H:%M:%S')}")
+            if Config.RENDER_ENGINE.lower() == "filtergraph":
+                # Single ffmpeg pass: cut, concatenate and mix music without intermediate files
+                trimmed_segments = [segment["source"] for segment in plan]
+                print(f"📊 Natural duration: {actual_duration:.2f}s from {len(plan)} clips")
+                
+                render_start_time = time.time()
+                if Config.ENABLE_TIMING_LOGS:
+                    print(f"🕐 [TIMING] Final render started at {time.strftime('%H:%M:%S')}")
+                
+                final_output = await self._render_filtergraph(plan, music_path, actual_duration)
+                render_time = time.time() - render_start_time
+                
+                if Config.ENABLE_TIMING_LOGS:
+                    print(f"⏱️  Render took {render_time:.2f} seconds")
+                    print(f"🕐 [TIMING] Final render completed at {time.strftime('%H:%M:%S')}")
+            else:
+                trimmed_segments = await self._execute_trim_plan(plan)
+                
+                print(f"📊 Natural duration: {actual_duration:.2f}s from {len(trimmed_segments)} clips")
+                print(f"🎯 Target duration: {target_duration}s (will use natural duration)")
+                print(f"🔍 DEBUG: actual_duration = {actual_duration}, type = {type(actual_duration)}")
+                
+                # Use natural duration instead of forcing target duration
+                # This ensures clips are not looped and duration matches actual content
+                
+                # Step 4: Concatenate all segments
+                print("🔗 Concatenating segments...")
+                concatenated_video = await self._concatenate_segments(trimmed_segments)
+                
+                # Step 5: Overlay and normalize music
+                render_start_time = time.time()
+                print("🎵 Overlaying music and normalizing audio...")
+                
+                if Config.ENABLE_TIMING_LOGS:
+                    print(f"🕐 [TIMING] Final render started at {time.strftime('%H:%M:%S')}")
+                
+                final_output = await self._overlay_music(concatenated_video, music_path, actual_duration)
+                render_time = time.time() - render_start_time
+                
+                if Config.ENABLE_TIMING_LOGS:
+                    print(f"⏱️  Render took {render_time:.2f} seconds")
+                    print(f"🕐 [TIMING] Final render completed at {time.strftime('%H:%M:%S')}")
             
             print(f"✅ Proxy video created: {final_output}")
             
             # Generate timeline data with music analysis
-            timeline_data = await self._generate_timeline_data(clips, trimmed_segments, actual_duration, music_path, beat_times, bar_times)
+            timeline_data = await self._generate_timeline_data(clips, trimmed_segments, actual_duration, music_path, beat_times, bar_times, segment_durations)
             timeline_path = os.path.join(self.temp_dir, "timeline.json")
             
             print(f"📝 Writing timeline with bar markers starting at {bar_times[0]:.3f}s")
@@ -314,13 +348,39 @@ class VideoProcessor:
             # self._cleanup_temp_files()
             pass
     
-    async def _create_proxies(self, clips: List[str]) -> List[str]:
-        """Create optimized 720p proxies for all input clips"""
-        proxy_paths = []
-        ffmpeg_settings = Config.get_ffmpeg_proxy_settings()
+    async def _create_proxies(self, clips: List[str],
+                              on_progress: Optional[Callable[[int, int, str], None]] = None) -> List[str]:
+        """
+        Create optimized 720p proxies for all input clips concurrently
         
-        for i, clip_path in enumerate(clips):
-            proxy_path = os.path.join(self.proxy_dir, f"proxy_{i:03d}.mp4")
+        Encodes run through the shared FFmpeg pool; the returned proxy paths
+        are in the same order as clips. on_progress(done, total, clip_path)
+        is called as each proxy finishes. Proxies already in the persistent
+        proxy store are reused without encoding.
+        """
+        ffmpeg_settings = Config.get_ffmpeg_proxy_settings()
+        proxy_store = get_proxy_store()
+        completed = 0
+        
+        def report(clip_path: str, cached: bool):
+            nonlocal completed
+            completed += 1
+            source = "cached" if cached else "ready"
+            print(f"🎬 Proxy {completed}/{len(clips)} {source}: {os.path.basename(clip_path)}")
+            if on_progress:
+                on_progress(completed, len(clips), clip_path)
+        
+        async def create_proxy(i: int, clip_path: str) -> str:
+            if proxy_store is not None:
+                key = proxy_store.proxy_key(clip_path, ffmpeg_settings)
+                stored_path = proxy_store.lookup(key)
+                if stored_path:
+                    report(clip_path, cached=True)
+                    return stored_path
+                # Encode to a unique partial file and rename into the store when done
+                proxy_path = proxy_store.partial_path(key)
+            else:
+                proxy_path = os.path.join(self.proxy_dir, f"proxy_{i:03d}.mp4")
             
             # Optimized FFmpeg command for fast proxy creation
             cmd = [
@@ -330,21 +390,56 @@ class VideoProcessor:
                 "-c:v", "libx264",
                 "-preset", ffmpeg_settings["preset"],
                 "-crf", ffmpeg_settings["crf"],
+                "-threads", ffmpeg_settings["threads"],
                 "-c:a", "aac",
                 "-b:a", ffmpeg_settings["audio_bitrate"],
                 "-movflags", "+faststart",  # Optimize for streaming
                 proxy_path
             ]
+            if "gop" in ffmpeg_settings:
+                # Fixed keyframe grid (no scene-cut keyframes) so copy trims land on predictable cut points.
+                # Closed GOPs without B-frames keep every GOP self-contained and in display order, so a
+                # cut at a grid point ends exactly there whatever FFMPEG_PRESET would otherwise choose
+                cmd[-1:-1] = [
+                    "-g", ffmpeg_settings["gop"],
+                    "-keyint_min", ffmpeg_settings["gop"],
+                    "-sc_threshold", "0",
+                    "-bf", ffmpeg_settings["bframes"],
+                    "-flags", "+cgop",
+                    "-pix_fmt", ffmpeg_settings["pix_fmt"],
+                ]
+            
+            if proxy_store is None:
+                await self._run_ffmpeg(cmd)
+                report(clip_path, cached=False)
+                return proxy_path
             
-            print(f"🎬 Creating proxy for: {os.path.basename(clip_path)}")
-            await self._run_ffmpeg(cmd)
-            proxy_paths.append(proxy_path)
-        
-        return proxy_paths
+            try:
+                await self._run_ffmpeg(cmd)
+            except BaseException:
+                proxy_store.discard(proxy_path)
+                raise
+            stored_path = proxy_store.commit(key, proxy_path)
+            report(clip_path, cached=False)
+            return stored_path
+        
+        tasks = [asyncio.ensure_future(create_proxy(i, clip_path)) for i, clip_path in enumerate(clips)]
+        try:
+            # gather keeps results in input order regardless of completion order
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
     
     async def _trim_segments(self, proxy_paths: List[str], segment_duration: float) -> List[str]:
         """Trim equal segments from each proxy clip"""
-        trimmed_segments = []
+        plan = await self._plan_equal_segments(proxy_paths, segment_duration)
+        return await self._execute_trim_plan(plan)
+    
+    async def _plan_equal_segments(self, proxy_paths: List[str], segment_duration: float) -> List[Dict[str, Any]]:
+        """Plan equal segments from the middle of each proxy clip"""
+        plan = []
         
         for i, proxy_path in enumerate(proxy_paths):
             # Get video duration first
@@ -354,30 +449,20 @@ class VideoProcessor:
             start_time = max(0, (duration - segment_duration) / 2)
             
             trimmed_path = os.path.join(self.temp_dir, f"trimmed_{i:03d}.mp4")
-            
-            cmd = [
-                "ffmpeg", "-y",
-                "-i", proxy_path,
-                "-ss", str(start_time),
-                "-t", str(segment_duration),
-                "-c:v", "libx264",
-                "-c:a", "aac",
-                "-preset", "fast",
-                "-crf", "23",
-                "-r", "25",  # Force 25fps for consistency
-                "-vf", "scale=1280:720",  # Ensure consistent resolution
-                trimmed_path
-            ]
+            plan.append(self._plan_segment(proxy_path, start_time, segment_duration, trimmed_path, duration))
             
             print(f"Trimming segment {i+1}/{len(proxy_paths)}")
-            await self._run_ffmpeg(cmd)
-            trimmed_segments.append(trimmed_path)
         
-        return trimmed_segments
+        return plan
     
     async def _trim_segments_with_beats(self, proxy_paths: List[str], beat_times: List[float], target_duration: float) -> List[str]:
         """Trim segments using beat detection for precise timing"""
-        trimmed_segments = []
+        plan = await self._plan_beat_segments(proxy_paths, beat_times, target_duration)
+        return await self._execute_trim_plan(plan)
+    
+    async def _plan_beat_segments(self, proxy_paths: List[str], beat_times: List[float], target_duration: float) -> List[Dict[str, Any]]:
+        """Plan one segment per clip, timed by beat intervals"""
+        plan = []
         
         # Calculate segment durations based on beat intervals
         beat_intervals = []
@@ -413,29 +498,20 @@ class VideoProcessor:
             
             trimmed_path = os.path.join(self.temp_dir, f"trimmed_beat_{i:03d}.mp4")
             
-            cmd = [
-                "ffmpeg", "-y",
-                "-i", proxy_path,
-                "-ss", str(start_time),
-                "-t", str(segment_duration),
-                "-c:v", "libx264",
-                "-c:a", "aac",
-                "-preset", "fast",
-                "-crf", "23",
-                "-r", "25",  # Force 25fps for consistency
-                "-vf", "scale=1280:720",  # Ensure consistent resolution
-                trimmed_path
-            ]
+            plan.append(self._plan_segment(proxy_path, start_time, segment_duration, trimmed_path, duration))
             
             print(f"🎵 Trimming segment {i+1}/{len(proxy_paths)} (beat at {beat_time:.2f}s, duration {segment_duration:.2f}s)")
-            await self._run_ffmpeg(cmd)
-            trimmed_segments.append(trimmed_path)
         
-        return trimmed_segments
+        return plan
     
     async def _trim_segments_with_bars(self, proxy_paths: List[str], bar_times: List[float], target_duration: float) -> List[str]:
         """Trim segments using bar detection and visual analysis for optimal clip selection"""
-        trimmed_segments = []
+        plan = await self._plan_bar_segments(proxy_paths, bar_times, target_duration)
+        return await self._execute_trim_plan(plan)
+    
+    async def _plan_bar_segments(self, proxy_paths: List[str], bar_times: List[float], target_duration: float) -> List[Dict[str, Any]]:
+        """Plan one segment per clip, timed by bar intervals and placed on the best visual moment"""
+        plan = []
         
         # Calculate segment durations based on bar intervals
         bar_intervals = []
@@ -506,25 +582,68 @@ class VideoProcessor:
             
             trimmed_path = os.path.join(self.temp_dir, f"trimmed_bar_{i:03d}.mp4")
             
-            cmd = [
-                "ffmpeg", "-y",
-                "-i", proxy_path,
-                "-ss", str(start_time),
-                "-t", str(segment_duration),
-                "-c:v", "libx264",
-                "-c:a", "aac",
-                "-preset", "fast",
-                "-crf", "23",
-                "-r", "25",  # Force 25fps for consistency
-                "-vf", "scale=1280:720",  # Ensure consistent resolution
-                trimmed_path
-            ]
+            plan.append(self._plan_segment(proxy_path, start_time, segment_duration, trimmed_path, duration))
             
             print(f"🎼 Trimming segment {i+1}/{len(proxy_paths)} (bar at {bar_time:.2f}s, duration {segment_duration:.2f}s)")
-            await self._run_ffmpeg(cmd)
-            trimmed_segments.append(trimmed_path)
         
-        return trimmed_segments
+        return plan
+    
+    def _plan_segment(self, proxy_path: str, start_time: float, segment_duration: float, output_path: str,
+                      source_duration: Optional[float] = None) -> Dict[str, Any]:
+        """Describe one cut; in copy mode the start snaps back to the proxy keyframe grid"""
+        if Config.is_copy_trim():
+            keyframe_interval = max(1, Config.PROXY_GOP_FRAMES) / Config.PROXY_FPS
+            start_time = math.floor(start_time / keyframe_interval + 1e-6) * keyframe_interval
+        return {
+            "source": proxy_path,
+            "start": start_time,
+            "duration": segment_duration,
+            "output": output_path,
+            "source_duration": source_duration
+        }
+    
+    @staticmethod
+    def _planned_length(segment: Dict[str, Any]) -> float:
+        """Length a planned segment will actually have (clips shorter than the cut end early)"""
+        if segment.get("source_duration") is None:
+            return segment["duration"]
+        return max(0.0, min(segment["duration"], segment["source_duration"] - segment["start"]))
+    
+    def _trim_command(self, segment: Dict[str, Any]) -> List[str]:
+        """FFmpeg command for one planned cut"""
+        if Config.is_copy_trim():
+            # Input seeking lands exactly on the keyframe the start was snapped to. The end can cut on
+            # any frame only because proxies are encoded with -bf 0 and -flags +cgop (see the proxy
+            # command), not because of the preset: keep those flags if the proxy encode changes
+            return [
+                "ffmpeg", "-y",
+                "-ss", f"{segment['start']:.3f}",
+                "-i", segment["source"],
+                "-t", f"{segment['duration']:.3f}",
+                "-map", "0:v:0",
+                "-c", "copy",
+                "-an",  # Source audio is replaced by the music track
+                "-avoid_negative_ts", "make_zero",
+                segment["output"]
+            ]
+        return [
+            "ffmpeg", "-y",
+            "-i", segment["source"],
+            "-ss", str(segment["start"]),
+            "-t", str(segment["duration"]),
+            "-c:v", "libx264",
+            "-c:a", "aac",
+            "-preset", "fast",
+            "-crf", "23",
+            "-r", "25",  # Force 25fps for consistency
+            "-vf", "scale=1280:720",  # Ensure consistent resolution
+            segment["output"]
+        ]
+    
+    async def _execute_trim_plan(self, plan: List[Dict[str, Any]]) -> List[str]:
+        """Cut every planned segment (concurrently through the FFmpeg pool), keeping plan order"""
+        await asyncio.gather(*(self._run_ffmpeg(self._trim_command(segment)) for segment in plan))
+        return [segment["output"] for segment in plan]
     
     async def _loop_segments_to_duration(self, segments: List[str], target_duration: float) -> List[str]:
         """Loop segments to reach target duration"""
@@ -574,15 +693,18 @@ class VideoProcessor:
             for segment in segments:
                 f.write(f"file '{os.path.abspath(segment)}'\n")
         
+        if Config.is_copy_trim():
+            # Segments share codec parameters (normalized proxies), so concat without re-encoding
+            codec_args = ["-c", "copy"]
+        else:
+            codec_args = ["-c:v", "libx264", "-c:a", "aac", "-preset", "fast", "-crf", "23"]
+        
         cmd = [
             "ffmpeg", "-y",
             "-f", "concat",
             "-safe", "0",
             "-i", filelist_path,
-            "-c:v", "libx264",
-            "-c:a", "aac",
-            "-preset", "fast",
-            "-crf", "23",
+            *codec_args,
             os.path.abspath(concatenated_path)
         ]
         
@@ -590,12 +712,13 @@ class VideoProcessor:
         await self._run_ffmpeg(cmd)
         return concatenated_path
     
-    async def _overlay_music(self, video_path: str, music_path: str) -> str:
+    async def _overlay_music(self, video_path: str, music_path: str, video_duration: Optional[float] = None) -> str:
         """Overlay music and normalize audio to -14 LUFS"""
         final_path = os.path.abspath(os.path.join(self.temp_dir, "highlight_final.mp4"))
         
-        # Get video duration to ensure music matches exactly
-        video_duration = await self._get_video_duration(video_path)
+        # Video duration (known from the render plan, or probed) so music matches exactly
+        if video_duration is None:
+            video_duration = await self._get_video_duration(video_path)
         print(f"🎵 Video duration: {video_duration:.2f}s, trimming music to match")
         
         cmd = [
@@ -618,39 +741,66 @@ class VideoProcessor:
         await self._run_ffmpeg(cmd)
         return final_path
     
-    async def _get_video_duration(self, video_path: str) -> float:
-        """Get video duration using ffprobe"""
+    async def _render_filtergraph(self, plan: List[Dict[str, Any]], music_path: str, total_duration: float) -> str:
+        """
+        Render the whole preview in one ffmpeg invocation
+        
+        Each planned segment is opened as its own input with input-side
+        seeking (-ss/-t, frame accurate when re-encoding), normalized with
+        setpts/scale/fps, joined with the concat filter and muxed with the
+        loudness-normalized music in a single encode.
+        """
+        final_path = os.path.abspath(os.path.join(self.temp_dir, "highlight_final.mp4"))
+        
+        inputs: List[str] = []
+        filters: List[str] = []
+        for i, segment in enumerate(plan):
+            inputs += [
+                "-ss", f"{segment['start']:.3f}",
+                "-t", f"{segment['duration']:.3f}",
+                "-i", os.path.abspath(segment["source"])
+            ]
+            filters.append(f"[{i}:v:0]setpts=PTS-STARTPTS,scale=1280:720,setsar=1,fps=25[v{i}]")
+        
+        music_index = len(plan)
+        inputs += ["-i", os.path.abspath(music_path)]
+        
+        video_labels = "".join(f"[v{i}]" for i in range(len(plan)))
+        filters.append(f"{video_labels}concat=n={len(plan)}:v=1:a=0[v]")
+        filters.append(
+            f"[{music_index}:a]atrim=duration={total_duration:.3f},loudnorm=I=-14:TP=-1.5:LRA=11,"
+            f"aresample=48000,pan=stereo|FL=c0|FR=c1[a]"
+        )
+        
         cmd = [
-            "ffprobe",
-            "-v", "quiet",
-            "-show_entries", "format=duration",
-            "-of", "csv=p=0",
-            video_path
+            "ffmpeg", "-y",
+            *inputs,
+            "-filter_complex", ";".join(filters),
+            "-map", "[v]",
+            "-map", "[a]",
+            "-c:v", "libx264",
+            "-preset", "fast",
+            "-crf", "23",
+            "-c:a", "aac",
+            "-ac", "2",
+            "-b:a", "192k",
+            "-shortest",
+            final_path
         ]
         
-        result = await self._run_ffmpeg(cmd, capture_output=True)
-        return float(result.stdout.strip())
+        print(f"🎬 Rendering {len(plan)} segments with music in a single pass...")
+        await self._run_ffmpeg(cmd)
+        return final_path
+    
+    async def _get_video_duration(self, video_path: str) -> float:
+        """Get video duration (probed once per file via the shared media info service)"""
+        return await get_media_info_service().duration(video_path)
     
     async def _run_ffmpeg(self, cmd: List[str], capture_output: bool = False) -> subprocess.CompletedProcess:
-        """Run FFmpeg command asynchronously"""
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE if capture_output else None,
-            stderr=asyncio.subprocess.PIPE
-        )
-        stdout, stderr = await process.communicate()
-        
-        if process.returncode != 0:
-            # Always capture stderr for better error reporting
-            stderr_text = stderr.decode('utf-8') if stderr else ""
-            stdout_text = stdout.decode('utf-8') if stdout else ""
-            raise subprocess.CalledProcessError(
-                process.returncode, cmd, stdout_text, stderr_text
-            )
-        
-        return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+        """Run FFmpeg command asynchronously through the shared bounded pool"""
+        return await get_ffmpeg_pool().run(cmd, capture_output=capture_output)
     
-    async def _generate_timeline_data(self, original_clips: List[str], trimmed_segments: List[str], target_duration: int, music_path: str, beat_times: List[float] = None, bar_times: List[float] = None) -> List[Dict[str, Any]]:
+    async def _generate_timeline_data(self, original_clips: List[str], trimmed_segments: List[str], target_duration: int, music_path: str, beat_times: List[float] = None, bar_times: List[float] = None, segment_durations: Optional[List[float]] = None) -> List[Dict[str, Any]]:
         """Generate timeline data from trimmed segments with beat/bar detection"""
         timeline_clips = []
         
@@ -665,7 +815,11 @@ class VideoProcessor:
                 # We have both original and trimmed segment
                 original_clip = original_clips[i]
                 trimmed_segment = trimmed_segments[i]
-                duration = await self._get_video_duration(trimmed_segment)
+                if segment_durations is not None:
+                    # Segment lengths are known from the render plan
+                    duration = segment_durations[i]
+                else:
+                    duration = await self._get_video_duration(trimmed_segment)
             elif i < len(original_clips):
                 # We have original clip but no trimmed segment - use full clip
                 original_clip = original_clips[i]
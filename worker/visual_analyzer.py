@@ -13,6 +13,12 @@ from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
 from pathlib import Path
 import logging
+try:
+    from .frame_source import FrameSource, FrameConsumer
+    from .frame_features import FrameFeatures, get_face_cascade
+except ImportError:
+    from frame_source import FrameSource, FrameConsumer
+    from frame_features import FrameFeatures, get_face_cascade
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -42,6 +48,75 @@ class MomentScore:
     quality_score: float
     combined_score: float
 
+class VisualFramePass(FrameConsumer):
+    """Collects per-frame visual metrics for one clip from shared frames"""
+    
+    # All visual metrics are computed on the grayscale frame
+    needs_color = False
+    
+    def __init__(self, analyzer: 'VisualAnalyzer', video_path: str, sample_rate: float = 1.0):
+        self.analyzer = analyzer
+        self.video_path = video_path
+        self.interval_seconds = sample_rate
+        self.sampling_mode = analyzer.sampling_mode
+        self.moments: List[MomentScore] = []
+        self.face_counts: List[float] = []
+        self.motion_scores: List[float] = []
+        self.brightness_scores: List[float] = []
+        self.contrast_scores: List[float] = []
+        self.stability_scores: List[float] = []
+        self.prev_gray: Optional[np.ndarray] = None
+    
+    def on_frame(self, features: FrameFeatures, timestamp: float) -> None:
+        # Analyze this frame
+        moment = self.analyzer._analyze_frame(features, timestamp, self.prev_gray)
+        self.moments.append(moment)
+        
+        # Collect metrics
+        self.face_counts.append(moment.face_score)
+        self.motion_scores.append(moment.motion_score)
+        self.brightness_scores.append(moment.quality_score)
+        self.contrast_scores.append(self.analyzer._calculate_contrast(features.gray))
+        self.stability_scores.append(self.analyzer._calculate_stability(features.gray, self.prev_gray))
+        
+        # Copy: the frame buffer may be reused by the frame source
+        self.prev_gray = features.gray.copy()
+    
+    def build_result(self, duration: float, analysis_duration: float) -> VisualAnalysisResult:
+        """Turn the collected metrics into a VisualAnalysisResult"""
+        # Calculate overall metrics
+        face_count = int(np.mean(self.face_counts)) if self.face_counts else 0
+        face_confidence = float(np.mean(self.face_counts)) if self.face_counts else 0.0
+        motion_score = float(np.mean(self.motion_scores)) if self.motion_scores else 0.0
+        brightness_score = float(np.mean(self.brightness_scores)) if self.brightness_scores else 0.0
+        contrast_score = float(np.mean(self.contrast_scores)) if self.contrast_scores else 0.0
+        stability_score = float(np.mean(self.stability_scores)) if self.stability_scores else 0.0
+        
+        # Calculate overall quality (weighted combination)
+        overall_quality = self.analyzer._calculate_overall_quality(
+            face_confidence, motion_score, brightness_score,
+            contrast_score, stability_score
+        )
+        
+        # Find best moments
+        best_moments = self.analyzer._find_best_moments(self.moments, duration)
+        
+        logger.info(f"✅ Analysis complete: {face_count} faces, quality: {overall_quality:.2f}, {len(best_moments)} best moments")
+        
+        return VisualAnalysisResult(
+            clip_path=self.video_path,
+            duration=duration,
+            face_count=face_count,
+            face_confidence=face_confidence,
+            motion_score=motion_score,
+            brightness_score=brightness_score,
+            contrast_score=contrast_score,
+            stability_score=stability_score,
+            overall_quality=overall_quality,
+            best_moments=best_moments,
+            analysis_duration=analysis_duration
+        )
+
 class VisualAnalyzer:
     """
     Advanced visual analysis for video content
@@ -54,8 +129,13 @@ class VisualAnalyzer:
     - Content-aware cut recommendations
     """
     
-    def __init__(self):
+    # Bump when scoring logic changes so cached results are invalidated
+    ANALYZER_VERSION = 1
+    
+    def __init__(self, sampling_mode: Optional[str] = None):
         """Initialize the visual analyzer with OpenCV models"""
+        # Frame sampling strategy (decode, grab, seek); None uses Config.FRAME_SAMPLING_MODE
+        self.sampling_mode = sampling_mode
         self.face_cascade = None
         self._load_models()
         
@@ -63,8 +143,7 @@ class VisualAnalyzer:
         """Load OpenCV models for face detection"""
         try:
             # Load Haar cascade for face detection
-            cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-            self.face_cascade = cv2.CascadeClassifier(cascade_path)
+            self.face_cascade = get_face_cascade()
             
             if self.face_cascade.empty():
                 logger.warning("Failed to load face cascade, face detection disabled")
@@ -76,6 +155,10 @@ class VisualAnalyzer:
             logger.error(f"❌ Failed to load face detection model: {e}")
             self.face_cascade = None
     
+    def create_frame_consumer(self, video_path: str, sample_rate: float = 1.0) -> 'VisualFramePass':
+        """Create a per-clip frame consumer for use with a shared FrameSource"""
+        return VisualFramePass(self, video_path, sample_rate)
+    
     async def analyze_clip(self, video_path: str, sample_rate: float = 1.0) -> VisualAnalysisResult:
         """
         Analyze a video clip for visual content and quality
@@ -92,90 +175,12 @@ class VisualAnalyzer:
         try:
             logger.info(f"🎬 Analyzing video: {Path(video_path).name}")
             
-            # Open video
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                raise ValueError(f"Could not open video file: {video_path}")
-            
-            # Get video properties
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            duration = frame_count / fps if fps > 0 else 0
-            
-            logger.info(f"📊 Video properties: {frame_count} frames, {fps:.2f} FPS, {duration:.2f}s")
-            
-            # Analyze frames
-            frame_interval = max(1, int(fps * sample_rate))
-            moments = []
-            face_counts = []
-            motion_scores = []
-            brightness_scores = []
-            contrast_scores = []
-            stability_scores = []
-            
-            prev_frame = None
-            frame_idx = 0
-            
-            while True:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                # Sample frames at specified rate
-                if frame_idx % frame_interval == 0:
-                    timestamp = frame_idx / fps
-                    
-                    # Analyze this frame
-                    moment = await self._analyze_frame(frame, timestamp, prev_frame)
-                    moments.append(moment)
-                    
-                    # Collect metrics
-                    face_counts.append(moment.face_score)
-                    motion_scores.append(moment.motion_score)
-                    brightness_scores.append(moment.quality_score)
-                    contrast_scores.append(self._calculate_contrast(frame))
-                    stability_scores.append(self._calculate_stability(frame, prev_frame))
-                
-                prev_frame = frame.copy() if frame_idx % frame_interval == 0 else prev_frame
-                frame_idx += 1
-            
-            cap.release()
-            
-            # Calculate overall metrics
-            face_count = int(np.mean(face_counts)) if face_counts else 0
-            face_confidence = float(np.mean(face_counts)) if face_counts else 0.0
-            motion_score = float(np.mean(motion_scores)) if motion_scores else 0.0
-            brightness_score = float(np.mean(brightness_scores)) if brightness_scores else 0.0
-            contrast_score = float(np.mean(contrast_scores)) if contrast_scores else 0.0
-            stability_score = float(np.mean(stability_scores)) if stability_scores else 0.0
-            
-            # Calculate overall quality (weighted combination)
-            overall_quality = self._calculate_overall_quality(
-                face_confidence, motion_score, brightness_score, 
-                contrast_score, stability_score
-            )
-            
-            # Find best moments
-            best_moments = self._find_best_moments(moments, duration)
+            source = FrameSource(video_path)
+            visual_pass = self.create_frame_consumer(video_path, sample_rate)
+            source.run([visual_pass])
             
             analysis_duration = asyncio.get_event_loop().time() - start_time
-            
-            result = VisualAnalysisResult(
-                clip_path=video_path,
-                duration=duration,
-                face_count=face_count,
-                face_confidence=face_confidence,
-                motion_score=motion_score,
-                brightness_score=brightness_score,
-                contrast_score=contrast_score,
-                stability_score=stability_score,
-                overall_quality=overall_quality,
-                best_moments=best_moments,
-                analysis_duration=analysis_duration
-            )
-            
-            logger.info(f"✅ Analysis complete: {face_count} faces, quality: {overall_quality:.2f}, {len(best_moments)} best moments")
-            return result
+            return visual_pass.build_result(source.duration, analysis_duration)
             
         except Exception as e:
             logger.error(f"❌ Visual analysis failed: {e}")
@@ -194,17 +199,17 @@ class VisualAnalyzer:
                 analysis_duration=asyncio.get_event_loop().time() - start_time
             )
     
-    async def _analyze_frame(self, frame: np.ndarray, timestamp: float, prev_frame: Optional[np.ndarray]) -> MomentScore:
+    def _analyze_frame(self, features: FrameFeatures, timestamp: float, prev_gray: Optional[np.ndarray]) -> MomentScore:
         """Analyze a single frame for visual content"""
         
         # Face detection
-        face_score = self._detect_faces(frame)
+        face_score = self._detect_faces(features)
         
         # Motion analysis
-        motion_score = self._calculate_motion(frame, prev_frame)
+        motion_score = self._calculate_motion(features.gray, prev_gray)
         
         # Quality analysis
-        quality_score = self._calculate_brightness(frame)
+        quality_score = self._calculate_brightness(features.gray)
         
         # Combined score
         combined_score = (face_score * 0.4 + motion_score * 0.3 + quality_score * 0.3)
@@ -217,23 +222,14 @@ class VisualAnalyzer:
             combined_score=combined_score
         )
     
-    def _detect_faces(self, frame: np.ndarray) -> float:
+    def _detect_faces(self, features: FrameFeatures) -> float:
         """Detect faces in frame and return confidence score"""
         if self.face_cascade is None:
             return 0.0
         
         try:
-            # Convert to grayscale for face detection
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            
-            # Detect faces
-            faces = self.face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(30, 30),
-                flags=cv2.CASCADE_SCALE_IMAGE
-            )
+            # Detect faces (memoized per parameter set on the shared frame features)
+            faces = features.faces(scale_factor=1.1, min_neighbors=5, min_size=(features.pixels(30), features.pixels(30)))
             
             # Return normalized face count (0-1 scale)
             face_count = len(faces)
@@ -243,18 +239,14 @@ class VisualAnalyzer:
             logger.warning(f"Face detection failed: {e}")
             return 0.0
     
-    def _calculate_motion(self, frame: np.ndarray, prev_frame: Optional[np.ndarray]) -> float:
-        """Calculate motion score between frames"""
-        if prev_frame is None:
+    def _calculate_motion(self, gray: np.ndarray, prev_gray: Optional[np.ndarray]) -> float:
+        """Calculate motion score between grayscale frames"""
+        if prev_gray is None:
             return 0.0
         
         try:
-            # Convert to grayscale
-            gray1 = cv2.cvtColor(prev_frame, cv2.COLOR_BGR2GRAY)
-            gray2 = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            
             # Calculate absolute difference
-            diff = cv2.absdiff(gray1, gray2)
+            diff = cv2.absdiff(prev_gray, gray)
             
             # Calculate mean difference (motion intensity)
             motion_intensity = np.mean(diff) / 255.0
@@ -266,12 +258,9 @@ class VisualAnalyzer:
             logger.warning(f"Motion calculation failed: {e}")
             return 0.0
     
-    def _calculate_brightness(self, frame: np.ndarray) -> float:
+    def _calculate_brightness(self, gray: np.ndarray) -> float:
         """Calculate brightness score (0-1, where 0.5 is ideal)"""
         try:
-            # Convert to grayscale
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            
             # Calculate mean brightness
             brightness = np.mean(gray) / 255.0
             
@@ -287,12 +276,9 @@ class VisualAnalyzer:
             logger.warning(f"Brightness calculation failed: {e}")
             return 0.0
     
-    def _calculate_contrast(self, frame: np.ndarray) -> float:
+    def _calculate_contrast(self, gray: np.ndarray) -> float:
         """Calculate contrast score"""
         try:
-            # Convert to grayscale
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            
             # Calculate standard deviation as contrast measure
             contrast = np.std(gray) / 255.0
             
@@ -303,12 +289,12 @@ class VisualAnalyzer:
             logger.warning(f"Contrast calculation failed: {e}")
             return 0.0
     
-    def _calculate_stability(self, frame: np.ndarray, prev_frame: Optional[np.ndarray]) -> float:
+    def _calculate_stability(self, gray: np.ndarray, prev_gray: Optional[np.ndarray]) -> float:
         """Calculate stability score (inverse of motion)"""
-        if prev_frame is None:
+        if prev_gray is None:
             return 1.0  # First frame is considered stable
         
-        motion_score = self._calculate_motion(frame, prev_frame)
+        motion_score = self._calculate_motion(gray, prev_gray)
         stability_score = 1.0 - motion_score
         return max(0.0, stability_score)
     
@@ -398,7 +384,7 @@ class VisualAnalyzer:
             cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
             
             moments = []
-            prev_frame = None
+            prev_gray = None
             frame_idx = start_frame
             
             while frame_idx < end_frame:
@@ -407,10 +393,11 @@ class VisualAnalyzer:
                     break
                 
                 timestamp = frame_idx / fps
-                moment = await self._analyze_frame(frame, timestamp, prev_frame)
+                features = FrameFeatures(frame)
+                moment = self._analyze_frame(features, timestamp, prev_gray)
                 moments.append(moment)
                 
-                prev_frame = frame.copy()
+                prev_gray = features.gray
                 frame_idx += 1
             
             cap.release()
@@ -20,6 +20,12 @@ from typing import List, Dict, Any, Optional, Tuple
 from collections import defaultdict
 import asyncio
 from pydantic import BaseModel
+try:
+    from .frame_source import FrameSource, FrameConsumer
+    from .frame_features import FrameFeatures, get_face_cascade
+except ImportError:
+    from frame_source import FrameSource, FrameConsumer
+    from frame_features import FrameFeatures, get_face_cascade
 
 class WeddingObjectDetectionResult(BaseModel):
     """Result of wedding object detection analysis"""
@@ -32,12 +38,91 @@ class WeddingObjectDetectionResult(BaseModel):
     scene_classification: str  # 'ceremony', 'reception', 'party', 'preparation'
     people_count: int = 0  # Number of people detected in the clip
 
+class ObjectDetectionPass(FrameConsumer):
+    """Accumulates wedding object detections for one clip from shared frames"""
+    
+    # Optimized sampling: analyze every 1.5 seconds for better performance
+    interval_seconds = 1.5
+    
+    def __init__(self, detector: 'WeddingObjectDetector', video_path: str):
+        self.detector = detector
+        self.video_path = video_path
+        self.sampling_mode = detector.sampling_mode
+        self.objects_detected = defaultdict(int)
+        self.confidence_scores = defaultdict(list)
+        self.key_moments: List[float] = []
+        # Previous sampled gray frame of this clip, for motion-based detectors
+        self.prev_gray: Optional[np.ndarray] = None
+    
+    def on_frame(self, features: FrameFeatures, timestamp: float) -> None:
+        # Detect all wedding objects in this frame
+        frame_objects = self.detector._detect_objects_in_frame(features, self.prev_gray)
+        # Copy: the frame buffer may be reused by the frame source
+        self.prev_gray = features.gray.copy()
+        
+        # Update detection counts
+        for obj_type, count in frame_objects.items():
+            self.objects_detected[obj_type] += count
+        
+        # Check for key moments (high object activity)
+        total_objects = sum(frame_objects.values())
+        if total_objects > 0:
+            self.key_moments.append(timestamp)
+            # Only log significant moments to reduce noise
+            if total_objects > 5:
+                print(f"INFO:wedding_object_detector:🎯 Key moment at {timestamp:.2f}s: {total_objects} objects detected")
+    
+    def build_result(self, duration: float, analysis_duration: float) -> WeddingObjectDetectionResult:
+        """Turn the accumulated detections into a WeddingObjectDetectionResult"""
+        if duration == 0:
+            return WeddingObjectDetectionResult(
+                clip_path=self.video_path, duration=0.0, objects_detected={},
+                confidence_scores={}, key_moments=[], analysis_duration=0.0,
+                scene_classification='unknown', people_count=0
+            )
+        
+        # Calculate average confidence scores
+        avg_confidence = {}
+        for obj_type, confidences in self.confidence_scores.items():
+            if confidences:
+                avg_confidence[obj_type] = sum(confidences) / len(confidences)
+            else:
+                avg_confidence[obj_type] = 0.0
+        
+        # Convert to regular dict for Pydantic
+        objects_detected_dict = dict(self.objects_detected)
+        
+        # Classify scene type based on detected objects
+        scene_classification = self.detector._classify_scene(objects_detected_dict)
+        
+        # Calculate people count (faces detected)
+        people_count = objects_detected_dict.get('faces', 0)
+        
+        print(f"INFO:wedding_object_detector:✅ Analysis complete: {len(self.key_moments)} key moments, scene: {scene_classification}")
+        
+        return WeddingObjectDetectionResult(
+            clip_path=self.video_path,
+            duration=duration,
+            objects_detected=objects_detected_dict,
+            confidence_scores=avg_confidence,
+            key_moments=self.key_moments,
+            analysis_duration=analysis_duration,
+            scene_classification=scene_classification,
+            people_count=people_count
+        )
+
 class WeddingObjectDetector:
     """Detects wedding-specific objects and moments in video clips"""
     
-    def __init__(self):
+    # Bump when detection logic changes so cached results are invalidated
+    ANALYZER_VERSION = 1
+    
+    def __init__(self, sampling_mode: Optional[str] = None):
+        # Frame sampling strategy (decode, grab, seek); None uses Config.FRAME_SAMPLING_MODE
+        self.sampling_mode = sampling_mode
+        
         # Initialize OpenCV cascade classifiers for different objects
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        self.face_cascade = get_face_cascade()
         
         # Object detection models (we'll use OpenCV's built-in detectors for now)
         # In production, you'd load more sophisticated models like YOLO or Detectron2
@@ -66,6 +151,10 @@ class WeddingObjectDetector:
             'bouquet_template': None  # Would load bouquet template
         }
     
+    def create_frame_consumer(self, video_path: str) -> 'ObjectDetectionPass':
+        """Create a per-clip frame consumer for use with a shared FrameSource"""
+        return ObjectDetectionPass(self, video_path)
+    
     async def analyze_clip(self, video_path: str, sample_rate: float = 1.0) -> WeddingObjectDetectionResult:
         """
         Analyze a video clip for wedding objects and moments
@@ -79,108 +168,22 @@ class WeddingObjectDetector:
         """
         start_time = time.time()
         
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            raise ValueError(f"Could not open video file: {video_path}")
-        
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        duration = frame_count / fps if fps > 0 else 0.0
-        
-        if duration == 0:
-            return WeddingObjectDetectionResult(
-                clip_path=video_path, duration=0.0, objects_detected={},
-                confidence_scores={}, key_moments=[], analysis_duration=0.0,
-                scene_classification='unknown', people_count=0
-            )
-        
         print(f"INFO:wedding_object_detector:🎬 Analyzing wedding clip: {os.path.basename(video_path)}")
-        print(f"INFO:wedding_object_detector:📊 Video properties: {frame_count} frames, {fps:.2f} FPS, {duration:.2f}s")
-        
-        # Initialize detection results
-        objects_detected = defaultdict(int)
-        confidence_scores = defaultdict(list)
-        key_moments = []
-        
-        # Optimized sampling: analyze every 1-2 seconds for better performance
-        target_interval_seconds = 1.5  # Analyze every 1.5 seconds (3x faster)
-        frame_interval = int(target_interval_seconds * fps) if fps > 0 else 1
-        if frame_interval == 0:
-            frame_interval = 1
-        frame_idx = 0
-        
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            if frame_idx % frame_interval == 0:
-                current_time = frame_idx / fps
-                
-                # Detect all wedding objects in this frame
-                frame_objects = await self._detect_objects_in_frame(frame)
-                
-                # Update detection counts
-                for obj_type, count in frame_objects.items():
-                    objects_detected[obj_type] += count
-                
-                # Check for key moments (high object activity)
-                total_objects = sum(frame_objects.values())
-                if total_objects > 0:
-                    key_moments.append(current_time)
-                    # Only log significant moments to reduce noise
-                    if total_objects > 5:
-                        print(f"INFO:wedding_object_detector:🎯 Key moment at {current_time:.2f}s: {total_objects} objects detected")
-            
-            frame_idx += 1
-        
-        cap.release()
-        
-        # Calculate average confidence scores
-        avg_confidence = {}
-        for obj_type, confidences in confidence_scores.items():
-            if confidences:
-                avg_confidence[obj_type] = sum(confidences) / len(confidences)
-            else:
-                avg_confidence[obj_type] = 0.0
         
-        # Classify scene type based on detected objects
-        scene_classification = self._classify_scene(dict(objects_detected))
-        
-        # Convert to regular dict for Pydantic
-        objects_detected_dict = dict(objects_detected)
+        source = FrameSource(video_path)
+        detection_pass = self.create_frame_consumer(video_path)
+        source.run([detection_pass])
         
-        # Calculate people count (faces detected)
-        people_count = objects_detected_dict.get('faces', 0)
-        
-        end_time = time.time()
-        analysis_duration = end_time - start_time
-        
-        print(f"INFO:wedding_object_detector:✅ Analysis complete: {len(key_moments)} key moments, scene: {scene_classification}")
-        
-        return WeddingObjectDetectionResult(
-            clip_path=video_path,
-            duration=duration,
-            objects_detected=objects_detected_dict,
-            confidence_scores=avg_confidence,
-            key_moments=key_moments,
-            analysis_duration=analysis_duration,
-            scene_classification=scene_classification,
-            people_count=people_count
-        )
+        return detection_pass.build_result(source.duration, time.time() - start_time)
     
-    async def _detect_objects_in_frame(self, frame: np.ndarray) -> Dict[str, int]:
+    def _detect_objects_in_frame(self, features: FrameFeatures, prev_gray: Optional[np.ndarray] = None) -> Dict[str, int]:
         """Detect all wedding objects in a single frame"""
         frame_objects = {}
         
-        # Convert to different color spaces for better detection
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        
-        # Detect each type of wedding object
+        # Detect each type of wedding object (gray, HSV and faces are shared via features)
         for obj_type, detector_func in self.wedding_objects.items():
             try:
-                count = detector_func(frame, gray, hsv)
+                count = detector_func(features, prev_gray)
                 frame_objects[obj_type] = count
             except Exception as e:
                 print(f"WARNING:wedding_object_detector:Error detecting {obj_type}: {e}")
@@ -188,15 +191,17 @@ class WeddingObjectDetector:
         
         return frame_objects
     
-    def _detect_rings(self, frame: np.ndarray, gray: np.ndarray, hsv: np.ndarray) -> int:
+    def _detect_rings(self, features: FrameFeatures, prev_gray: Optional[np.ndarray]) -> int:
         """Detect wedding rings using color and shape analysis"""
         # Look for small circular objects with metallic colors
         # This is a simplified approach - in production you'd use trained models
         
+        frame = features.frame
+        
         # Detect circles using HoughCircles
         circles = cv2.HoughCircles(
-            gray, cv2.HOUGH_GRADIENT, 1, 20,
-            param1=50, param2=30, minRadius=5, maxRadius=50
+            features.gray, cv2.HOUGH_GRADIENT, 1, features.pixels(20),
+            param1=50, param2=30, minRadius=features.pixels(5), maxRadius=features.pixels(50)
         )
         
         ring_count = 0
@@ -213,7 +218,7 @@ class WeddingObjectDetector:
         
         return min(ring_count, 4)  # Cap at 4 rings max per frame
     
-    def _detect_cake(self, frame: np.ndarray, gray: np.ndarray, hsv: np.ndarray) -> int:
+    def _detect_cake(self, features: FrameFeatures, prev_gray: Optional[np.ndarray]) -> int:
         """Detect wedding cake using shape and color analysis"""
         # Look for tall, layered objects with white/cream colors
         # This is a simplified approach with higher thresholds to avoid false positives
@@ -221,7 +226,7 @@ class WeddingObjectDetector:
         # Detect white/cream colored regions
         lower_white = np.array([0, 0, 200])
         upper_white = np.array([180, 30, 255])
-        white_mask = cv2.inRange(hsv, lower_white, upper_white)
+        white_mask = cv2.inRange(features.hsv, lower_white, upper_white)
         
         # Find contours that could be cake layers
         contours, _ = cv2.findContours(white_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -229,43 +234,42 @@ class WeddingObjectDetector:
         cake_count = 0
         for contour in contours:
             area = cv2.contourArea(contour)
-            if area > 5000:  # Higher minimum area for cake detection (was 1000)
+            if area > features.area(5000):  # Higher minimum area for cake detection (was 1000)
                 # Check aspect ratio (cakes are typically taller than wide)
                 x, y, w, h = cv2.boundingRect(contour)
                 aspect_ratio = h / w if w > 0 else 0
                 # More strict aspect ratio check
                 if aspect_ratio > 1.2:  # Significantly taller than wide (was 0.8)
                     # Additional check: should be roughly centered in frame
-                    frame_center_x = frame.shape[1] // 2
-                    if abs(x + w//2 - frame_center_x) < frame.shape[1] // 3:
+                    frame_width = features.frame.shape[1]
+                    frame_center_x = frame_width // 2
+                    if abs(x + w//2 - frame_center_x) < frame_width // 3:
                         cake_count += 1
         
         return min(cake_count, 1)  # Cap at 1 cake max per frame (was 2)
     
-    def _detect_dancing(self, frame: np.ndarray, gray: np.ndarray, hsv: np.ndarray) -> int:
+    def _detect_dancing(self, features: FrameFeatures, prev_gray: Optional[np.ndarray]) -> int:
         """Detect dancing using motion analysis"""
         # This is a simplified motion detection
         # In production, you'd use more sophisticated motion analysis
         
-        # Calculate frame difference (motion)
-        if not hasattr(self, 'prev_gray'):
-            self.prev_gray = gray
+        # Calculate frame difference (motion) against the clip's previous sample
+        if prev_gray is None:
             return 0
         
-        frame_diff = cv2.absdiff(gray, self.prev_gray)
+        frame_diff = cv2.absdiff(features.gray, prev_gray)
         motion_score = np.mean(frame_diff) / 255.0
         
         # Detect people in motion
-        faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
+        faces = features.faces(1.1, 4)
         
         dancing_count = 0
         if len(faces) > 0 and motion_score > 0.1:  # Motion threshold
             dancing_count = len(faces)
         
-        self.prev_gray = gray
         return min(dancing_count, 10)  # Cap at 10 people max per frame
     
-    def _detect_bouquet(self, frame: np.ndarray, gray: np.ndarray, hsv: np.ndarray) -> int:
+    def _detect_bouquet(self, features: FrameFeatures, prev_gray: Optional[np.ndarray]) -> int:
         """Detect bouquet using color and shape analysis"""
         # Look for colorful flower-like objects
         # This is a simplified approach
@@ -273,7 +277,7 @@ class WeddingObjectDetector:
         # Detect colorful regions (flowers)
         lower_colorful = np.array([0, 50, 50])
         upper_colorful = np.array([180, 255, 255])
-        colorful_mask = cv2.inRange(hsv, lower_colorful, upper_colorful)
+        colorful_mask = cv2.inRange(features.hsv, lower_colorful, upper_colorful)
         
         # Find contours that could be bouquets
         contours, _ = cv2.findContours(colorful_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -281,7 +285,7 @@ class WeddingObjectDetector:
         bouquet_count = 0
         for contour in contours:
             area = cv2.contourArea(contour)
-            if 500 < area < 5000:  # Bouquet size range
+            if features.area(500) < area < features.area(5000):  # Bouquet size range
                 # Check for round/oval shape
                 x, y, w, h = cv2.boundingRect(contour)
                 aspect_ratio = w / h if h > 0 else 0
@@ -290,10 +294,10 @@ class WeddingObjectDetector:
         
         return min(bouquet_count, 3)  # Cap at 3 bouquets max per frame
     
-    def _detect_ceremony(self, frame: np.ndarray, gray: np.ndarray, hsv: np.ndarray) -> int:
+    def _detect_ceremony(self, features: FrameFeatures, prev_gray: Optional[np.ndarray]) -> int:
         """Detect ceremony moments using people and setting analysis"""
         # Look for formal settings with multiple people
-        faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
+        faces = features.faces(1.1, 4)
         
         # Ceremony typically has 2+ people in formal attire
         ceremony_score = 0
@@ -302,10 +306,10 @@ class WeddingObjectDetector:
         
         return min(ceremony_score, 8)  # Cap at 8 people max per frame
     
-    def _detect_toast(self, frame: np.ndarray, gray: np.ndarray, hsv: np.ndarray) -> int:
+    def _detect_toast(self, features: FrameFeatures, prev_gray: Optional[np.ndarray]) -> int:
         """Detect toast moments using glass and people detection"""
         # Look for glass-like objects and people
-        faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
+        faces = features.faces(1.1, 4)
         
         # Detect glass-like objects (simplified)
         glass_count = 0
@@ -314,9 +318,9 @@ class WeddingObjectDetector:
         toast_score = min(len(faces), 6) if glass_count > 0 else 0
         return toast_score
     
-    def _detect_people(self, frame: np.ndarray, gray: np.ndarray, hsv: np.ndarray) -> int:
+    def _detect_people(self, features: FrameFeatures, prev_gray: Optional[np.ndarray]) -> int:
         """Detect people using face detection"""
-        faces = self.face_cascade.detectMultiScale(gray, 1.1, 4)
+        faces = features.faces(1.1, 4)
         return len(faces)
     
     def _is_metallic_color(self, color: np.ndarray) -> bool: